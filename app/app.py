@@ -6,13 +6,16 @@ MVP version with scatter plot crossfiltering to AG Grid table.
 import dash
 import dash_bootstrap_components as dbc
 
-from .data.cache import init_cache
+from .background import init_background
+from .data.cache import start_warmup
 from .layout import create_layout
 from .callbacks import register_callbacks
+from .export import register_export_routes
 
-# Initialize filter cache at startup (pre-loads all dropdown values)
+# Warm the filter cache in the background - the server starts right away,
+# datasets selected before warmup reaches them are loaded on first access
 print("Starting MRS Viewer...")
-init_cache()
+start_warmup()
 
 # Initialize Dash app with Bootstrap theme
 app = dash.Dash(
@@ -29,8 +32,12 @@ app = dash.Dash(
 # Set layout
 app.layout = create_layout()
 
-# Register callbacks
+# Register callbacks (heavy chart callbacks as background jobs, if available)
+init_background()
 register_callbacks(app)
 
 # Expose server for production deployments (e.g., gunicorn)
 server = app.server
+
+# Streamed file downloads (XLSX/CSV/Parquet exports)
+register_export_routes(server, app.config.routes_pathname_prefix)
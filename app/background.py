@@ -0,0 +1,82 @@
+"""
+Dash background callbacks for the heavy chart callbacks.
+
+The scatter plot (data load + TI computation), boxplot and histogram run
+as background jobs in worker processes managed by a local
+DiskcacheManager. When a callback is triggered again while its job is
+still running, the browser sends the old job along with the new request and
+Dash terminates it, so workers never finish charts nobody will see.
+
+Every job runs in a freshly forked process that does not share the
+in-memory plot cache with the server, so loaded frames are also kept in a
+size-limited diskcache next to the job results (db.set_shared_cache):
+frames loaded by a job are reused by the server callbacks (overlays, data
+table) and by the next jobs. Without diskcache (pip install .[background])
+or with server.background_callbacks off, the callbacks run inline as before.
+"""
+import functools
+from typing import Optional
+
+from .config import config, resolve_config_path
+
+
+_manager = None
+
+
+def init_background() -> Optional[object]:
+    """Create the DiskcacheManager and the shared frame cache; returns the manager or None."""
+    global _manager
+    server_cfg = config.server
+    if not server_cfg.background_callbacks:
+        return None
+    try:
+        import diskcache
+        from dash import DiskcacheManager
+    except ImportError:
+        print("Warning: diskcache is not installed, chart callbacks run inline (pip install .[background])")
+        return None
+
+    from .data import db
+
+    cache_dir = resolve_config_path(server_cfg.background_cache_dir)
+    _manager = DiskcacheManager(diskcache.Cache(str(cache_dir / "jobs")))
+    db.set_shared_cache(diskcache.Cache(
+        str(cache_dir / "frames"),
+        size_limit=int(server_cfg.shared_cache_mb) * 1024 * 1024,
+    ))
+    return _manager
+
+
+def _no_progress(*_):
+    """set_progress stand-in for callbacks running inline."""
+
+
+def background_callback(app, *args, progress=None, **kwargs):
+    """
+    app.callback registered as a background callback when a manager exists.
+
+    progress: Output(s) of set_progress - the callback then takes
+    set_progress as first argument (a no-op when running inline). Without a
+    manager this is app.callback.
+    """
+    def decorator(func):
+        if _manager is None:
+            if progress is None:
+                return app.callback(*args, **kwargs)(func)
+
+            @functools.wraps(func)
+            def inline(*values):
+                return func(_no_progress, *values)
+
+            return app.callback(*args, **kwargs)(inline)
+
+        options = dict(
+            background=True,
+            manager=_manager,
+            interval=config.server.background_poll_ms,
+        )
+        if progress is not None:
+            options["progress"] = progress
+        return app.callback(*args, **options, **kwargs)(func)
+
+    return decorator
@@ -9,6 +9,7 @@ Modular callback structure:
 - side_charts: Side charts (boxplot, etc.)
 - routing: Page routing and navigation
 - suspicious: Suspicious records basket
+- export: Download links of the streamed exports
 - status_log: Status log panel
 """
 from .filters import register_filter_callbacks
@@ -18,6 +19,7 @@ from .main_content import register_main_callbacks
 from .side_charts import register_side_charts_callbacks
 from .routing import register_routing_callbacks
 from .suspicious import register_suspicious_callbacks
+from .export import register_export_callbacks
 from .status_log import register_status_log_callbacks
 
 
@@ -30,4 +32,5 @@ def register_callbacks(app):
     register_main_callbacks(app)
     register_side_charts_callbacks(app)
     register_suspicious_callbacks(app)
+    register_export_callbacks(app)
     register_status_log_callbacks(app)
@@ -0,0 +1,114 @@
+"""
+Export link callbacks.
+
+Exports are plain download links to the streamed Flask route of
+app.export - the callbacks only keep the links in sync with the basket
+session, the current filters, the plot selection (saved server-side, the
+link carries its digest) and the data table's filter / sort model, no file
+passes through a callback.
+"""
+import json
+from typing import List, Optional
+
+from dash import Input, Output, State, no_update
+
+from .. import ids
+from ..data import basket
+from ..export import export_url, parquet_available
+from .reference import slider_to_date_range
+
+
+def register_export_callbacks(app):
+    """Register callbacks that update the export download links."""
+    base = app.get_relative_path("/")
+
+    @app.callback(
+        Output(ids.BTN_EXPORT_SUSPICIOUS, "href"),
+        Input(ids.STORE_SUSPICIOUS, "data"),
+    )
+    def update_basket_export_link(store_data: Optional[dict]):
+        """Download link of the basket (Excel)."""
+        session = store_data.get("session") if store_data else None
+        if not session:
+            return None
+        return export_url(base, "xlsx", view="basket", session=session)
+
+    @app.callback(
+        Output(ids.STORE_TABLE_MODELS, "data"),
+        Input(ids.AGGRID_TABLE, "getRowsRequest"),
+        State(ids.STORE_TABLE_MODELS, "data"),
+        prevent_initial_call=True,
+    )
+    def update_table_models(request: Optional[dict], current: Optional[str]):
+        """Filter / sort model of the data table's last block request (only when it changes, not on scroll)."""
+        request = request or {}
+        models = {k: request[k] for k in ("filterModel", "sortModel") if request.get(k)}
+        encoded = json.dumps(models, sort_keys=True, separators=(",", ":")) if models else None
+        return no_update if encoded == current else encoded
+
+    @app.callback(
+        [
+            Output(ids.EXPORT_VIEW_XLSX, "href"),
+            Output(ids.EXPORT_VIEW_CSV, "href"),
+            Output(ids.EXPORT_DATASET_XLSX, "href"),
+            Output(ids.EXPORT_DATASET_CSV, "href"),
+            Output(ids.EXPORT_DATASET_PARQUET, "href"),
+            Output(ids.EXPORT_DATASET_PARQUET, "disabled"),
+        ],
+        [
+            Input(ids.DROPDOWN_DATASET, "value"),
+            Input(ids.DROPDOWN_NUKLID, "value"),
+            Input(ids.DROPDOWN_OM, "value"),
+            Input(ids.DROPDOWN_DODAVATEL, "value"),
+            Input(ids.SLIDER_DATA_RANGE, "value"),
+            Input(ids.STORE_DATE_RANGE, "data"),
+            Input(ids.STORE_SHOW_MVA, "data"),
+            Input(ids.STORE_SELECTION, "data"),
+            Input(ids.STORE_TABLE_MODELS, "data"),
+        ],
+        State(ids.STORE_SUSPICIOUS, "data"),
+    )
+    def update_export_links(
+        dataset: Optional[str],
+        nuklid: Optional[str],
+        odber_misto: Optional[List[str]],
+        dodavatel: Optional[List[str]],
+        data_range_slider: Optional[list],
+        date_range_store: Optional[dict],
+        show_mva: Optional[bool],
+        selected_keys: Optional[list],
+        table_models: Optional[str],
+        store_suspicious: Optional[dict],
+    ):
+        """Download links of the rows in the data table and of the whole dataset."""
+        no_parquet = not parquet_available()
+        if not dataset:
+            return None, None, None, None, None, True
+
+        window = slider_to_date_range(date_range_store, data_range_slider)
+        session = store_suspicious.get("session") if store_suspicious else None
+        selection = None
+        if selected_keys and session:
+            selection = basket.save_selection(session, selected_keys)
+        view = dict(
+            view="table",
+            dataset=dataset,
+            nuklid=nuklid,
+            odber_misto=odber_misto or [],
+            dodavatel_dat=dodavatel or [],
+            start=window[0].isoformat() if window else None,
+            end=window[1].isoformat() if window else None,
+            mva="0" if show_mva is False else None,
+            session=session if selection else None,
+            sel=selection,
+            grid=table_models,
+        )
+        # The table is empty until a nuklid is chosen
+        return (
+            export_url(base, "xlsx", **view) if nuklid else None,
+            export_url(base, "csv", **view) if nuklid else None,
+            export_url(base, "xlsx", view="dataset", dataset=dataset),
+            export_url(base, "csv", view="dataset", dataset=dataset),
+            export_url(base, "parquet", view="dataset", dataset=dataset),
+            no_parquet,
+        )
@@ -9,6 +9,7 @@ from ..data.cache import (
     get_cached_nuklidy,
     get_cached_odber_mista,
     get_cached_dodavatele,
+    record_dataset_use,
 )
 from .status_log import add_log_entry
 
@@ -36,6 +37,7 @@ def register_filter_callbacks(app):
             return [], None, [], None, [], None, no_update
         
         try:
+            record_dataset_use(dataset)
             columns = get_cached_columns(dataset)
             
             # Nuklid options - default to Cs-137 if available
@@ -1,16 +1,28 @@
 """Main content rendering callback (scatter plot + table)."""
 from typing import Optional, List
 
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
-from dash import Input, Output, State, callback_context
+from dash import Input, Output, Patch, State, callback_context, clientside_callback, no_update
 
 from .. import ids
+from ..background import background_callback
 from ..config import config
 from ..data.db import get_plot_data
+from ..data.grid import DATE_FORMAT, get_rows_block
+from ..downsample import minmax_indices, parse_x_range
+from .reference import slider_to_date_range
 from ..stats import calculate_tolerance_intervals
 
 
+# Data table columns (AG Grid fields)
+TABLE_COLUMNS = [
+    "row_key", "datum", "hodnota", "nejistota", "pod_mva",
+    "nuklid", "jednotka", "odber_misto", "dodavatel_dat", "id_zppr_vzorek",
+]
+
+
 def register_main_callbacks(app):
     """Register main content rendering callback."""
     
@@ -21,28 +33,36 @@ def register_main_callbacks(app):
             Output(ids.BTN_ZOOM_2TI, "active"),
             Output(ids.BTN_ZOOM_1TI, "active"),
             Output(ids.BTN_ZOOM_FULL, "active"),
+            Output(ids.SCATTER_PLOT, "figure", allow_duplicate=True),
         ],
         [
             Input(ids.BTN_ZOOM_2TI, "n_clicks"),
             Input(ids.BTN_ZOOM_1TI, "n_clicks"),
             Input(ids.BTN_ZOOM_FULL, "n_clicks"),
         ],
+        State(ids.STORE_SCATTER_STATE, "data"),
         prevent_initial_call=True,
     )
-    def update_y_zoom(n_2ti, n_1ti, n_full):
-        """Update Y zoom mode based on button clicks."""
+    def update_y_zoom(n_2ti, n_1ti, n_full, scatter_state):
+        """Update Y zoom mode based on button clicks (patches only the Y axis)."""
         ctx = callback_context
-        if not ctx.triggered:
-            return "2ti", True, False, False
-        
-        button_id = ctx.triggered[0]["prop_id"].split(".")[0]
-        if button_id == ids.BTN_ZOOM_2TI:
-            return "2ti", True, False, False
-        elif button_id == ids.BTN_ZOOM_1TI:
-            return "1ti", False, True, False
+        button_id = ctx.triggered[0]["prop_id"].split(".")[0] if ctx.triggered else None
+        if button_id == ids.BTN_ZOOM_1TI:
+            mode, active = "1ti", (False, True, False)
         elif button_id == ids.BTN_ZOOM_FULL:
-            return "full", False, False, True
-        return "2ti", True, False, False
+            mode, active = "full", (False, False, True)
+        else:
+            mode, active = "2ti", (True, False, False)
+        
+        if not scatter_state or scatter_state.get("message") or "ui_base" not in scatter_state:
+            return (mode, *active, no_update)
+        
+        patch = Patch()
+        layout = _y_zoom_layout(mode, scatter_state.get("ti99"), scatter_state["ui_base"])
+        patch["layout"]["uirevision"] = layout["uirevision"]
+        patch["layout"]["yaxis"]["range"] = layout["yaxis"]["range"]
+        patch["layout"]["yaxis"]["autorange"] = layout["yaxis"]["autorange"]
+        return (mode, *active, patch)
     
     # MVA toggle callback
     @app.callback(
@@ -64,53 +84,98 @@ def register_main_callbacks(app):
         else:
             return new_state, False, "MVA: Skryto", "secondary"
     
+    # Visible x range for level-of-detail downsampling
     @app.callback(
+        Output(ids.STORE_LOD_RANGE, "data"),
+        [
+            Input(ids.SCATTER_PLOT, "relayoutData"),
+            Input(ids.DROPDOWN_DATASET, "value"),
+            Input(ids.DROPDOWN_NUKLID, "value"),
+            Input(ids.DROPDOWN_OM, "value"),
+            Input(ids.DROPDOWN_DODAVATEL, "value"),
+        ],
+        State(ids.STORE_LOD_RANGE, "data"),
+        prevent_initial_call=True,
+    )
+    def update_lod_range(relayout_data, dataset, nuklid, odber_misto, dodavatel, current_range):
+        """Track the zoomed x range; filter changes reset it (new uirevision)."""
+        if not config.scatter.lod_enabled:
+            return no_update
+        
+        new_range = None
+        if callback_context.triggered_id == ids.SCATTER_PLOT:
+            try:
+                new_range = parse_x_range(relayout_data)
+            except KeyError:
+                # Event without x-axis change (y zoom, selection box, ...)
+                return no_update
+        
+        new_range = list(new_range) if new_range else None
+        if new_range == current_range:
+            return no_update
+        return new_range
+    
+    @background_callback(
+        app,
         [
             Output(ids.SCATTER_PLOT, "figure"),
-            Output(ids.AGGRID_TABLE, "rowData"),
-            Output(ids.INFO_TEXT, "children"),
             Output(ids.TI_INFO, "children"),
-            Output(ids.TABLE_STATS, "children"),
+            Output(ids.STORE_SCATTER_STATE, "data"),
         ],
         [
             Input(ids.DROPDOWN_DATASET, "value"),
             Input(ids.DROPDOWN_NUKLID, "value"),
             Input(ids.DROPDOWN_OM, "value"),
             Input(ids.DROPDOWN_DODAVATEL, "value"),
-            Input(ids.STORE_SELECTION, "data"),
             Input(ids.SLIDER_DATA_RANGE, "value"),
             Input(ids.SLIDER_REF_PERIOD, "value"),
-            Input(ids.STORE_Y_ZOOM, "data"),
-            Input(ids.STORE_SHOW_MVA, "data"),
+            Input(ids.STORE_LOD_RANGE, "data"),
+        ],
+        [
+            State(ids.STORE_SELECTION, "data"),
+            State(ids.STORE_Y_ZOOM, "data"),
+            State(ids.STORE_SHOW_MVA, "data"),
+            State(ids.STORE_DATE_RANGE, "data"),
         ],
-        State(ids.STORE_DATE_RANGE, "data"),
         prevent_initial_call=False,
+        progress=Output(ids.STORE_STATUS_PROGRESS, "data"),
     )
     def update_main_content(
+        set_progress,
         dataset: Optional[str],
         nuklid: Optional[str],
         odber_misto: Optional[List[str]],  # Multi-select returns list
         dodavatel: Optional[List[str]],    # Multi-select returns list
-        selected_keys: Optional[list],
         data_range_slider: Optional[list],
         ref_period_slider: Optional[list],
+        lod_range: Optional[list],
+        selected_keys: Optional[list],
         y_zoom_mode: Optional[str],
         show_mva: Optional[bool],
         date_range_store: Optional[dict],
     ):
         """
-        Main callback for scatter plot and table rendering.
+        Main callback for scatter plot rendering.
         
         - Loads data from DB with filters (supports multi-select)
-        - Filters by data range slider
+        - Filters by data range slider (pushed down to the SQL query)
         - Calculates tolerance intervals from reference period slider
-        - Renders scatter plot with selection highlighting, reference rectangle, and MVA markers
-        - Renders table with selected/all data
+        - Renders scatter plot with reference rectangle and MVA markers
+          (dense traces are downsampled to the visible x range, see app/downsample.py)
+        
+        Selection highlight, MVA visibility, table and info text are applied
+        by update_scatter_overlays as a Patch, using the trace layout stored
+        in STORE_SCATTER_STATE. Y zoom is patched by update_y_zoom.
+        
+        Runs as a background job (app/background.py): a newer trigger
+        supersedes it, progress messages go to the status log via set_progress.
         """
         # Default show_mva to True if not set
         if show_mva is None:
             show_mva = True
-            
+        
+        view_key = _view_key(dataset, nuklid, odber_misto, dodavatel, data_range_slider)
+        
         # Empty state
         empty_fig = go.Figure()
         empty_fig.update_layout(
@@ -119,77 +184,40 @@ def register_main_callbacks(app):
             margin=dict(l=50, r=10, t=40, b=30),
         )
         
+        def _empty(title: str, message: str):
+            empty_fig.update_layout(title=title)
+            return empty_fig, "", {"key": view_key, "message": message}
+        
         if not dataset:
-            empty_fig.update_layout(title="Vyberte dataset")
-            return empty_fig, [], "Vyberte dataset pro zobrazení dat.", "", ""
+            return _empty("Vyberte dataset", "Vyberte dataset pro zobrazení dat.")
         
         # Require nuklid selection for large datasets - prevents loading all data
         if not nuklid:
-            empty_fig.update_layout(title="Vyberte nuklid pro zobrazení dat")
-            return empty_fig, [], "Vyberte nuklid pro načtení dat.", "", ""
-        
-        # Build filters dict (multi-select values are lists)
-        filters = {}
-        if nuklid:
-            filters["nuklid"] = nuklid
-        if odber_misto and len(odber_misto) > 0:
-            filters["odber_misto"] = odber_misto  # List for IN clause
-        if dodavatel and len(dodavatel) > 0:
-            filters["dodavatel_dat"] = dodavatel  # List for IN clause
+            return _empty("Vyberte nuklid pro zobrazení dat", "Vyberte nuklid pro načtení dat.")
         
         # Load data
+        set_progress({"message": f"Načítání dat: {dataset} / {nuklid}", "level": "info"})
         try:
-            df = get_plot_data(dataset, filters=filters, max_points=50000)
+            df, window = _load_view(dataset, nuklid, odber_misto, dodavatel, data_range_slider, date_range_store)
         except Exception as e:
             print(f"Error loading data: {e}")
-            return empty_fig, [], f"Chyba při načítání dat: {e}", "", ""
+            return _empty(None, f"Chyba při načítání dat: {e}")
         
         if df.empty:
-            empty_fig.update_layout(title="Žádná data pro vybrané filtry")
-            return empty_fig, [], "Žádná data odpovídající filtrům.", "", ""
-        
-        # Filter out MVA if show_mva is False
-        if not show_mva and "pod_mva" in df.columns:
-            df = df[df["pod_mva"] != 1]
-            if df.empty:
-                empty_fig.update_layout(title="Žádná data (pouze MVA)")
-                return empty_fig, [], "Všechna data jsou pod MVA.", "", ""
+            if window is not None:
+                return _empty("Žádná data ve vybraném rozsahu", "Žádná data ve vybraném časovém rozsahu.")
+            return _empty("Žádná data pro vybrané filtry", "Žádná data odpovídající filtrům.")
         
-        total_points_before_filter = len(df)
         selected_set = set(selected_keys) if selected_keys else set()
         
-        # Prepare datetime column
-        if "datum" in df.columns:
-            df["datum_display"] = df["datum"].dt.strftime("%Y-%m-%d %H:%M")
-        else:
-            df["datum_display"] = "N/A"
-        
-        # Calculate date boundaries from sliders
-        data_range_start = None
-        data_range_end = None
+        # Reference period slider -> for TI calculation
         ref_line_start = None
         ref_line_end = None
         
         if "datum" in df.columns and df["datum"].notna().any():
-            # Use store date range if available, otherwise calculate from data
-            if date_range_store and date_range_store.get("min") and date_range_store.get("max"):
-                full_min_date = pd.to_datetime(date_range_store["min"])
-                full_max_date = pd.to_datetime(date_range_store["max"])
-            else:
-                full_min_date = df["datum"].min()
-                full_max_date = df["datum"].max()
-            
+            full_min_date, full_max_date = _full_date_range(df, date_range_store)
             total_seconds = (full_max_date - full_min_date).total_seconds()
             
-            # Data range slider -> filter displayed data
-            if data_range_slider:
-                data_range_start = full_min_date + pd.Timedelta(seconds=total_seconds * data_range_slider[0] / 100)
-                data_range_end = full_min_date + pd.Timedelta(seconds=total_seconds * data_range_slider[1] / 100)
-                
-                # Filter data by data range slider
-                df = df[(df["datum"] >= data_range_start) & (df["datum"] <= data_range_end)]
-            
-            # Reference period slider -> for TI calculation
             if ref_period_slider:
                 ref_line_start = full_min_date + pd.Timedelta(seconds=total_seconds * ref_period_slider[0] / 100)
                 ref_line_end = full_min_date + pd.Timedelta(seconds=total_seconds * ref_period_slider[1] / 100)
@@ -198,13 +226,6 @@ def register_main_callbacks(app):
                 ref_line_start = full_min_date + pd.Timedelta(seconds=total_seconds * 0.1)
                 ref_line_end = full_min_date + pd.Timedelta(seconds=total_seconds * 0.9)
         
-        if df.empty:
-            empty_fig.update_layout(title="Žádná data ve vybraném rozsahu")
-            return empty_fig, [], "Žádná data ve vybraném časovém rozsahu.", "", ""
-        
-        df = df.reset_index(drop=True)
-        total_points = len(df)
-        
         # Calculate tolerance intervals from reference period
         ti_info = ""
         ti_data = {'ti90': None, 'ti95': None, 'ti99': None}
@@ -222,6 +243,7 @@ def register_main_callbacks(app):
                 ref_values = ref_values[ref_values > 0]
                 
                 if len(ref_values) >= 10:
+                    set_progress({"message": f"Výpočet TI z {len(ref_values)} hodnot ({len(df)} bodů)", "level": "info"})
                     ti_data = calculate_tolerance_intervals(ref_values)
                     
                     if ti_data['ti99']:
@@ -234,7 +256,8 @@ def register_main_callbacks(app):
                             f"TI95={ti_data['ti95']:.3g} | "
                             f"TI99={ti_data['ti99']:.3g}"
                         )
-                        df["is_outlier"] = df["hodnota"] > ti_data['ti99']
+        
+        _mark_outliers(df, ti_data.get("ti99"))
         
         # Determine which column to color by based on active filters
         om_filter_active = bool(odber_misto) and (len(odber_misto) > 0 if isinstance(odber_misto, list) else True)
@@ -252,18 +275,15 @@ def register_main_callbacks(app):
         elif dod_filter_active:
             color_by = "dodavatel_dat"
         
-        # Build figure
+        # Build figure - base layer (all points; MVA traces hidden when show_mva is off)
         fig = go.Figure()
-        
-        if selected_set:
-            df["selected"] = df["row_key"].isin(selected_set)
-            _add_split_traces(fig, df, color_by=color_by)
-        else:
-            _add_single_trace(fig, df, color_by=color_by)
+        df["selected"] = df["row_key"].isin(selected_set)  # kept by downsampling
+        _add_single_trace(fig, df, color_by=color_by, lod_range=lod_range)
+        mva_traces = [i for i, trace in enumerate(fig.data) if trace.meta == "mva"]
         
         # UI revision key for zoom/pan persistence
         # Include y_zoom_mode so Y-axis resets when zoom buttons are clicked
-        ui_key = f"{dataset}|{nuklid or ''}|{str(odber_misto) if odber_misto else ''}|{str(dodavatel) if dodavatel else ''}|{y_zoom_mode or ''}"
+        ui_base = f"{dataset}|{nuklid or ''}|{str(odber_misto) if odber_misto else ''}|{str(dodavatel) if dodavatel else ''}"
         
         # Reference period rectangle (semi-transparent green)
         ref_shapes = _build_ref_rectangle(df, ref_line_start, ref_line_end)
@@ -277,21 +297,10 @@ def register_main_callbacks(app):
         n_categories = df[color_by].nunique() if color_by and color_by in df.columns else 1
         show_legend = color_by is not None and n_categories > 1
         
-        # Calculate Y-axis range based on zoom mode
-        y_range = None  # None = auto (full range)
-        if y_zoom_mode and ti_data and ti_data.get("ti99"):
-            ti99 = ti_data["ti99"]
-            if y_zoom_mode == "2ti":
-                y_range = [0, 2.0 * ti99]
-            elif y_zoom_mode == "1ti":
-                y_range = [0, 1.05 * ti99]
-            # "full" mode keeps y_range = None (auto)
-        
         fig.update_layout(
             title=None,
             xaxis_title=None,
             yaxis_title="Hodnota" + jednotka_label,
-            yaxis_range=y_range,
             dragmode="select",
             hovermode="closest",
             showlegend=show_legend,
@@ -303,12 +312,12 @@ def register_main_callbacks(app):
                 x=0,
                 font=dict(size=10),
             ) if show_legend else None,
-            uirevision=ui_key,
             margin=dict(l=50, r=10, t=40 if show_legend else 10, b=30),
             shapes=ref_shapes,
             # Prevent automatic dimming of unselected points
             newselection=dict(mode="immediate"),
         )
+        fig.update_layout(_y_zoom_layout(y_zoom_mode, ti_data.get("ti99"), ui_base))
         
         # Apply unselected opacity to all traces to prevent dimming
         fig.update_traces(
@@ -319,14 +328,124 @@ def register_main_callbacks(app):
         # TI horizontal lines
         _add_ti_lines(fig, ti_data)
         
-        # Outlier markers
-        _add_outlier_markers(fig, df)
+        # Outlier markers (normal + MVA)
+        outlier_traces = _add_outlier_markers(fig, df)
+        if outlier_traces[1] is not None:
+            mva_traces.append(outlier_traces[1])
+        
+        # Selection highlight placeholders (normal + MVA) - filled by Patch
+        highlight_traces = _add_selection_highlight(fig)
+        mva_traces.append(highlight_traces[1])
+        
+        for i in mva_traces:
+            fig.data[i].visible = show_mva
+        
+        # SVG or WebGL depending on the number of drawn points
+        _apply_render_mode(fig)
+        
+        state = {
+            "key": view_key,
+            "message": None,
+            "ti99": float(ti_data["ti99"]) if ti_data.get("ti99") else None,
+            "ui_base": ui_base,
+            "mva_traces": mva_traces,
+            "highlight_traces": highlight_traces,
+        }
+        return fig, ti_info, state
+    
+    @app.callback(
+        [
+            Output(ids.SCATTER_PLOT, "figure", allow_duplicate=True),
+            Output(ids.STORE_TABLE_VERSION, "data"),
+            Output(ids.INFO_TEXT, "children"),
+            Output(ids.TABLE_STATS, "children"),
+        ],
+        [
+            Input(ids.STORE_SELECTION, "data"),
+            Input(ids.STORE_SHOW_MVA, "data"),
+            Input(ids.STORE_SCATTER_STATE, "data"),
+        ],
+        [
+            State(ids.DROPDOWN_DATASET, "value"),
+            State(ids.DROPDOWN_NUKLID, "value"),
+            State(ids.DROPDOWN_OM, "value"),
+            State(ids.DROPDOWN_DODAVATEL, "value"),
+            State(ids.SLIDER_DATA_RANGE, "value"),
+            State(ids.STORE_DATE_RANGE, "data"),
+            State(ids.STORE_TABLE_VERSION, "data"),
+        ],
+        prevent_initial_call=True,
+    )
+    def update_scatter_overlays(
+        selected_keys: Optional[list],
+        show_mva: Optional[bool],
+        scatter_state: Optional[dict],
+        dataset: Optional[str],
+        nuklid: Optional[str],
+        odber_misto: Optional[List[str]],
+        dodavatel: Optional[List[str]],
+        data_range_slider: Optional[list],
+        date_range_store: Optional[dict],
+        table_version: Optional[int],
+    ):
+        """
+        Apply selection and MVA visibility without rebuilding the figure.
+        
+        Sends a Patch with the selection highlight traces and MVA trace
+        visibility, plus info text and table statistics, and bumps the
+        table version so the grid re-requests its visible rows.
+        Runs after every full render (STORE_SCATTER_STATE) as well.
+        """
+        new_version = (table_version or 0) + 1
+        if show_mva is None:
+            show_mva = True
+        
+        # Figure is being re-rendered for other filters - wait for its state
+        view_key = _view_key(dataset, nuklid, odber_misto, dodavatel, data_range_slider)
+        if not scatter_state or scatter_state.get("key") != view_key:
+            return no_update, no_update, no_update, no_update
+        
+        if scatter_state.get("message"):
+            return no_update, new_version, scatter_state["message"], ""
+        
+        try:
+            df, _ = _load_view(dataset, nuklid, odber_misto, dodavatel, data_range_slider, date_range_store)
+        except Exception as e:
+            print(f"Error loading data: {e}")
+            return no_update, new_version, f"Chyba při načítání dat: {e}", ""
         
-        # Prepare table data
-        df_table = df[df["row_key"].isin(selected_set)].copy() if selected_set else df.copy()
-        row_data = _prepare_table_data(df_table)
+        _mark_outliers(df, scatter_state.get("ti99"))
+        
+        # Filter out MVA if show_mva is False
+        if not show_mva and "pod_mva" in df.columns:
+            df = df[df["pod_mva"] != 1]
+        
+        patch = Patch()
+        for i in scatter_state["mva_traces"]:
+            patch["data"][i]["visible"] = show_mva
+        
+        if df.empty:
+            return patch, new_version, "Všechna data jsou pod MVA.", ""
+        
+        selected_set = set(selected_keys) if selected_keys else set()
+        df_selected = df[df["row_key"].isin(selected_set)] if selected_set else df.iloc[:0]
+        
+        highlight_normal, highlight_mva = scatter_state["highlight_traces"]
+        if "pod_mva" in df_selected.columns:
+            parts = [(highlight_normal, df_selected[df_selected["pod_mva"] != 1]),
+                     (highlight_mva, df_selected[df_selected["pod_mva"] == 1])]
+        else:
+            parts = [(highlight_normal, df_selected), (highlight_mva, df_selected.iloc[:0])]
+        for i, part in parts:
+            patch["data"][i]["x"] = part["datum"].tolist() if "datum" in part.columns else part.index.tolist()
+            patch["data"][i]["y"] = part["hodnota"].tolist()
+            patch["data"][i]["customdata"] = part[["row_key"]].values.tolist()
+        
+        # Table rows are served block by block (get_table_rows)
+        df_table = df_selected if selected_set else df
         
         # Info text
+        total_points = len(df)
         outlier_count = df["is_outlier"].sum() if "is_outlier" in df.columns else 0
         info = f"Vybráno {len(selected_set)} z {total_points} bodů" if selected_set else f"Zobrazeno {total_points} bodů"
         if outlier_count > 0:
@@ -335,7 +454,141 @@ def register_main_callbacks(app):
         # Table statistics
         table_stats = _calculate_table_stats(df_table)
         
-        return fig, row_data, info, ti_info, table_stats
+        return patch, new_version, info, table_stats
+    
+    # Refresh the grid (infinite row model) when the table content changes
+    clientside_callback(
+        """
+        function(version) {
+            if (window.dash_ag_grid) {
+                dash_ag_grid.getApiAsync('""" + ids.AGGRID_TABLE + """').then(function(api) {
+                    api.paginationGoToFirstPage();
+                    api.purgeInfiniteCache();
+                });
+            }
+            return '';
+        }
+        """,
+        Output(ids.DUMMY_TABLE_REFRESH, "children"),
+        Input(ids.STORE_TABLE_VERSION, "data"),
+        prevent_initial_call=True,
+    )
+    
+    @app.callback(
+        Output(ids.AGGRID_TABLE, "getRowsResponse"),
+        Input(ids.AGGRID_TABLE, "getRowsRequest"),
+        [
+            State(ids.DROPDOWN_DATASET, "value"),
+            State(ids.DROPDOWN_NUKLID, "value"),
+            State(ids.DROPDOWN_OM, "value"),
+            State(ids.DROPDOWN_DODAVATEL, "value"),
+            State(ids.SLIDER_DATA_RANGE, "value"),
+            State(ids.STORE_DATE_RANGE, "data"),
+            State(ids.STORE_SHOW_MVA, "data"),
+            State(ids.STORE_SELECTION, "data"),
+        ],
+        prevent_initial_call=True,
+    )
+    def get_table_rows(
+        request: Optional[dict],
+        dataset: Optional[str],
+        nuklid: Optional[str],
+        odber_misto: Optional[List[str]],
+        dodavatel: Optional[List[str]],
+        data_range_slider: Optional[list],
+        date_range_store: Optional[dict],
+        show_mva: Optional[bool],
+        selected_keys: Optional[list],
+    ):
+        """
+        Serve one block of table rows (server-side sorting, filtering and paging).
+        
+        Rows come from the cached plot frame; selected rows only if a selection exists.
+        """
+        if not request or not dataset or not nuklid:
+            return {"rowData": [], "rowCount": 0}
+        
+        try:
+            df, _ = _load_view(dataset, nuklid, odber_misto, dodavatel, data_range_slider, date_range_store)
+        except Exception as e:
+            print(f"Error loading table rows: {e}")
+            return {"rowData": [], "rowCount": 0}
+        
+        if show_mva is False and "pod_mva" in df.columns:
+            df = df[df["pod_mva"] != 1]
+        if selected_keys:
+            df = df[df["row_key"].isin(set(selected_keys))]
+        
+        return get_rows_block(df, request, format_block=_prepare_table_data)
+
+
+def _view_key(dataset, nuklid, odber_misto, dodavatel, data_range_slider) -> str:
+    """Identity of a rendered figure - overlays are only patched onto a matching one."""
+    return repr((dataset, nuklid, odber_misto or None, dodavatel or None, data_range_slider))
+
+
+def _load_view(dataset, nuklid, odber_misto, dodavatel, data_range_slider, date_range_store):
+    """
+    Load plotted rows for the current filters and data range slider.
+    
+    Returns (df, window); window is the time window pushed down to SQL
+    (None when the full range or no date range is known).
+    """
+    # Build filters dict (multi-select values are lists)
+    filters = {}
+    if nuklid:
+        filters["nuklid"] = nuklid
+    if odber_misto and len(odber_misto) > 0:
+        filters["odber_misto"] = odber_misto  # List for IN clause
+    if dodavatel and len(dodavatel) > 0:
+        filters["dodavatel_dat"] = dodavatel  # List for IN clause
+    
+    # Data range slider window is applied in SQL
+    window = slider_to_date_range(date_range_store, data_range_slider)
+    df = get_plot_data(
+        dataset,
+        filters=filters,
+        max_points=config.database.max_points,
+        date_range=window,
+    )
+    
+    # Fallback when no window could be pushed down (date range store not ready)
+    if data_range_slider and window is None and "datum" in df.columns and df["datum"].notna().any():
+        full_min_date, full_max_date = _full_date_range(df, date_range_store)
+        total_seconds = (full_max_date - full_min_date).total_seconds()
+        data_range_start = full_min_date + pd.Timedelta(seconds=total_seconds * data_range_slider[0] / 100)
+        data_range_end = full_min_date + pd.Timedelta(seconds=total_seconds * data_range_slider[1] / 100)
+        df = df[(df["datum"] >= data_range_start) & (df["datum"] <= data_range_end)]
+    
+    return df.reset_index(drop=True), window
+
+
+def _full_date_range(df: pd.DataFrame, date_range_store: Optional[dict]):
+    """Full date range for the sliders - store if available, otherwise from data."""
+    if date_range_store and date_range_store.get("min") and date_range_store.get("max"):
+        return pd.to_datetime(date_range_store["min"]), pd.to_datetime(date_range_store["max"])
+    return df["datum"].min(), df["datum"].max()
+
+
+def _mark_outliers(df: pd.DataFrame, ti99: Optional[float]):
+    """Add is_outlier column (value above TI99)."""
+    if ti99 and "hodnota" in df.columns:
+        df["is_outlier"] = df["hodnota"] > ti99
+
+
+def _y_zoom_layout(y_zoom_mode: Optional[str], ti99: Optional[float], ui_base: str) -> dict:
+    """Y-axis range and uirevision for a zoom mode (uirevision resets the axis on change)."""
+    y_range = None  # None = auto (full range)
+    if y_zoom_mode and ti99:
+        if y_zoom_mode == "2ti":
+            y_range = [0, 2.0 * ti99]
+        elif y_zoom_mode == "1ti":
+            y_range = [0, 1.05 * ti99]
+        # "full" mode keeps y_range = None (auto)
+    return {
+        "yaxis": {"range": y_range, "autorange": y_range is None},
+        "uirevision": f"{ui_base}|{y_zoom_mode or ''}",
+    }
 
 
 def _parse_datetime_utc(value, fallback):
@@ -423,7 +676,29 @@ def _get_color_map(df: pd.DataFrame, color_by: str) -> dict:
     return {cat: colors[i % len(colors)] for i, cat in enumerate(categories)}
 
 
-def _add_single_trace(fig: go.Figure, df: pd.DataFrame, color_by: str = None):
+def _downsample(df: pd.DataFrame, lod_range: Optional[list]) -> pd.DataFrame:
+    """Reduce a trace to min/max per time bucket; outliers and selected rows are kept."""
+    if not config.scatter.lod_enabled or "datum" not in df.columns or df.empty:
+        return df
+    
+    keep = np.zeros(len(df), dtype=bool)
+    for col in ("is_outlier", "selected"):
+        if col in df.columns:
+            keep |= df[col].fillna(False).to_numpy(dtype=bool)
+    
+    idx = minmax_indices(
+        df["datum"],
+        df["hodnota"],
+        config.scatter.lod_buckets,
+        x_range=tuple(lod_range) if lod_range else None,
+        keep=keep,
+    )
+    if len(idx) == len(df):
+        return df
+    return df.iloc[idx]
+
+
+def _add_single_trace(fig: go.Figure, df: pd.DataFrame, color_by: str = None, lod_range: Optional[list] = None):
     """Add traces for all points, optionally colored by specified column, with MVA as open circles."""
     has_mva = "pod_mva" in df.columns
     
@@ -434,24 +709,27 @@ def _add_single_trace(fig: go.Figure, df: pd.DataFrame, color_by: str = None):
     if not use_legend:
         # Single color mode (no filter active or single category)
         color = _get_default_color()
-        _add_category_trace(fig, df, color, None, has_mva, show_legend=False, is_selected=False)
+        _add_category_trace(fig, df, color, None, has_mva, show_legend=False, is_selected=False, lod_range=lod_range)
     else:
         # Multiple categories - color by specified column
         color_map = _get_color_map(df, color_by)
         for category, clr in color_map.items():
             df_cat = df[df[color_by] == category]
             if not df_cat.empty:
-                _add_category_trace(fig, df_cat, clr, str(category), has_mva, show_legend=True, is_selected=False)
+                _add_category_trace(fig, df_cat, clr, str(category), has_mva, show_legend=True, is_selected=False, lod_range=lod_range)
 
 
-def _add_category_trace(fig: go.Figure, df: pd.DataFrame, color: str, name: str, has_mva: bool, show_legend: bool, is_selected: bool):
-    """Add trace(s) for a single category, with MVA as triangles."""
+def _add_category_trace(fig: go.Figure, df: pd.DataFrame, color: str, name: str, has_mva: bool, show_legend: bool, is_selected: bool, lod_range: Optional[list] = None):
+    """Add trace(s) for a single category, with MVA as triangles.
+    
+    Normal points are downsampled (level of detail); MVA points are always drawn.
+    """
     size = _get_marker_size_selected() if is_selected else _get_marker_size_normal()
     opacity = _get_opacity_selected() if is_selected else _get_opacity_normal()
     
     if has_mva:
         df_mva = df[df["pod_mva"] == 1]
-        df_normal = df[df["pod_mva"] != 1]
+        df_normal = _downsample(df[df["pod_mva"] != 1], lod_range)
         
         # Normal points (filled circles)
         if not df_normal.empty:
@@ -490,12 +768,14 @@ def _add_category_trace(fig: go.Figure, df: pd.DataFrame, color: str, name: str,
                     showlegend=False,  # Don't duplicate legend for MVA
                     name=f"{name} (MVA)" if name else "MVA",
                     legendgroup=name,
+                    meta="mva",  # Visibility follows the MVA toggle
                     unselected=dict(marker=dict(opacity=opacity)),
                     selected=dict(marker=dict(opacity=opacity)),
                 )
             )
     else:
         # No MVA column
+        df = _downsample(df, lod_range)
         fig.add_trace(
             go.Scatter(
                 x=df["datum"] if "datum" in df.columns else df.index,
@@ -513,58 +793,38 @@ def _add_category_trace(fig: go.Figure, df: pd.DataFrame, color: str, name: str,
         )
 
 
-def _add_split_traces(fig: go.Figure, df: pd.DataFrame, color_by: str = None):
-    """Add traces with selected points highlighted over the base layer.
+def _add_selection_highlight(fig: go.Figure) -> list:
+    """Add (empty) highlight overlays for selected points - red ring around each point.
     
-    Strategy: Draw ALL points normally first, then overlay selected points
-    with highlighting. This ensures a fresh-looking graph with selection emphasis.
+    Two traces (normal, MVA) are always added so their indices stay fixed;
+    update_scatter_overlays fills them with a Patch. Returns their indices.
     """
-    df_selected = df[df["selected"]]
-    has_mva = "pod_mva" in df.columns
-    
-    # Only use multi-color if color_by is specified AND column exists AND multiple categories exist
-    n_categories = df[color_by].nunique() if color_by and color_by in df.columns else 1
-    use_legend = color_by is not None and n_categories > 1
-    color_map = _get_color_map(df, color_by) if use_legend else {}
-    
-    # First: Draw ALL points normally (base layer) - same as _add_single_trace
-    if not use_legend:
-        color = _get_default_color()
-        _add_category_trace(fig, df, color, None, has_mva, show_legend=False, is_selected=False)
-    else:
-        for category, clr in color_map.items():
-            df_cat = df[df[color_by] == category]
-            if not df_cat.empty:
-                _add_category_trace(fig, df_cat, clr, str(category), has_mva, show_legend=True, is_selected=False)
-    
-    # Second: Overlay selected points with highlight styling
-    if not df_selected.empty:
-        _add_selection_highlight(fig, df_selected, has_mva)
-
-
-def _add_selection_highlight(fig: go.Figure, df: pd.DataFrame, has_mva: bool):
-    """Add highlight overlay for selected points - red ring around each point."""
     selection_color = _get_selection_color()
     highlight_size = _get_marker_size_highlight()
     
-    fig.add_trace(
-        go.Scatter(
-            x=df["datum"] if "datum" in df.columns else df.index,
-            y=df["hodnota"],
-            mode="markers",
-            marker=dict(
-                color=selection_color,
-                size=highlight_size,
-                opacity=1.0,
-                symbol="circle-open",
-                line=dict(width=2.5, color=selection_color),
-            ),
-            customdata=df[["row_key"]].values,
-            hovertemplate="<b>VYBRÁNO</b><br>%{customdata[0]}<br>Datum: %{x}<br>Hodnota: %{y}<extra></extra>",
-            showlegend=False,
-            name="Vybrané",
+    indices = []
+    for meta in (None, "mva"):
+        fig.add_trace(
+            go.Scatter(
+                x=[],
+                y=[],
+                mode="markers",
+                marker=dict(
+                    color=selection_color,
+                    size=highlight_size,
+                    opacity=1.0,
+                    symbol="circle-open",
+                    line=dict(width=2.5, color=selection_color),
+                ),
+                customdata=[],
+                hovertemplate="<b>VYBRÁNO</b><br>%{customdata[0]}<br>Datum: %{x}<br>Hodnota: %{y}<extra></extra>",
+                showlegend=False,
+                name="Vybrané",
+                meta=meta,
+            )
         )
-    )
+        indices.append(len(fig.data) - 1)
+    return indices
 
 
 # Keep _add_unselected_category_trace for potential future use but it's not used now
@@ -621,6 +881,31 @@ def _add_unselected_category_trace(fig: go.Figure, df: pd.DataFrame, color: str,
         )
 
 
+def _apply_render_mode(fig: go.Figure):
+    """Switch all scatter traces to WebGL (Scattergl) based on config.scatter.render_mode.
+    
+    Styling (open-circle MVA markers), customdata for box selection and
+    uirevision are kept - Scattergl accepts the same trace properties.
+    """
+    mode = config.scatter.render_mode
+    if mode == "svg":
+        return
+    if mode == "auto":
+        n_points = sum(len(trace.x) for trace in fig.data if trace.x is not None)
+        if n_points <= config.scatter.webgl_threshold:
+            return
+    
+    traces = []
+    for trace in fig.data:
+        props = trace.to_plotly_json()
+        if props.pop("type", None) == "scatter":
+            traces.append(go.Scattergl(**props))
+        else:
+            traces.append(trace)
+    fig.data = []
+    fig.add_traces(traces)
+
+
 def _build_ref_rectangle(df: pd.DataFrame, start, end) -> list:
     """Build semi-transparent rectangle for reference period."""
     if "datum" not in df.columns or start is None or end is None:
@@ -657,42 +942,57 @@ def _add_ti_lines(fig: go.Figure, ti_data: dict):
                       layer="above")
 
 
-def _add_outlier_markers(fig: go.Figure, df: pd.DataFrame):
-    """Add outlier point markers (circles around outliers)."""
+def _add_outlier_markers(fig: go.Figure, df: pd.DataFrame) -> tuple:
+    """Add outlier point markers (circles around outliers).
+    
+    MVA outliers get their own trace so the MVA toggle can hide them.
+    Returns indices of the (normal, MVA) traces, None where nothing was added.
+    """
     if "is_outlier" not in df.columns:
-        return
+        return None, None
     
     df_outliers = df[df["is_outlier"] == True]
     if df_outliers.empty:
-        return
+        return None, None
     
     outlier_color = _get_outlier_color()
     outlier_size = _get_marker_size_outlier()
     
-    fig.add_trace(
-        go.Scatter(
-            x=df_outliers["datum"] if "datum" in df_outliers.columns else df_outliers.index,
-            y=df_outliers["hodnota"],
-            mode="markers",
-            marker=dict(
-                color=outlier_color, size=outlier_size, opacity=1.0,
-                symbol="circle-open", line=dict(width=2, color=outlier_color),
-            ),
-            customdata=df_outliers[["row_key"]].values,
-            hovertemplate="<b>OUTLIER</b><br>%{customdata[0]}<br>Datum: %{x}<br>Hodnota: %{y}<extra></extra>",
-            showlegend=False,
+    if "pod_mva" in df_outliers.columns:
+        is_mva = df_outliers["pod_mva"] == 1
+        parts = [(df_outliers[~is_mva], None), (df_outliers[is_mva], "mva")]
+    else:
+        parts = [(df_outliers, None)]
+    
+    indices = [None, None]
+    for pos, (part, meta) in enumerate(parts):
+        if part.empty:
+            continue
+        fig.add_trace(
+            go.Scatter(
+                x=part["datum"] if "datum" in part.columns else part.index,
+                y=part["hodnota"],
+                mode="markers",
+                marker=dict(
+                    color=outlier_color, size=outlier_size, opacity=1.0,
+                    symbol="circle-open", line=dict(width=2, color=outlier_color),
+                ),
+                customdata=part[["row_key"]].values,
+                hovertemplate="<b>OUTLIER</b><br>%{customdata[0]}<br>Datum: %{x}<br>Hodnota: %{y}<extra></extra>",
+                showlegend=False,
+                meta=meta,
+            )
         )
-    )
+        indices[pos] = len(fig.data) - 1
+    return tuple(indices)
 
 
-def _prepare_table_data(df: pd.DataFrame) -> list:
-    """Prepare DataFrame for AG Grid."""
-    cols = [
-        "row_key", "datum_display", "hodnota", "nejistota", "pod_mva",
-        "nuklid", "jednotka", "odber_misto", "dodavatel_dat", "id_zppr_vzorek"
-    ]
-    available = [c for c in cols if c in df.columns]
+def _prepare_table_data(df: pd.DataFrame) -> pd.DataFrame:
+    """Prepare rows for AG Grid (display columns, formatted date)."""
+    available = [c for c in TABLE_COLUMNS if c in df.columns]
     df_out = df[available].copy()
-    if "datum_display" in df_out.columns:
-        df_out = df_out.rename(columns={"datum_display": "datum"})
-    return df_out.to_dict("records")
+    if "datum" not in df_out.columns:
+        df_out["datum"] = "N/A"
+    elif pd.api.types.is_datetime64_any_dtype(df_out["datum"]):
+        df_out["datum"] = df_out["datum"].dt.strftime(DATE_FORMAT)
+    return df_out
@@ -7,6 +7,29 @@ from dash import Input, Output, State, clientside_callback, ClientsideFunction
 from .. import ids
 
 
+def slider_to_date_range(
+    date_range_store: Optional[dict],
+    slider_value: Optional[list],
+) -> Optional[tuple]:
+    """
+    Convert data range slider percentages to a (start, end) time window.
+
+    Returns None when the store has no dates or the slider covers the full
+    range, so unwindowed loads share one cache entry.
+    """
+    if not slider_value or list(slider_value) == [0, 100]:
+        return None
+    if not date_range_store or not date_range_store.get("min") or not date_range_store.get("max"):
+        return None
+
+    min_date = pd.to_datetime(date_range_store["min"])
+    max_date = pd.to_datetime(date_range_store["max"])
+    total_seconds = (max_date - min_date).total_seconds()
+    start = min_date + pd.Timedelta(seconds=total_seconds * slider_value[0] / 100)
+    end = min_date + pd.Timedelta(seconds=total_seconds * slider_value[1] / 100)
+    return start, end
+
+
 def register_reference_callbacks(app):
     """Register reference period control callbacks."""
     
@@ -50,7 +73,7 @@ def register_reference_callbacks(app):
         
         Queries the database for min/max dates with current filters applied.
         """
-        from ..data.db import get_plot_data
+        from ..data.db import get_date_bounds
         
         if not dataset or not nuklid:
             return {"min": None, "max": None}
@@ -63,15 +86,10 @@ def register_reference_callbacks(app):
             if dodavatel and len(dodavatel) > 0:
                 filters["dodavatel_dat"] = dodavatel
             
-            # Load data with filters to get actual date range
-            df = get_plot_data(dataset, filters=filters, max_points=50000)
-            if df.empty or "datum" not in df.columns:
-                return {"min": None, "max": None}
-            
-            min_date = df["datum"].min()
-            max_date = df["datum"].max()
+            # MIN/MAX aggregate on the date column (no rows are loaded)
+            min_date, max_date = get_date_bounds(dataset, filters=filters)
             
-            if pd.isna(min_date) or pd.isna(max_date):
+            if min_date is None or max_date is None:
                 return {"min": None, "max": None}
             
             # Store as ISO strings
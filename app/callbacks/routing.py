@@ -8,7 +8,7 @@ import dash_bootstrap_components as dbc
 from .. import ids
 from ..pages import create_home_page, create_docs_page, create_config_page
 from ..config import reload_config, get_config_path
-from ..data.cache import clear_cache
+from ..data.cache import clear_cache, start_warmup
 
 
 def register_routing_callbacks(app):
@@ -91,8 +91,9 @@ def register_routing_callbacks(app):
         try:
             # Reload config
             reload_config()
-            # Clear data cache so new prefilters take effect
+            # Clear data cache so new prefilters take effect, refill it in the background
             clear_cache()
+            start_warmup()
             
             return dbc.Alert(
                 [
@@ -1,9 +1,14 @@
 """Selection handling callbacks."""
 from typing import Optional
 
+import numpy as np
+import pandas as pd
 from dash import Input, Output, State, ctx, no_update
 
 from .. import ids
+from ..config import config
+from ..data.db import get_plot_data
+from .reference import slider_to_date_range
 
 
 def register_selection_callbacks(app):
@@ -19,7 +24,12 @@ def register_selection_callbacks(app):
             Input(ids.DROPDOWN_OM, "value"),
             Input(ids.DROPDOWN_DODAVATEL, "value"),
         ],
-        State(ids.STORE_SELECTION, "data"),
+        [
+            State(ids.STORE_SELECTION, "data"),
+            State(ids.SLIDER_DATA_RANGE, "value"),
+            State(ids.STORE_DATE_RANGE, "data"),
+            State(ids.STORE_SHOW_MVA, "data"),
+        ],
         prevent_initial_call=True,
     )
     def update_selection_store(
@@ -30,6 +40,9 @@ def register_selection_callbacks(app):
         odber_misto: Optional[list],
         dodavatel: Optional[list],
         current_selection: list,
+        data_range_slider: Optional[list],
+        date_range_store: Optional[dict],
+        show_mva: Optional[bool],
     ):
         """
         Update selection store based on graph selection or reset.
@@ -39,6 +52,8 @@ def register_selection_callbacks(app):
         - Any filter dropdown changes (dataset, nuklid, odber_misto, dodavatel)
         
         New box selection always replaces previous selection completely.
+        With downsampling enabled the scatter plot does not draw every point,
+        so a box or lasso selection is resolved against the loaded data instead.
         """
         triggered_id = ctx.triggered_id
         
@@ -58,6 +73,19 @@ def register_selection_callbacks(app):
                 # Empty selection from figure redraw - keep current
                 return no_update
             
+            area = selected_data.get("range") or selected_data.get("lassoPoints")
+            if config.scatter.lod_enabled and area and "x" in area and "y" in area and dataset and nuklid:
+                filters = {"nuklid": nuklid}
+                if odber_misto:
+                    filters["odber_misto"] = odber_misto
+                if dodavatel:
+                    filters["dodavatel_dat"] = dodavatel
+                return _keys_in_selection(
+                    dataset, filters, selected_data,
+                    slider_to_date_range(date_range_store, data_range_slider),
+                    show_mva,
+                )
+            
             # Extract keys from valid scatter selection - this REPLACES previous selection
             selected_keys = []
             for point in selected_data["points"]:
@@ -69,3 +97,51 @@ def register_selection_callbacks(app):
             return selected_keys
         
         return no_update
+
+
+def _inside_polygon(x: np.ndarray, y: np.ndarray, px: np.ndarray, py: np.ndarray) -> np.ndarray:
+    """Mask of points inside a polygon (even-odd ray casting, one pass per edge)."""
+    inside = np.zeros(len(x), dtype=bool)
+    j = len(px) - 1
+    for i in range(len(px)):
+        crosses = (py[i] > y) != (py[j] > y)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x_cross = (px[j] - px[i]) * (y - py[i]) / (py[j] - py[i]) + px[i]
+        inside ^= crosses & (x < x_cross)
+        j = i
+    return inside
+
+
+def _keys_in_selection(dataset: str, filters: dict, selected_data: dict, window,
+                       show_mva: Optional[bool]) -> list:
+    """Row keys of all plotted rows inside a box or lasso selection (drawn or not)."""
+    df = get_plot_data(
+        dataset,
+        filters=filters,
+        max_points=config.database.max_points,
+        date_range=window,
+    )
+    if df.empty or "datum" not in df.columns:
+        return []
+    if show_mva is False and "pod_mva" in df.columns:
+        df = df[df["pod_mva"] != 1]
+    
+    box = selected_data.get("range")
+    if box:
+        x0, x1 = sorted(pd.to_datetime(box["x"][:2]))
+        y0, y1 = sorted(box["y"][:2])
+        inside = (
+            (df["datum"] >= x0) & (df["datum"] <= x1)
+            & (df["hodnota"] >= y0) & (df["hodnota"] <= y1)
+        )
+        return df.loc[inside, "row_key"].tolist()
+    
+    # Lasso: polygon test in nanoseconds (x) and values (y); NaT/NaN never match
+    lasso = selected_data["lassoPoints"]
+    px = pd.to_datetime(pd.Series(lasso["x"])).to_numpy("datetime64[ns]").astype(np.int64).astype(float)
+    py = np.asarray(lasso["y"], dtype=float)
+    valid = (df["datum"].notna() & df["hodnota"].notna()).to_numpy()
+    x = df["datum"].to_numpy("datetime64[ns]").astype(np.int64).astype(float)
+    y = pd.to_numeric(df["hodnota"], errors="coerce").to_numpy(dtype=float)
+    inside = valid & _inside_polygon(x, y, px, py)
+    return df.loc[inside, "row_key"].tolist()
@@ -6,8 +6,10 @@ import plotly.graph_objects as go
 from dash import Input, Output, State, callback_context
 
 from .. import ids
+from ..background import background_callback
 from ..config import config
 from ..data.db import get_plot_data
+from .reference import slider_to_date_range
 
 
 def register_side_charts_callbacks(app):
@@ -56,7 +58,8 @@ def register_side_charts_callbacks(app):
         return new_state, new_state
     
     # Boxplot chart callback
-    @app.callback(
+    @background_callback(
+        app,
         Output(ids.CHART_SIDE_TOP, "figure"),
         [
             Input(ids.DROPDOWN_DATASET, "value"),
@@ -116,9 +119,15 @@ def register_side_charts_callbacks(app):
         if dodavatel and len(dodavatel) > 0:
             filters["dodavatel_dat"] = dodavatel
         
-        # Load data
+        # Load data (data range slider window is applied in SQL)
+        window = slider_to_date_range(date_range_store, data_range_slider)
         try:
-            df = get_plot_data(dataset, filters=filters, max_points=config.database.max_points)
+            df = get_plot_data(
+                dataset,
+                filters=filters,
+                max_points=config.database.max_points,
+                date_range=window,
+            )
         except Exception as e:
             print(f"Error loading data for boxplot: {e}")
             return empty_fig
@@ -132,8 +141,8 @@ def register_side_charts_callbacks(app):
             )
             return empty_fig
         
-        # Apply date range filter
-        if "datum" in df.columns and df["datum"].notna().any() and data_range_slider:
+        # Apply date range filter (fallback when no window could be pushed down)
+        if "datum" in df.columns and df["datum"].notna().any() and data_range_slider and window is None:
             if date_range_store and date_range_store.get("min") and date_range_store.get("max"):
                 full_min_date = pd.to_datetime(date_range_store["min"])
                 full_max_date = pd.to_datetime(date_range_store["max"])
@@ -248,7 +257,8 @@ def register_side_charts_callbacks(app):
         return fig
 
     # Histogram chart callback
-    @app.callback(
+    @background_callback(
+        app,
         Output(ids.CHART_SIDE_BOTTOM, "figure"),
         [
             Input(ids.DROPDOWN_DATASET, "value"),
@@ -303,9 +313,15 @@ def register_side_charts_callbacks(app):
         if dodavatel and len(dodavatel) > 0:
             filters["dodavatel_dat"] = dodavatel
         
-        # Load data
+        # Load data (data range slider window is applied in SQL)
+        window = slider_to_date_range(date_range_store, data_range_slider)
         try:
-            df = get_plot_data(dataset, filters=filters, max_points=config.database.max_points)
+            df = get_plot_data(
+                dataset,
+                filters=filters,
+                max_points=config.database.max_points,
+                date_range=window,
+            )
         except Exception as e:
             print(f"Error loading data for histogram: {e}")
             return empty_fig
@@ -331,8 +347,8 @@ def register_side_charts_callbacks(app):
                 )
                 return empty_fig
         
-        # Apply date range filter
-        if "datum" in df.columns and df["datum"].notna().any() and data_range_slider:
+        # Apply date range filter (fallback when no window could be pushed down)
+        if "datum" in df.columns and df["datum"].notna().any() and data_range_slider and window is None:
             if date_range_store and date_range_store.get("min") and date_range_store.get("max"):
                 full_min_date = pd.to_datetime(date_range_store["min"])
                 full_max_date = pd.to_datetime(date_range_store["max"])
@@ -3,14 +3,18 @@ Status log panel callbacks.
 
 Handles logging of application events and displaying them in the status panel.
 Provides a centralized way to track user actions and data changes.
+
+Entries are kept on the server per page session (app.data.log_store,
+shared by all server processes). The browser store (STORE_STATUS_LOG)
+holds only the session id and a version; callbacks that log output the
+new version and a single renderer callback draws the panel from the store.
 """
-from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
-import dash_bootstrap_components as dbc
-from dash import Input, Output, State, html, no_update, callback_context
+from dash import Input, Output, State, html, no_update
 
 from .. import ids
+from ..data import log_store
 
 
 # Log levels with icons and colors
@@ -21,8 +25,6 @@ LOG_ICONS = {
     "error": ("bi-x-circle", "text-danger"),
 }
 
-MAX_LOG_ENTRIES = 100
-
 
 def create_log_entry(timestamp: str, message: str, level: str = "info") -> html.Div:
     """Create a styled log entry component."""
@@ -39,33 +41,30 @@ def create_log_entry(timestamp: str, message: str, level: str = "info") -> html.
     )
 
 
-def add_log_entry(store_data: dict, message: str, level: str = "info") -> dict:
-    """Add a new log entry to the store data."""
-    if store_data is None:
-        store_data = {"entries": []}
-    
-    entries = store_data.get("entries", [])
-    
-    # Create new entry
-    new_entry = {
-        "timestamp": datetime.now().strftime("%H:%M:%S"),
-        "message": message,
-        "level": level,
-    }
+def add_log_entry(store_data: Optional[dict], message: str, level: str = "info") -> dict:
+    """
+    Append an entry to the session's server-side log.
     
-    # Add to front (newest first)
-    entries.insert(0, new_entry)
-    
-    # Keep only last MAX_LOG_ENTRIES
-    if len(entries) > MAX_LOG_ENTRIES:
-        entries = entries[:MAX_LOG_ENTRIES]
-    
-    return {"entries": entries}
+    Returns the new STORE_STATUS_LOG data (session id and version only) -
+    callbacks output it so the log panel re-renders.
+    """
+    session = store_data.get("session") if store_data else None
+    if not session:
+        return no_update
+    return {"session": session, "version": log_store.add_entry(session, message, level)}
 
 
-def render_log_entries(store_data: dict) -> list:
-    """Render all log entries from store data."""
-    if not store_data or not store_data.get("entries"):
+def clear_log_entries(store_data: Optional[dict]) -> dict:
+    """Remove all entries of the session's log; returns the new store data."""
+    session = store_data.get("session") if store_data else None
+    if not session:
+        return no_update
+    return {"session": session, "version": log_store.clear_entries(session)}
+
+
+def render_log_entries(entries: List[dict]) -> list:
+    """Render log entries (newest first)."""
+    if not entries:
         return [
             html.Div(
                 "Žádné záznamy v logu.",
@@ -80,7 +79,7 @@ def render_log_entries(store_data: dict) -> list:
             entry["message"],
             entry.get("level", "info"),
         )
-        for entry in store_data["entries"]
+        for entry in entries
     ]
 
 
@@ -92,33 +91,30 @@ def register_status_log_callbacks(app):
         Input(ids.STORE_STATUS_LOG, "data"),
     )
     def update_log_display(store_data):
-        """Update the log display when store changes."""
-        return render_log_entries(store_data)
+        """Render the session's log whenever its version changes."""
+        session = store_data.get("session") if store_data else None
+        return render_log_entries(log_store.get_entries(session))
     
     @app.callback(
         Output(ids.STORE_STATUS_LOG, "data", allow_duplicate=True),
         Input(ids.BTN_CLEAR_STATUS_LOG, "n_clicks"),
+        State(ids.STORE_STATUS_LOG, "data"),
         prevent_initial_call=True,
     )
-    def clear_log(n_clicks):
+    def clear_log(n_clicks, store_data):
         """Clear all log entries."""
         if not n_clicks:
             return no_update
-        return {"entries": []}
+        return clear_log_entries(store_data)
     
-    # Initialize log on app start
     @app.callback(
         Output(ids.STORE_STATUS_LOG, "data", allow_duplicate=True),
-        Input(ids.STORE_STATUS_LOG, "modified_timestamp"),
+        Input(ids.STORE_STATUS_PROGRESS, "data"),
         State(ids.STORE_STATUS_LOG, "data"),
-        prevent_initial_call="initial_duplicate",
+        prevent_initial_call=True,
     )
-    def initialize_log(ts, data):
-        """Initialize log with welcome message if empty."""
-        if data is None or not data.get("entries"):
-            return add_log_entry(
-                {"entries": []},
-                "Aplikace spuštěna. Vyberte dataset pro začátek.",
-                "info"
-            )
-        return no_update
+    def log_background_progress(progress, store_data):
+        """Append progress of background jobs (reported through set_progress, not logged by the job)."""
+        if not progress or not progress.get("message"):
+            return no_update
+        return add_log_entry(store_data, progress["message"], progress.get("level", "info"))
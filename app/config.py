@@ -4,6 +4,7 @@ Configuration loader for MRS Viewer application.
 Loads settings from config.yaml and provides typed access to configuration values.
 """
 from dataclasses import dataclass, field
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import List, Dict, Optional, Any
 import yaml
@@ -19,6 +20,11 @@ class ServerConfig:
     port: int = 8050
     host: str = "127.0.0.1"
     debug: bool = True
+    # Heavy chart callbacks run as Dash background callbacks (needs diskcache)
+    background_callbacks: bool = True
+    background_cache_dir: str = "../.viewer_cache"
+    background_poll_ms: int = 250
+    shared_cache_mb: int = 512
 
 
 @dataclass
@@ -26,6 +32,13 @@ class DatabaseConfig:
     """Database connection settings."""
     path: str = "../monras_import.sqlite"
     max_points: int = 50000
+    date_column: str = "datum_odberu_utc"
+    plot_cache_size: int = 16
+    use_snapshots: bool = False
+    # Per-thread read-only connections (see app.data.db.read_connection)
+    mmap_size: int = 268435456
+    cache_size_kib: int = 65536
+    cached_statements: int = 128
     
     def get_absolute_path(self, base_dir: Path) -> Path:
         """Resolve database path relative to config file location."""
@@ -89,6 +102,10 @@ class ScatterConfig:
     ti90_color: str = "blue"
     ti95_color: str = "orange"
     ti99_color: str = "red"
+    lod_enabled: bool = True        # Downsample dense traces (min/max per time bucket)
+    lod_buckets: int = 1000         # Time buckets across the visible range (~ plot width in px)
+    render_mode: str = "auto"       # "svg" | "webgl" | "auto"
+    webgl_threshold: int = 10000    # Drawn points above which "auto" switches to WebGL
 
 
 @dataclass
@@ -188,10 +205,20 @@ def load_config(config_path: Optional[Path] = None) -> AppConfig:
             port=server_data.get("port", 8050),
             host=server_data.get("host", "127.0.0.1"),
             debug=server_data.get("debug", True),
+            background_callbacks=server_data.get("background_callbacks", True),
+            background_cache_dir=server_data.get("background_cache_dir", "../.viewer_cache"),
+            background_poll_ms=server_data.get("background_poll_ms", 250),
+            shared_cache_mb=server_data.get("shared_cache_mb", 512),
         ),
         database=DatabaseConfig(
             path=db_data.get("path", "../monras_import.sqlite"),
             max_points=db_data.get("max_points", 50000),
+            date_column=db_data.get("date_column", "datum_odberu_utc"),
+            plot_cache_size=db_data.get("plot_cache_size", 16),
+            use_snapshots=db_data.get("use_snapshots", False),
+            mmap_size=db_data.get("mmap_size", 268435456),
+            cache_size_kib=db_data.get("cache_size_kib", 65536),
+            cached_statements=db_data.get("cached_statements", 128),
         ),
         layout=LayoutConfig(
             sidebar_width=layout_data.get("sidebar_width", 2),
@@ -236,6 +263,10 @@ def load_config(config_path: Optional[Path] = None) -> AppConfig:
             ti90_color=scatter_data.get("ti90_color", "blue"),
             ti95_color=scatter_data.get("ti95_color", "orange"),
             ti99_color=scatter_data.get("ti99_color", "red"),
+            lod_enabled=scatter_data.get("lod_enabled", True),
+            lod_buckets=scatter_data.get("lod_buckets", 1000),
+            render_mode=scatter_data.get("render_mode", "auto"),
+            webgl_threshold=scatter_data.get("webgl_threshold", 10000),
         ),
         category_colors=data.get("category_colors", [
             "#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd",
@@ -256,10 +287,37 @@ def get_table_prefilter(table_name: str) -> Optional[TablePrefilter]:
     return config.table_prefilters.get(table_name)
 
 
-def build_prefilter_conditions(table_name: str) -> tuple[list[str], list[Any]]:
+def iso_date_to_unix_ms(value: str, end_of_day: bool = False) -> int:
+    """
+    Convert ISO date string ("YYYY-MM-DD") to unix milliseconds (UTC).
+    
+    With end_of_day=True a date without time maps to the last millisecond
+    of that day (inclusive upper bound).
+    """
+    text = str(value)
+    dt = datetime.fromisoformat(text)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    ms = int(dt.timestamp() * 1000)
+    if end_of_day and len(text) <= 10:
+        ms += 86_400_000 - 1
+    return ms
+
+
+def build_prefilter_conditions(
+    table_name: str,
+    date_column: str = "datum",
+    unix_ms: bool = False,
+) -> tuple[list[str], list[Any]]:
     """
     Build SQL WHERE conditions and parameters from table prefilter.
     
+    Args:
+        table_name: Database table name.
+        date_column: Column used for min_date/max_date conditions.
+        unix_ms: If True, min_date/max_date are converted to unix milliseconds
+                 (storage format written by sql_import).
+    
     Returns:
         (conditions, params) - List of SQL conditions and list of parameters.
         Empty lists if no prefilter or prefilter has no active filters.
@@ -296,12 +354,12 @@ def build_prefilter_conditions(table_name: str) -> tuple[list[str], list[Any]]:
         conditions.append("(pod_mva IS NULL OR pod_mva != 1)")
     
     if prefilter.min_date:
-        conditions.append("datum >= ?")
-        params.append(prefilter.min_date)
+        conditions.append(f'"{date_column}" >= ?')
+        params.append(iso_date_to_unix_ms(prefilter.min_date) if unix_ms else prefilter.min_date)
     
     if prefilter.max_date:
-        conditions.append("datum <= ?")
-        params.append(prefilter.max_date)
+        conditions.append(f'"{date_column}" <= ?')
+        params.append(iso_date_to_unix_ms(prefilter.max_date, end_of_day=True) if unix_ms else prefilter.max_date)
     
     return conditions, params
 
@@ -317,6 +375,11 @@ def get_db_path() -> Path:
     return config.database.get_absolute_path(config._base_dir)
 
 
+def resolve_config_path(path: str) -> Path:
+    """Resolve a path relative to the config file location."""
+    return (config._base_dir / path).resolve()
+
+
 def get_config_path() -> Path:
     """Get the path to the config.yaml file."""
     # Check user directory first
@@ -0,0 +1 @@
+"""Data layer for MRS Viewer (SQLite access and caches)."""
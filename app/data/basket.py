@@ -0,0 +1,200 @@
+"""
+Server-side store of the suspicious records basket.
+
+Records live in a small SQLite file next to the viewer database
+(<db>.basket.sqlite), keyed by (session, row_key). The browser only keeps
+its session id, the record count and a version number (STORE_SUSPICIOUS);
+adding and removing records are single INSERT / DELETE statements and the
+basket grid pages over the table in SQL (load_block: the grid's filter and
+sort model become WHERE / ORDER BY, a block is one LIMIT / OFFSET query).
+The basket survives page reloads and viewer restarts.
+
+The same file keeps each browser's current plot selection for the table
+export (save_selection / load_selection) - the row keys do not fit in a
+download link.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import uuid
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+
+from ..config import get_db_path
+from .grid import filter_model_sql, register_sql_functions, sort_model_sql
+
+
+BASKET_TABLE = "suspicious"
+SELECTION_TABLE = "export_selection"
+
+# Stored columns of a record (in export / grid order)
+RECORD_COLUMNS = [
+    "dataset",
+    "nuklid",
+    "datum",
+    "hodnota",
+    "nejistota",
+    "jednotka",
+    "odber_misto",
+    "dodavatel_dat",
+    "id_zppr_vzorek",
+    "pod_mva",
+    "added_at",
+]
+
+_lock = threading.Lock()
+_initialized: set = set()
+
+
+def new_session_id() -> str:
+    """Random id of a browser's basket."""
+    return uuid.uuid4().hex
+
+
+def get_basket_path() -> Path:
+    db_path = get_db_path()
+    return db_path.with_name(db_path.name + ".basket.sqlite")
+
+
+def _connect() -> sqlite3.Connection:
+    """Open the basket database, creating the table on first use."""
+    path = get_basket_path()
+    conn = sqlite3.connect(str(path), timeout=10)
+    with _lock:
+        if str(path) not in _initialized:
+            conn.execute("PRAGMA journal_mode = WAL")
+            cols = ", ".join(f'"{c}"' for c in RECORD_COLUMNS)
+            conn.execute(
+                f'CREATE TABLE IF NOT EXISTS "{BASKET_TABLE}" ('
+                f"session TEXT NOT NULL, row_key TEXT NOT NULL, {cols}, "
+                f"PRIMARY KEY (session, row_key)) WITHOUT ROWID"
+            )
+            conn.execute(
+                f'CREATE TABLE IF NOT EXISTS "{SELECTION_TABLE}" ('
+                f"session TEXT PRIMARY KEY, digest TEXT NOT NULL, row_keys TEXT NOT NULL)"
+            )
+            conn.commit()
+            _initialized.add(str(path))
+    return conn
+
+
+def add_records(session: str, dataset: str, rows: Iterable[Dict[str, Any]]) -> int:
+    """Add grid rows to the basket (existing row keys are skipped); returns the number added."""
+    added_at = datetime.now().isoformat()
+    params = [
+        (session, row["row_key"], dataset)
+        + tuple(row.get(c) for c in RECORD_COLUMNS[1:-1])
+        + (added_at,)
+        for row in rows
+        if row.get("row_key")
+    ]
+    if not params:
+        return 0
+
+    cols = ", ".join(f'"{c}"' for c in RECORD_COLUMNS)
+    placeholders = ", ".join("?" * (len(RECORD_COLUMNS) + 2))
+    with closing(_connect()) as conn, conn:
+        before = conn.total_changes
+        conn.executemany(
+            f'INSERT OR IGNORE INTO "{BASKET_TABLE}" (session, row_key, {cols}) '
+            f"VALUES ({placeholders})",
+            params,
+        )
+        return conn.total_changes - before
+
+
+def remove_records(session: str, row_keys: Iterable[str]) -> int:
+    """Remove records by row key; returns the number removed."""
+    params = [(session, key) for key in row_keys if key]
+    if not params:
+        return 0
+    with closing(_connect()) as conn, conn:
+        before = conn.total_changes
+        conn.executemany(
+            f'DELETE FROM "{BASKET_TABLE}" WHERE session = ? AND row_key = ?', params
+        )
+        return conn.total_changes - before
+
+
+def count_records(session: str) -> int:
+    """Number of records in a session's basket."""
+    with closing(_connect()) as conn:
+        row = conn.execute(
+            f'SELECT COUNT(*) FROM "{BASKET_TABLE}" WHERE session = ?', (session,)
+        ).fetchone()
+    return int(row[0])
+
+
+def load_block(session: str, request: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Answer an AG Grid getRows request from the basket table.
+
+    Filtering, sorting and paging run in SQLite, so a block costs the same
+    however large the basket is. Ties keep the order records were added in.
+
+    Returns:
+        getRowsResponse dict with "rowData" (requested block) and "rowCount".
+    """
+    request = request or {}
+    columns = ["row_key"] + RECORD_COLUMNS
+    where, params = filter_model_sql(request.get("filterModel"), columns)
+    order = sort_model_sql(request.get("sortModel"), columns) + ["added_at", "row_key"]
+
+    start = max(0, int(request.get("startRow") or 0))
+    end = request.get("endRow")
+    limit = -1 if end is None else max(0, int(end) - start)
+
+    cols = ", ".join(f'"{c}"' for c in columns)
+    condition = f"session = ? AND ({where})"
+    with closing(_connect()) as conn:
+        register_sql_functions(conn)
+        count = conn.execute(
+            f'SELECT COUNT(*) FROM "{BASKET_TABLE}" WHERE {condition}', [session] + params
+        ).fetchone()[0]
+        cur = conn.execute(
+            f'SELECT {cols} FROM "{BASKET_TABLE}" WHERE {condition} '
+            f'ORDER BY {", ".join(order)} LIMIT ? OFFSET ?',
+            [session] + params + [limit, start],
+        )
+        rows = [dict(zip(columns, row)) for row in cur.fetchall()]
+    return {"rowData": rows, "rowCount": int(count)}
+
+
+def iter_record_chunks(session: str, chunk_rows: int = 50000) -> Iterator[pd.DataFrame]:
+    """Records of a session's basket in chunks, in the order they were added."""
+    cols = ", ".join(f'"{c}"' for c in RECORD_COLUMNS)
+    with closing(_connect()) as conn:
+        yield from pd.read_sql_query(
+            f'SELECT {cols} FROM "{BASKET_TABLE}" WHERE session = ? ORDER BY added_at, row_key',
+            conn,
+            params=(session,),
+            chunksize=chunk_rows,
+        )
+
+
+def save_selection(session: str, row_keys: Iterable[str]) -> str:
+    """Keep a session's selected row keys (replaces the previous selection); returns their digest."""
+    keys = sorted(set(row_keys))
+    digest = hashlib.sha1("\n".join(keys).encode("utf-8")).hexdigest()[:16]
+    with closing(_connect()) as conn, conn:
+        conn.execute(
+            f'INSERT OR REPLACE INTO "{SELECTION_TABLE}" VALUES (?, ?, ?)',
+            (session, digest, json.dumps(keys)),
+        )
+    return digest
+
+
+def load_selection(session: str, digest: str) -> Optional[List[str]]:
+    """Selected row keys of a session, or None if its current selection has another digest."""
+    with closing(_connect()) as conn:
+        row = conn.execute(
+            f'SELECT digest, row_keys FROM "{SELECTION_TABLE}" WHERE session = ?', (session,)
+        ).fetchone()
+    if row is None or row[0] != digest:
+        return None
+    return json.loads(row[1])
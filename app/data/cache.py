@@ -0,0 +1,306 @@
+"""
+Filter value cache for MRS Viewer.
+
+Pre-loads dataset list and dropdown values (nuklid, odběrové místo, dodavatel)
+so that filter callbacks do not query the database on every dataset change.
+Values come from the ``filter_dictionary`` table written by the import (one
+query for all datasets); tables with a prefilter, or not covered by the
+dictionary, fall back to SELECT DISTINCT.
+
+The cache is tied to the database version: when the import rewrites the
+database (e.g. ``xlsx_to_sqlite.py --incremental``), it is dropped and reloaded.
+
+Startup does not wait for the values: ``start_warmup()`` loads them in a
+background thread, most used datasets first (usage counts are kept in
+``<database>.usage.json``, written at most every USAGE_FLUSH_SECONDS). A
+dataset selected before it was warmed is loaded on first access.
+"""
+import atexit
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from ..config import build_prefilter_conditions, get_db_path
+from . import db
+from .snapshot import clear_snapshot_cache
+
+
+_tables: Optional[List[str]] = None
+_columns: Dict[str, List[str]] = {}
+_values: Dict[Tuple[str, str], List[str]] = {}
+_dictionary: Optional[Dict[str, Dict[str, List[str]]]] = None
+_dictionary_loaded = False
+_version: Optional[tuple] = None
+_lock = threading.Lock()
+_usage: Optional[Dict[str, int]] = None
+_warmup_generation = 0
+
+# Dropdown columns loaded per dataset
+FILTER_COLUMNS = ["nuklid", "odber_misto", "dodavatel_dat"]
+
+# Dataset selections are counted in memory and added to the usage file at most this often
+USAGE_FLUSH_SECONDS = 30.0
+_usage_pending: Dict[str, int] = {}
+_usage_timer: Optional[threading.Timer] = None
+_usage_file_lock = threading.Lock()
+
+
+def _check_version() -> None:
+    """Drop cached values if the database changed since they were loaded."""
+    global _tables, _version, _dictionary, _dictionary_loaded
+    version = db.get_db_version()
+    with _lock:
+        if version == _version:
+            return
+        _tables = None
+        _columns.clear()
+        _values.clear()
+        _dictionary = None
+        _dictionary_loaded = False
+        _version = version
+
+
+def _dictionary_values(table: str, column: str) -> Optional[List[str]]:
+    """Values from the import's filter dictionary, or None if it cannot be used."""
+    global _dictionary, _dictionary_loaded
+    # A prefilter restricts values across columns - the dictionary is unfiltered
+    if build_prefilter_conditions(table)[0]:
+        return None
+    with _lock:
+        loaded = _dictionary_loaded
+    if not loaded:
+        dictionary = db.load_filter_dictionary()
+        with _lock:
+            _dictionary, _dictionary_loaded = dictionary, True
+    with _lock:
+        if _dictionary is None or table not in _dictionary:
+            return None
+        return _dictionary[table].get(column, [])
+
+
+def _get_values(table: str, column: str) -> List[str]:
+    """Return cached distinct values for a table column."""
+    key = (table, column)
+    _check_version()
+    with _lock:
+        if key in _values:
+            return _values[key]
+    values = _dictionary_values(table, column)
+    if values is None:
+        values = db.get_distinct_values(table, column)
+    with _lock:
+        _values[key] = values
+    return values
+
+
+def get_cached_tables() -> List[str]:
+    """Return list of visible dataset tables."""
+    global _tables
+    _check_version()
+    with _lock:
+        if _tables is not None:
+            return _tables
+    tables = db.get_tables()
+    with _lock:
+        _tables = tables
+    return tables
+
+
+def get_cached_columns(table: str) -> List[str]:
+    """Return column names of a dataset table."""
+    _check_version()
+    with _lock:
+        if table in _columns:
+            return _columns[table]
+    columns = db.get_columns(table)
+    with _lock:
+        _columns[table] = columns
+    return columns
+
+
+def get_cached_nuklidy(table: str) -> List[str]:
+    """Return distinct nuklid values (prefilter applied)."""
+    return _get_values(table, "nuklid")
+
+
+def get_cached_odber_mista(table: str) -> List[str]:
+    """Return distinct odběrové místo values (prefilter applied)."""
+    return _get_values(table, "odber_misto")
+
+
+def get_cached_dodavatele(table: str) -> List[str]:
+    """Return distinct dodavatel values (prefilter applied)."""
+    return _get_values(table, "dodavatel_dat")
+
+
+def warm_dataset(table: str) -> None:
+    """Load columns and all dropdown values of one dataset into the cache."""
+    columns = get_cached_columns(table)
+    for column in FILTER_COLUMNS:
+        if column in columns:
+            _get_values(table, column)
+
+
+# =============================================================================
+# Usage history and background warmup
+# =============================================================================
+
+def _usage_path() -> Path:
+    db_path = get_db_path()
+    return db_path.with_name(db_path.name + ".usage.json")
+
+
+def _read_usage_file() -> Dict[str, int]:
+    try:
+        with open(_usage_path(), "r", encoding="utf-8") as f:
+            return {str(k): int(v) for k, v in json.load(f).items()}
+    except (OSError, ValueError, AttributeError):
+        return {}
+
+
+def _load_usage() -> Dict[str, int]:
+    global _usage
+    with _lock:
+        if _usage is not None:
+            return dict(_usage)
+    usage = _read_usage_file()
+    with _lock:
+        if _usage is None:
+            for table, count in _usage_pending.items():
+                usage[table] = usage.get(table, 0) + count
+            _usage = usage
+        return dict(_usage)
+
+
+def record_dataset_use(table: str) -> None:
+    """Count a dataset selection (warmup order of the next start); written by flush_usage."""
+    global _usage, _usage_timer
+    _load_usage()
+    with _lock:
+        if _usage is None:
+            _usage = {}
+        _usage[table] = _usage.get(table, 0) + 1
+        _usage_pending[table] = _usage_pending.get(table, 0) + 1
+        if _usage_timer is None:
+            _usage_timer = threading.Timer(USAGE_FLUSH_SECONDS, flush_usage)
+            _usage_timer.daemon = True
+            _usage_timer.start()
+
+
+def flush_usage() -> None:
+    """
+    Add pending selection counts to the usage file.
+
+    The file is re-read first, so counts written by other processes are kept,
+    and replaced atomically (temp file + os.replace) - a reader never sees
+    a truncated file.
+    """
+    global _usage, _usage_timer
+    with _lock:
+        pending = dict(_usage_pending)
+        _usage_pending.clear()
+        _usage_timer = None
+    if not pending:
+        return
+
+    with _usage_file_lock:
+        usage = _read_usage_file()
+        for table, count in pending.items():
+            usage[table] = usage.get(table, 0) + count
+        path = _usage_path()
+        tmp = None
+        try:
+            fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent))
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(usage, f, ensure_ascii=False, indent=1, sort_keys=True)
+            os.replace(tmp, path)
+        except OSError:
+            # usage history is best effort (e.g. read-only data directory)
+            if tmp is not None and os.path.exists(tmp):
+                os.unlink(tmp)
+            return
+
+    with _lock:
+        for table, count in _usage_pending.items():
+            usage[table] = usage.get(table, 0) + count
+        _usage = usage
+
+
+def _reset_usage_after_fork() -> None:
+    global _usage_timer, _usage_file_lock
+    # The timer thread does not exist in the child; the parent writes its own counts
+    _usage_timer = None
+    _usage_pending.clear()
+    _usage_file_lock = threading.Lock()
+
+
+atexit.register(flush_usage)
+os.register_at_fork(after_in_child=_reset_usage_after_fork)
+
+
+def warmup_order(tables: List[str]) -> List[str]:
+    """Datasets ordered by historical usage (most used first, then by name)."""
+    usage = _load_usage()
+    return sorted(tables, key=lambda t: (-usage.get(t, 0), t))
+
+
+def _warmup(generation: int) -> None:
+    try:
+        tables = get_cached_tables()
+    except FileNotFoundError as e:
+        print(f"Warning: {e}")
+        return
+
+    for table in warmup_order(tables):
+        if generation != _warmup_generation:
+            return  # cache was cleared - a newer warmup took over
+        try:
+            warm_dataset(table)
+        except Exception as e:
+            print(f"Warning: cache warmup of {table} failed: {e}")
+
+    print(f"Cache warmed: {len(tables)} datasets")
+
+
+def start_warmup() -> threading.Thread:
+    """Warm the filter cache in a daemon thread; returns immediately."""
+    global _warmup_generation
+    with _lock:
+        _warmup_generation += 1
+        generation = _warmup_generation
+    thread = threading.Thread(target=_warmup, args=(generation,), name="cache-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def init_cache() -> None:
+    """Pre-load dataset list and all dropdown values (blocking)."""
+    try:
+        tables = get_cached_tables()
+    except FileNotFoundError as e:
+        print(f"Warning: {e}")
+        return
+
+    for table in warmup_order(tables):
+        warm_dataset(table)
+
+    print(f"Cache initialized: {len(tables)} datasets")
+
+
+def clear_cache() -> None:
+    """Clear all cached values (e.g. after config reload)."""
+    global _tables, _version, _dictionary, _dictionary_loaded, _usage
+    with _lock:
+        _tables = None
+        _version = None
+        _columns.clear()
+        _values.clear()
+        _dictionary = None
+        _dictionary_loaded = False
+        _usage = None
+    db.clear_plot_cache()
+    db.reset_connections()
+    clear_snapshot_cache()
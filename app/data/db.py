@@ -0,0 +1,573 @@
+"""
+SQLite access for MRS Viewer.
+
+Reads measurement tables produced by sql_import/xlsx_to_sqlite.py and returns
+pandas DataFrames ready for plotting. Loaded frames are kept in a small
+process-wide LRU cache, so the callbacks fired by one filter change
+(date range, scatter, boxplot, histogram) share a single query. Queries
+run on a per-thread read-only connection (read_connection).
+"""
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import closing
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from sql_import.monras_etl.dictionary import DICTIONARY_TABLE
+from sql_import.monras_etl.facts import FACT_TABLES
+from sql_import.monras_etl.manifest import MANIFEST_TABLE
+
+from ..config import (
+    config,
+    get_db_path,
+    get_table_prefilter,
+    get_visible_tables,
+    build_prefilter_conditions,
+)
+
+
+# Columns loaded for charts and the data table (missing columns are skipped)
+PLOT_COLUMNS = [
+    "hodnota",
+    "nejistota",
+    "pod_mva",
+    "nuklid",
+    "jednotka",
+    "odber_misto",
+    "dodavatel_dat",
+    "id_zppr_vzorek",
+]
+
+# Dropdown values precomputed by sql_import (table, column, value, row count, date range)
+FILTER_DICTIONARY_TABLE = DICTIONARY_TABLE
+
+# Bookkeeping and derived tables written by sql_import - never datasets,
+# whatever hidden_tables in the (possibly older user) config says
+INTERNAL_TABLES = frozenset({MANIFEST_TABLE, DICTIONARY_TABLE, *FACT_TABLES})
+
+# Fallback date columns if the configured one is missing in a table
+DATE_COLUMN_FALLBACKS = ["datum_odberu_utc", "datum_mereni_utc", "referencni_datum_utc"]
+
+
+# =============================================================================
+# Connection and schema helpers
+# =============================================================================
+
+def get_connection() -> sqlite3.Connection:
+    """Open a writable connection to the viewer database (caller closes it)."""
+    db_path = get_db_path()
+    if not db_path.exists():
+        raise FileNotFoundError(f"Database not found: {db_path}")
+    return sqlite3.connect(str(db_path))
+
+
+# Per-thread read-only connections: Dash runs callbacks in several threads,
+# each keeps one connection (with its page cache and prepared statements)
+_local = threading.local()
+_pool_generation = 0
+
+
+def _open_readonly(db_path) -> sqlite3.Connection:
+    """Open a read-only connection tuned by DatabaseConfig."""
+    db_cfg = config.database
+    conn = sqlite3.connect(
+        db_path.as_uri() + "?mode=ro",
+        uri=True,
+        cached_statements=int(db_cfg.cached_statements),
+    )
+    conn.execute("PRAGMA query_only = ON")
+    conn.execute(f"PRAGMA mmap_size = {int(db_cfg.mmap_size)}")
+    # Negative cache_size is in KiB instead of pages
+    conn.execute(f"PRAGMA cache_size = {-int(db_cfg.cache_size_kib)}")
+    return conn
+
+
+def read_connection() -> sqlite3.Connection:
+    """
+    Pooled read-only connection of the calling thread.
+
+    Do not close it. The connection is reopened when the database path or
+    file changes (e.g. the import replaced it) or after reset_connections().
+    """
+    db_path = get_db_path()
+    try:
+        inode = os.stat(db_path).st_ino
+    except OSError:
+        raise FileNotFoundError(f"Database not found: {db_path}")
+
+    key = (str(db_path), inode, _pool_generation)
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.key == key:
+        return conn
+    if conn is not None:
+        conn.close()
+    _local.conn = None
+    _local.conn = _open_readonly(db_path)
+    _local.key = key
+    return _local.conn
+
+
+def reset_connections() -> None:
+    """Make every thread reopen its pooled connection (e.g. after config reload)."""
+    global _pool_generation
+    _pool_generation += 1
+
+
+# Connections inherited by a forked process are never used (nor closed) there
+_inherited: list = []
+
+
+def _reset_after_fork() -> None:
+    """Forked workers (background callbacks) open their own connections and locks."""
+    global _local, _plot_cache_lock, _load_locks
+    _inherited.append(_local)
+    _local = threading.local()
+    _plot_cache_lock = threading.Lock()
+    _load_locks = {}
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_tables() -> List[str]:
+    """Return visible data tables (internal sql_import tables and hidden tables from config are excluded)."""
+    with read_connection() as conn:
+        rows = conn.execute(
+            "SELECT name FROM sqlite_master "
+            "WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        ).fetchall()
+    return get_visible_tables([r[0] for r in rows if r[0] not in INTERNAL_TABLES])
+
+
+def get_column_types(table: str) -> Dict[str, str]:
+    """Return mapping column -> declared SQLite type."""
+    with read_connection() as conn:
+        rows = conn.execute(f'PRAGMA table_info("{table}")').fetchall()
+    return {r[1]: (r[2] or "").upper() for r in rows}
+
+
+def get_columns(table: str) -> List[str]:
+    """Return column names of a table."""
+    return list(get_column_types(table).keys())
+
+
+def resolve_date_column(columns) -> Optional[str]:
+    """Pick the column used as "datum" (configured column first, then fallbacks)."""
+    for col in [config.database.date_column] + DATE_COLUMN_FALLBACKS:
+        if col in columns:
+            return col
+    return None
+
+
+def normalize_date_range(date_range) -> Optional[Tuple[Optional[int], Optional[int]]]:
+    """
+    Convert a (start, end) time window to unix milliseconds.
+
+    Accepts timestamps, datetimes or ISO strings; tz-aware values are
+    converted to UTC. Either bound may be None (open interval).
+    """
+    if not date_range:
+        return None
+
+    bounds = []
+    for value in date_range:
+        if value is None:
+            bounds.append(None)
+            continue
+        ts = pd.Timestamp(value)
+        if ts.tzinfo is not None:
+            ts = ts.tz_convert("UTC").tz_localize(None)
+        bounds.append(int(ts.value // 1_000_000))
+
+    if bounds[0] is None and bounds[1] is None:
+        return None
+    return bounds[0], bounds[1]
+
+
+def _build_where(
+    table: str,
+    filters: Optional[Dict[str, Any]],
+    column_types: Dict[str, str],
+    date_col: Optional[str],
+    date_range_ms: Optional[Tuple[Optional[int], Optional[int]]] = None,
+) -> Tuple[str, List[Any]]:
+    """Combine table prefilter, user filters and time window into a WHERE clause."""
+    unix_ms = date_col is not None and column_types.get(date_col) == "INTEGER"
+    conditions, params = build_prefilter_conditions(
+        table, date_column=date_col or "datum", unix_ms=unix_ms
+    )
+
+    # Time window on the (indexed) date column
+    if date_col and date_range_ms:
+        for op, bound in ((">=", date_range_ms[0]), ("<=", date_range_ms[1])):
+            if bound is None:
+                continue
+            conditions.append(f'"{date_col}" {op} ?')
+            if unix_ms:
+                params.append(bound)
+            else:
+                params.append(pd.Timestamp(bound, unit="ms").strftime("%Y-%m-%dT%H:%M:%S"))
+
+    for col, value in (filters or {}).items():
+        if col not in column_types or value is None:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            values = list(value)
+            if not values:
+                continue
+            placeholders = ", ".join("?" * len(values))
+            conditions.append(f'"{col}" IN ({placeholders})')
+            params.extend(values)
+        else:
+            conditions.append(f'"{col}" = ?')
+            params.append(value)
+
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    return where, params
+
+
+def get_distinct_values(table: str, column: str) -> List[str]:
+    """Return sorted distinct non-empty values of a column (prefilter applied)."""
+    column_types = get_column_types(table)
+    if column not in column_types:
+        return []
+
+    date_col = resolve_date_column(column_types)
+    where, params = _build_where(table, None, column_types, date_col)
+    sql = f'SELECT DISTINCT "{column}" FROM "{table}"{where}'
+
+    with read_connection() as conn:
+        rows = conn.execute(sql, params).fetchall()
+
+    return sorted(str(r[0]) for r in rows if r[0] is not None and str(r[0]).strip() != "")
+
+
+def load_filter_dictionary() -> Optional[Dict[str, Dict[str, List[str]]]]:
+    """
+    Dropdown values of all tables from the import's filter_dictionary.
+
+    Returns table -> column -> sorted values (no prefilter applied), or None
+    if the database has no dictionary (older import). Tables missing from
+    the result are not covered by the dictionary.
+    """
+    with read_connection() as conn:
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?",
+            (FILTER_DICTIONARY_TABLE,),
+        ).fetchone()
+        if not exists:
+            return None
+        rows = conn.execute(
+            f'SELECT table_name, column_name, value FROM "{FILTER_DICTIONARY_TABLE}"'
+        ).fetchall()
+
+    out: Dict[str, Dict[str, List[str]]] = {}
+    for table, column, value in rows:
+        out.setdefault(table, {}).setdefault(column, []).append(str(value))
+    for columns in out.values():
+        for column, values in columns.items():
+            columns[column] = sorted(v for v in values if v.strip() != "")
+    return out
+
+
+def load_columns(table: str, columns: List[str]) -> pd.DataFrame:
+    """
+    Load whole columns of a table (prefilter applied, no row limit).
+
+    The date column is returned as "datum" (datetime); missing columns are
+    skipped. Used by batch jobs that process all rows of a dataset.
+    """
+    column_types = get_column_types(table)
+    date_col = resolve_date_column(column_types)
+
+    select = [f'"{date_col}" AS datum'] if date_col else []
+    select += [f'"{c}"' for c in columns if c in column_types]
+    if not select:
+        return pd.DataFrame()
+
+    where, params = _build_where(table, None, column_types, date_col)
+    sql = f'SELECT {", ".join(select)} FROM "{table}"{where}'
+    with read_connection() as conn:
+        df = pd.read_sql_query(sql, conn, params=params)
+
+    if "datum" in df.columns:
+        df["datum"] = storage_to_datetime(df["datum"])
+    return df
+
+
+def iter_table_chunks(
+    table: str,
+    filters: Optional[Dict[str, Any]] = None,
+    date_range=None,
+    chunk_rows: int = 50000,
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield all columns of a table in chunks (prefilter and filters applied, no row limit).
+
+    Rows are ordered by the date column; stored dates are converted to
+    datetimes. Reads through its own read-only connection, so a slow
+    consumer (e.g. a streamed download) does not hold the thread's pooled one.
+    """
+    column_types = get_column_types(table)
+    date_col = resolve_date_column(column_types)
+    date_cols = [c for c in DATE_COLUMN_FALLBACKS if c in column_types]
+
+    where, params = _build_where(table, filters, column_types, date_col, normalize_date_range(date_range))
+    sql = f'SELECT * FROM "{table}"{where}'
+    if date_col:
+        sql += f' ORDER BY "{date_col}"'
+
+    with closing(_open_readonly(get_db_path())) as conn:
+        for chunk in pd.read_sql_query(sql, conn, params=params, chunksize=chunk_rows):
+            for col in date_cols:
+                chunk[col] = storage_to_datetime(chunk[col])
+            yield chunk
+
+
+def storage_to_datetime(series: pd.Series) -> pd.Series:
+    """Convert stored dates (unix_ms INTEGER or ISO TEXT) to naive UTC datetimes."""
+    if pd.api.types.is_numeric_dtype(series):
+        return pd.to_datetime(series, unit="ms", errors="coerce")
+    return pd.to_datetime(series, errors="coerce", utc=True).dt.tz_convert(None)
+
+
+# =============================================================================
+# Plot data
+# =============================================================================
+
+def build_plot_query(
+    table: str,
+    filters: Optional[Dict[str, Any]],
+    max_points: Optional[int],
+    date_range_ms: Optional[Tuple[Optional[int], Optional[int]]] = None,
+    column_types: Optional[Dict[str, str]] = None,
+) -> Tuple[str, List[Any]]:
+    """SQL and parameters of the plot data query (also used for EXPLAIN QUERY PLAN)."""
+    if column_types is None:
+        column_types = get_column_types(table)
+    date_col = resolve_date_column(column_types)
+
+    select = []
+    if date_col:
+        select.append(f'"{date_col}" AS datum')
+    select += [f'"{c}"' for c in PLOT_COLUMNS if c in column_types]
+    if "row_key" in column_types:
+        select.append('"row_key"')
+    else:
+        select.append("rowid AS _rowid")
+
+    where, params = _build_where(table, filters, column_types, date_col, date_range_ms)
+    sql = f'SELECT {", ".join(select)} FROM "{table}"{where}'
+
+    # Newest rows are kept when the limit is reached
+    if date_col:
+        sql += f' ORDER BY "{date_col}" DESC'
+    if max_points:
+        sql += " LIMIT ?"
+        params = params + [int(max_points)]
+    return sql, params
+
+
+def _load_plot_data(
+    table: str,
+    filters: Optional[Dict[str, Any]],
+    max_points: Optional[int],
+    date_range_ms: Optional[Tuple[Optional[int], Optional[int]]] = None,
+) -> pd.DataFrame:
+    """Query plot data from the table snapshot or SQLite (uncached)."""
+    if config.database.use_snapshots:
+        from .snapshot import query_plot_data
+        df = query_plot_data(table, filters, max_points, date_range_ms)
+        if df is not None:
+            return df
+
+    sql, params = build_plot_query(table, filters, max_points, date_range_ms)
+
+    with read_connection() as conn:
+        df = pd.read_sql_query(sql, conn, params=params)
+
+    if "row_key" not in df.columns:
+        df["row_key"] = table + ":" + df.pop("_rowid").astype(str)
+
+    # pod_mva may be stored as TEXT ("1"/"0") - callbacks compare with 1
+    if "pod_mva" in df.columns:
+        df["pod_mva"] = pd.to_numeric(df["pod_mva"], errors="coerce")
+
+    if "datum" in df.columns:
+        df["datum"] = storage_to_datetime(df["datum"])
+        df = df.iloc[::-1].reset_index(drop=True)
+
+    return df
+
+
+# Process-wide LRU cache of loaded frames
+_plot_cache: "OrderedDict[tuple, pd.DataFrame]" = OrderedDict()
+_plot_cache_lock = threading.Lock()
+_load_locks: Dict[tuple, threading.Lock] = {}
+
+# Optional second level shared by processes (diskcache.Cache, see app/background.py):
+# frames loaded by background callback jobs are reused by the server and vice versa
+_shared_cache = None
+
+
+def set_shared_cache(cache) -> None:
+    """Use a cross-process cache (diskcache.Cache or None) behind the in-memory LRU."""
+    global _shared_cache
+    _shared_cache = cache
+
+
+def _normalize_filters(filters: Optional[Dict[str, Any]]) -> tuple:
+    """Hashable, order-independent representation of a filters dict."""
+    items = []
+    for col, value in sorted((filters or {}).items()):
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            if not value:
+                continue
+            value = tuple(sorted(value, key=str))
+        items.append((col, value))
+    return tuple(items)
+
+
+def get_db_version() -> tuple:
+    """Modification times of the database file (and its WAL file)."""
+    db_path = str(get_db_path())
+    version = []
+    for path in (db_path, db_path + "-wal"):
+        try:
+            st = os.stat(path)
+        except OSError:
+            version.append(None)
+            continue
+        # An empty WAL comes and goes with reader connections - ignore it
+        version.append((st.st_mtime_ns, st.st_size) if st.st_size else None)
+    return tuple(version)
+
+
+def make_cache_key(table: str, filters: Optional[Dict[str, Any]], *extra) -> tuple:
+    """Cache key: table, normalized filters, prefilter version and DB version."""
+    return (
+        table,
+        _normalize_filters(filters),
+        repr(get_table_prefilter(table)),
+        get_db_version(),
+    ) + tuple(extra)
+
+
+def _cache_get(key: tuple) -> Optional[pd.DataFrame]:
+    with _plot_cache_lock:
+        df = _plot_cache.get(key)
+        if df is not None:
+            _plot_cache.move_to_end(key)
+        return df
+
+
+def _cache_put(key: tuple, df: pd.DataFrame) -> None:
+    with _plot_cache_lock:
+        _plot_cache[key] = df
+        _plot_cache.move_to_end(key)
+        max_size = max(1, int(config.database.plot_cache_size))
+        while len(_plot_cache) > max_size:
+            _plot_cache.popitem(last=False)
+
+
+def get_plot_data(
+    table: str,
+    filters: Optional[Dict[str, Any]] = None,
+    max_points: Optional[int] = None,
+    date_range=None,
+) -> pd.DataFrame:
+    """
+    Load data for plotting from a table.
+
+    Args:
+        table: Database table (dataset) name.
+        filters: Column filters - scalar value for "=", list for "IN".
+        max_points: Maximum number of rows (newest rows are kept).
+        date_range: Optional (start, end) time window, applied in SQL on the
+                    date column, so max_points counts rows inside the window.
+
+    Returns:
+        DataFrame with "datum" (datetime), measurement columns and "row_key".
+        The result is cached; callers get their own copy.
+    """
+    date_range_ms = normalize_date_range(date_range)
+    key = make_cache_key(table, filters, max_points, date_range_ms)
+
+    df = _cache_get(key)
+    if df is None:
+        # One loader per key - concurrent callbacks wait for the first query
+        with _plot_cache_lock:
+            load_lock = _load_locks.setdefault(key, threading.Lock())
+        with load_lock:
+            df = _cache_get(key)
+            if df is None and _shared_cache is not None:
+                df = _shared_cache.get(key)
+                if df is not None:
+                    _cache_put(key, df)
+            if df is None:
+                df = _load_plot_data(table, filters, max_points, date_range_ms)
+                _cache_put(key, df)
+                if _shared_cache is not None:
+                    _shared_cache.set(key, df)
+        with _plot_cache_lock:
+            _load_locks.pop(key, None)
+
+    return df.copy()
+
+
+# =============================================================================
+# Aggregates
+# =============================================================================
+
+_bounds_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+_BOUNDS_CACHE_SIZE = 256
+
+
+def get_date_bounds(
+    table: str,
+    filters: Optional[Dict[str, Any]] = None,
+) -> Tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]]:
+    """
+    Return (min, max) of the date column for the given filters.
+
+    Runs a single MIN/MAX query (served from the date index) instead of
+    loading rows; results are memoized per filter combination and DB version.
+    """
+    key = make_cache_key(table, filters)
+    with _plot_cache_lock:
+        if key in _bounds_cache:
+            _bounds_cache.move_to_end(key)
+            return _bounds_cache[key]
+
+    column_types = get_column_types(table)
+    date_col = resolve_date_column(column_types)
+    bounds: Tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]] = (None, None)
+
+    if date_col:
+        where, params = _build_where(table, filters, column_types, date_col)
+        sql = f'SELECT MIN("{date_col}"), MAX("{date_col}") FROM "{table}"{where}'
+        with read_connection() as conn:
+            row = conn.execute(sql, params).fetchone()
+        dates = storage_to_datetime(pd.Series(list(row)))
+        if dates.notna().all():
+            bounds = (dates.iloc[0], dates.iloc[1])
+
+    with _plot_cache_lock:
+        _bounds_cache[key] = bounds
+        while len(_bounds_cache) > _BOUNDS_CACHE_SIZE:
+            _bounds_cache.popitem(last=False)
+    return bounds
+
+
+def clear_plot_cache() -> None:
+    """Drop all cached plot frames and aggregates."""
+    with _plot_cache_lock:
+        _plot_cache.clear()
+        _bounds_cache.clear()
+    if _shared_cache is not None:
+        _shared_cache.clear()
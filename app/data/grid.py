@@ -0,0 +1,270 @@
+"""
+Server-side row model for AG Grid tables.
+
+Applies AG Grid filter and sort models to a DataFrame and returns only the
+requested block of rows (infinite row model / pagination), so the browser
+never receives the whole table. Tables kept in SQLite (the suspicious
+records basket) translate the same models into WHERE / ORDER BY clauses
+instead (filter_model_sql, sort_model_sql), with the same semantics.
+"""
+import sqlite3
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# Datetime columns are shown (and text-filtered) in this format
+DATE_FORMAT = "%Y-%m-%d %H:%M"
+
+
+def _text_condition(series: pd.Series, condition: Dict[str, Any]) -> pd.Series:
+    """Row mask for one text filter condition (case-insensitive, like AG Grid)."""
+    kind = condition.get("type", "contains")
+    if kind == "blank":
+        return series.isna() | (series.astype(str).str.strip() == "")
+    if kind == "notBlank":
+        return series.notna() & (series.astype(str).str.strip() != "")
+
+    text = series.astype(str).str.lower().where(series.notna(), "")
+    value = str(condition.get("filter") or "").lower()
+    if kind == "equals":
+        return text == value
+    if kind == "notEqual":
+        return text != value
+    if kind == "startsWith":
+        return text.str.startswith(value)
+    if kind == "endsWith":
+        return text.str.endswith(value)
+    if kind == "notContains":
+        return ~text.str.contains(value, regex=False)
+    return text.str.contains(value, regex=False)
+
+
+def _number_condition(series: pd.Series, condition: Dict[str, Any]) -> pd.Series:
+    """Row mask for one number filter condition."""
+    values = pd.to_numeric(series, errors="coerce")
+    kind = condition.get("type", "equals")
+    if kind == "blank":
+        return values.isna()
+    if kind == "notBlank":
+        return values.notna()
+
+    value = condition.get("filter")
+    if value is None:
+        return pd.Series(True, index=series.index)
+    if kind == "notEqual":
+        return values != value
+    if kind == "lessThan":
+        return values < value
+    if kind == "lessThanOrEqual":
+        return values <= value
+    if kind == "greaterThan":
+        return values > value
+    if kind == "greaterThanOrEqual":
+        return values >= value
+    if kind == "inRange":
+        value_to = condition.get("filterTo")
+        if value_to is None:
+            return values >= value
+        return (values >= value) & (values <= value_to)
+    return values == value
+
+
+def _column_mask(series: pd.Series, model: Dict[str, Any]) -> pd.Series:
+    """Row mask for the filter model of one column (single or combined conditions)."""
+    if model.get("filterType") == "number":
+        condition_fn = _number_condition
+    else:
+        condition_fn = _text_condition
+        if pd.api.types.is_datetime64_any_dtype(series):
+            # Text filters match the displayed date
+            series = series.dt.strftime(DATE_FORMAT)
+
+    conditions = model.get("conditions")
+    if conditions is None:
+        return condition_fn(series, model)
+
+    masks = [condition_fn(series, c) for c in conditions]
+    if model.get("operator", "AND").upper() == "OR":
+        return np.logical_or.reduce(masks)
+    return np.logical_and.reduce(masks)
+
+
+def apply_filter_model(df: pd.DataFrame, filter_model: Optional[Dict[str, Any]]) -> pd.DataFrame:
+    """Filter rows by an AG Grid filter model (unknown columns are ignored)."""
+    if not filter_model or df.empty:
+        return df
+
+    mask = pd.Series(True, index=df.index)
+    for column, model in filter_model.items():
+        if column in df.columns and model:
+            mask &= _column_mask(df[column], model)
+    return df[mask]
+
+
+def apply_sort_model(df: pd.DataFrame, sort_model: Optional[List[Dict[str, Any]]]) -> pd.DataFrame:
+    """Sort rows by an AG Grid sort model (stable, missing values last)."""
+    sort_model = [s for s in (sort_model or []) if s.get("colId") in df.columns]
+    if not sort_model or df.empty:
+        return df
+
+    return df.sort_values(
+        by=[s["colId"] for s in sort_model],
+        ascending=[s.get("sort", "asc") != "desc" for s in sort_model],
+        kind="stable",
+        na_position="last",
+    )
+
+
+def get_rows_block(
+    df: pd.DataFrame,
+    request: Optional[Dict[str, Any]],
+    format_block: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+) -> Dict[str, Any]:
+    """
+    Answer an AG Grid getRows request.
+
+    Args:
+        df: Full table (already restricted to the current view).
+        request: getRowsRequest with startRow, endRow, sortModel, filterModel.
+        format_block: Turns rows into display rows; applied to the requested
+            block only, so the whole table is never formatted per request.
+
+    Returns:
+        getRowsResponse dict with "rowData" (requested block) and "rowCount".
+    """
+    request = request or {}
+    df = apply_filter_model(df, request.get("filterModel"))
+    df = apply_sort_model(df, request.get("sortModel"))
+
+    start = int(request.get("startRow") or 0)
+    end = request.get("endRow")
+    end = len(df) if end is None else int(end)
+
+    block = df.iloc[start:end]
+    if format_block is not None:
+        block = format_block(block)
+    # NaN is not valid JSON - send null instead
+    block = block.astype(object).where(block.notna(), None)
+    return {"rowData": block.to_dict("records"), "rowCount": len(df)}
+
+
+# =============================================================================
+# SQL translation (same semantics as the DataFrame functions above)
+# =============================================================================
+
+def _sql_text(value) -> str:
+    """Lower-cased text of a value, "" for NULL (Python lower, so also diacritics)."""
+    return "" if value is None else str(value).lower()
+
+
+def _sql_number(value) -> Optional[float]:
+    """Numeric value or NULL, like pd.to_numeric(errors="coerce")."""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    try:
+        return float(str(value).strip())
+    except ValueError:
+        return None
+
+
+def register_sql_functions(conn: sqlite3.Connection) -> None:
+    """Functions used by filter_model_sql (call once per connection)."""
+    conn.create_function("grid_text", 1, _sql_text, deterministic=True)
+    conn.create_function("grid_number", 1, _sql_number, deterministic=True)
+
+
+def _text_condition_sql(column: str, condition: Dict[str, Any]) -> Tuple[str, List[Any]]:
+    kind = condition.get("type", "contains")
+    if kind == "blank":
+        return f"({column} IS NULL OR TRIM(CAST({column} AS TEXT)) = '')", []
+    if kind == "notBlank":
+        return f"({column} IS NOT NULL AND TRIM(CAST({column} AS TEXT)) <> '')", []
+
+    text = f"grid_text({column})"
+    value = str(condition.get("filter") or "").lower()
+    if kind == "equals":
+        return f"{text} = ?", [value]
+    if kind == "notEqual":
+        return f"{text} <> ?", [value]
+    if not value:
+        # Every text starts with / ends with / contains ""
+        return ("0", []) if kind == "notContains" else ("1", [])
+    if kind == "startsWith":
+        return f"substr({text}, 1, ?) = ?", [len(value), value]
+    if kind == "endsWith":
+        return f"substr({text}, -?) = ?", [len(value), value]
+    if kind == "notContains":
+        return f"instr({text}, ?) = 0", [value]
+    return f"instr({text}, ?) > 0", [value]
+
+
+def _number_condition_sql(column: str, condition: Dict[str, Any]) -> Tuple[str, List[Any]]:
+    number = f"grid_number({column})"
+    kind = condition.get("type", "equals")
+    if kind == "blank":
+        return f"{number} IS NULL", []
+    if kind == "notBlank":
+        return f"{number} IS NOT NULL", []
+
+    value = condition.get("filter")
+    if value is None:
+        return "1", []
+    if kind == "notEqual":
+        return f"{number} IS NOT ?", [value]
+    operators = {
+        "lessThan": "<",
+        "lessThanOrEqual": "<=",
+        "greaterThan": ">",
+        "greaterThanOrEqual": ">=",
+    }
+    if kind in operators:
+        return f"{number} {operators[kind]} ?", [value]
+    if kind == "inRange":
+        value_to = condition.get("filterTo")
+        if value_to is None:
+            return f"{number} >= ?", [value]
+        return f"{number} BETWEEN ? AND ?", [value, value_to]
+    return f"{number} = ?", [value]
+
+
+def filter_model_sql(filter_model: Optional[Dict[str, Any]], columns: List[str]) -> Tuple[str, List[Any]]:
+    """
+    SQL condition and parameters of an AG Grid filter model.
+
+    Unknown columns are ignored; returns ("1", []) when nothing is filtered.
+    The connection needs register_sql_functions.
+    """
+    clauses: List[str] = []
+    params: List[Any] = []
+    for column, model in (filter_model or {}).items():
+        if column not in columns or not model:
+            continue
+        quoted = '"' + column.replace('"', '""') + '"'
+        condition_fn = _number_condition_sql if model.get("filterType") == "number" else _text_condition_sql
+
+        conditions = model.get("conditions")
+        if conditions is None:
+            sql, args = condition_fn(quoted, model)
+        else:
+            parts = [condition_fn(quoted, c) for c in conditions]
+            joiner = " OR " if model.get("operator", "AND").upper() == "OR" else " AND "
+            sql = "(" + joiner.join(p[0] for p in parts) + ")"
+            args = [a for p in parts for a in p[1]]
+        clauses.append(sql)
+        params += args
+    return (" AND ".join(clauses) or "1"), params
+
+
+def sort_model_sql(sort_model: Optional[List[Dict[str, Any]]], columns: List[str]) -> List[str]:
+    """ORDER BY terms of an AG Grid sort model (missing values last, unknown columns ignored)."""
+    terms = []
+    for s in sort_model or []:
+        column = s.get("colId")
+        if column not in columns:
+            continue
+        quoted = '"' + column.replace('"', '""') + '"'
+        direction = "DESC" if s.get("sort") == "desc" else "ASC"
+        terms += [f"{quoted} IS NULL", f"{quoted} {direction}"]
+    return terms
@@ -0,0 +1,172 @@
+"""
+Covering indexes for the viewer's plot queries.
+
+The viewer always filters a dataset by ``nuklid`` (plus optional
+``odber_misto IN``, ``dodavatel_dat IN``, prefilter and date window),
+orders by the date column and reads a fixed column set (db.PLOT_COLUMNS).
+One composite index ``(nuklid, <date>, odber_misto, dodavatel_dat, pod_mva,
+...)`` answers all of these shapes from the index alone: equality on
+``nuklid``, range and ORDER BY on the date, remaining filters and columns
+read from the index entries.
+
+Create missing indexes, run ANALYZE and print the query plans:
+    python -m app.data.indexes
+Only check the plans:
+    python -m app.data.indexes --check
+"""
+import argparse
+import sqlite3
+from contextlib import closing
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from ..config import config
+from . import db
+
+
+INDEX_PREFIX = "idx_viewer_"
+
+# Filter columns right after (nuklid, date) - evaluated on index entries
+FILTER_COLUMNS = ["odber_misto", "dodavatel_dat", "pod_mva"]
+
+
+@dataclass
+class PlanCheck:
+    """EXPLAIN QUERY PLAN result of one plot query shape."""
+    table: str
+    shape: str
+    plan: List[str]
+
+    @property
+    def index_only(self) -> bool:
+        """True if the table is read only through a covering index, without sorting."""
+        return (
+            any("COVERING INDEX" in step for step in self.plan)
+            and not any(step.startswith("SCAN") and "COVERING INDEX" not in step for step in self.plan)
+            and not any("TEMP B-TREE" in step for step in self.plan)
+        )
+
+
+def covering_index_columns(column_types: Dict[str, str]) -> List[str]:
+    """Columns of the covering index for a table (missing columns are skipped)."""
+    if "nuklid" not in column_types:
+        return []
+    date_col = db.resolve_date_column(column_types)
+    cols = ["nuklid"] + ([date_col] if date_col else [])
+    cols += [c for c in FILTER_COLUMNS + db.PLOT_COLUMNS if c in column_types and c not in cols]
+    if "row_key" in column_types:
+        cols.append("row_key")
+    return cols
+
+
+def _index_columns(conn: sqlite3.Connection, table: str) -> Dict[str, List[str]]:
+    """Existing indexes of a table -> their columns."""
+    out = {}
+    for row in conn.execute(f'PRAGMA index_list("{table}")').fetchall():
+        name = row[1]
+        out[name] = [r[2] for r in conn.execute(f'PRAGMA index_info("{name}")').fetchall()]
+    return out
+
+
+def find_covering_index(conn: sqlite3.Connection, table: str, columns: List[str]) -> Optional[str]:
+    """
+    Name of an existing index usable for the plot queries, if any.
+
+    The index must start with (nuklid, date) and contain all other columns
+    in any order - e.g. a matching index from sql_import/config.yaml.
+    """
+    for name, cols in _index_columns(conn, table).items():
+        if cols[:2] == columns[:2] and set(columns) <= set(cols):
+            return name
+    return None
+
+
+def ensure_covering_index(conn: sqlite3.Connection, table: str) -> Optional[str]:
+    """Create the covering index of a table unless a usable one exists; returns its name."""
+    column_types = db.get_column_types(table)
+    columns = covering_index_columns(column_types)
+    if not columns:
+        return None
+
+    name = find_covering_index(conn, table, columns)
+    if name is not None:
+        return name
+
+    name = INDEX_PREFIX + table
+    cols_sql = ", ".join(f'"{c}"' for c in columns)
+    # An older advisor index with different columns (schema changed) is replaced
+    conn.execute(f'DROP INDEX IF EXISTS "{name}"')
+    conn.execute(f'CREATE INDEX "{name}" ON "{table}" ({cols_sql})')
+    conn.commit()
+    return name
+
+
+def _sample_values(conn: sqlite3.Connection, table: str, column_types: Dict[str, str]) -> Dict[str, object]:
+    """One existing value per filter column (the plan does not depend on it)."""
+    cols = [c for c in ("nuklid", "odber_misto", "dodavatel_dat") if c in column_types]
+    if not cols:
+        return {}
+    cols_sql = ", ".join(f'"{c}"' for c in cols)
+    row = conn.execute(f'SELECT {cols_sql} FROM "{table}" LIMIT 1').fetchone()
+    return dict(zip(cols, row)) if row else {c: "" for c in cols}
+
+
+def check_plot_queries(conn: sqlite3.Connection, table: str) -> List[PlanCheck]:
+    """EXPLAIN QUERY PLAN of the get_plot_data query shapes of a table."""
+    column_types = db.get_column_types(table)
+    if "nuklid" not in column_types:
+        return []
+    values = _sample_values(conn, table, column_types)
+    max_points = config.database.max_points
+
+    shapes = {"nuklid": {"nuklid": values["nuklid"]}}
+    if "odber_misto" in values:
+        shapes["nuklid + odber_misto IN"] = {
+            "nuklid": values["nuklid"], "odber_misto": [values["odber_misto"], ""],
+        }
+    if "odber_misto" in values and "dodavatel_dat" in values:
+        shapes["nuklid + odber_misto IN + dodavatel_dat IN"] = {
+            "nuklid": values["nuklid"],
+            "odber_misto": [values["odber_misto"]],
+            "dodavatel_dat": [values["dodavatel_dat"]],
+        }
+
+    checks = []
+    for shape, filters in shapes.items():
+        for date_range_ms in (None, (0, 2**41)):
+            sql, params = db.build_plot_query(table, filters, max_points, date_range_ms, column_types)
+            plan = [r[3] for r in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()]
+            label = shape + (" + date range" if date_range_ms else "")
+            checks.append(PlanCheck(table=table, shape=label, plan=plan))
+    return checks
+
+
+def build_indexes(check_only: bool = False) -> List[PlanCheck]:
+    """Ensure covering indexes on all visible tables, ANALYZE and verify the plans."""
+    checks = []
+    with closing(db.get_connection()) as conn:
+        for table in db.get_tables():
+            if not check_only:
+                name = ensure_covering_index(conn, table)
+                if name:
+                    print(f"Index: {table} -> {name}")
+        if not check_only:
+            conn.execute("ANALYZE")
+            conn.commit()
+        for table in db.get_tables():
+            checks.extend(check_plot_queries(conn, table))
+
+    for check in checks:
+        status = "OK  " if check.index_only else "SCAN"
+        print(f"[{status}] {check.table}: {check.shape}")
+        if not check.index_only:
+            for step in check.plan:
+                print(f"         {step}")
+    return checks
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Covering indexes for the viewer's plot queries")
+    parser.add_argument("--check", action="store_true", help="Only print query plans, do not create indexes")
+    args = parser.parse_args()
+    build_indexes(check_only=args.check)
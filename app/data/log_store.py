@@ -0,0 +1,135 @@
+"""
+Server-side store of the status log.
+
+Entries live in a small SQLite file next to the viewer database
+(<db>.log.sqlite), keyed by page session, so every server process and
+worker (gunicorn, background callbacks) sees the same log and it survives
+restarts. A session is created with its welcome message on page load
+(new_session); reading the log never writes. Each session keeps its newest
+MAX_LOG_ENTRIES entries; sessions without a new entry for SESSION_TTL_DAYS
+are dropped.
+"""
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+from ..config import get_db_path
+
+
+LOG_TABLE = "status_log"
+SESSION_TABLE = "status_log_session"
+
+MAX_LOG_ENTRIES = 100
+SESSION_TTL_DAYS = 7
+
+WELCOME_MESSAGE = "Aplikace spuštěna. Vyberte dataset pro začátek."
+
+_lock = threading.Lock()
+_initialized: set = set()
+
+
+def new_session() -> str:
+    """Start a page's log (with the welcome message); returns its random id."""
+    session = uuid.uuid4().hex
+    with closing(_connect()) as conn, conn:
+        _ensure_session(conn, session)
+    return session
+
+
+def get_log_path() -> Path:
+    db_path = get_db_path()
+    return db_path.with_name(db_path.name + ".log.sqlite")
+
+
+def _connect() -> sqlite3.Connection:
+    """Open the log database, creating the tables on first use."""
+    path = get_log_path()
+    conn = sqlite3.connect(str(path), timeout=10)
+    with _lock:
+        if str(path) not in _initialized:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute(
+                f'CREATE TABLE IF NOT EXISTS "{LOG_TABLE}" ('
+                f"id INTEGER PRIMARY KEY AUTOINCREMENT, session TEXT NOT NULL, "
+                f"timestamp TEXT, message TEXT, level TEXT)"
+            )
+            conn.execute(f'CREATE INDEX IF NOT EXISTS "idx_{LOG_TABLE}_session" ON "{LOG_TABLE}" (session, id)')
+            conn.execute(
+                f'CREATE TABLE IF NOT EXISTS "{SESSION_TABLE}" ('
+                f"session TEXT PRIMARY KEY, version INTEGER NOT NULL, used_at REAL NOT NULL)"
+            )
+            conn.commit()
+            _initialized.add(str(path))
+    return conn
+
+
+def _ensure_session(conn: sqlite3.Connection, session: str) -> None:
+    """Create a missing session with the welcome message (and drop expired ones); inside a transaction."""
+    now = time.time()
+    created = conn.execute(
+        f'INSERT OR IGNORE INTO "{SESSION_TABLE}" VALUES (?, 0, ?)', (session, now)
+    ).rowcount
+    if not created:
+        return
+    expired = now - SESSION_TTL_DAYS * 86400
+    conn.execute(
+        f'DELETE FROM "{LOG_TABLE}" WHERE session IN '
+        f'(SELECT session FROM "{SESSION_TABLE}" WHERE used_at < ?)',
+        (expired,),
+    )
+    conn.execute(f'DELETE FROM "{SESSION_TABLE}" WHERE used_at < ?', (expired,))
+    _insert(conn, session, WELCOME_MESSAGE, "info")
+
+
+def _insert(conn: sqlite3.Connection, session: str, message: str, level: str) -> None:
+    conn.execute(
+        f'INSERT INTO "{LOG_TABLE}" (session, timestamp, message, level) VALUES (?, ?, ?, ?)',
+        (session, datetime.now().strftime("%H:%M:%S"), message, level),
+    )
+    # Ring buffer: keep the newest MAX_LOG_ENTRIES
+    conn.execute(
+        f'DELETE FROM "{LOG_TABLE}" WHERE session = ? AND id <= '
+        f'(SELECT id FROM "{LOG_TABLE}" WHERE session = ? ORDER BY id DESC LIMIT 1 OFFSET ?)',
+        (session, session, MAX_LOG_ENTRIES),
+    )
+
+
+def _bump(conn: sqlite3.Connection, session: str) -> int:
+    conn.execute(
+        f'UPDATE "{SESSION_TABLE}" SET version = version + 1, used_at = ? WHERE session = ?',
+        (time.time(), session),
+    )
+    return conn.execute(f'SELECT version FROM "{SESSION_TABLE}" WHERE session = ?', (session,)).fetchone()[0]
+
+
+def add_entry(session: str, message: str, level: str = "info") -> int:
+    """Append an entry to a session's log (recreated if it expired); returns the session's new version."""
+    with closing(_connect()) as conn, conn:
+        _ensure_session(conn, session)
+        _insert(conn, session, message, level)
+        return _bump(conn, session)
+
+
+def clear_entries(session: str) -> int:
+    """Remove all entries of a session's log; returns the session's new version."""
+    with closing(_connect()) as conn, conn:
+        _ensure_session(conn, session)
+        conn.execute(f'DELETE FROM "{LOG_TABLE}" WHERE session = ?', (session,))
+        return _bump(conn, session)
+
+
+def get_entries(session: Optional[str]) -> List[dict]:
+    """Entries of a session's log, newest first (read only - an unknown session has none)."""
+    if not session:
+        return []
+    with closing(_connect()) as conn:
+        rows = conn.execute(
+            f'SELECT timestamp, message, level FROM "{LOG_TABLE}" WHERE session = ? ORDER BY id DESC',
+            (session,),
+        ).fetchall()
+    return [{"timestamp": t, "message": m, "level": lv} for t, m, lv in rows]
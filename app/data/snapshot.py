@@ -0,0 +1,453 @@
+"""
+Columnar on-disk snapshots of dataset tables.
+
+Each table's viewer columns are written as NumPy ``.npy`` files into
+``<database>.snapshot/<table>/``:
+
+- ``datum.npy``        datetime64[ms] (NaT for missing dates)
+- ``<col>.npy``        int64 (INTEGER) or float64 (REAL) numeric columns
+- ``<col>.null.npy``   NULL mask of a numeric column
+- ``<col>.text.npy``   dictionary codes of text stored in a numeric column
+                       (SQLite keeps non-numeric text as is), -1 elsewhere
+- ``<col>.codes.npy``  int32 dictionary codes for text columns (-1 = NULL)
+- ``meta.json``        dictionaries, column kinds and the DB version the
+                       snapshot was built from
+
+Rows come back with the dtypes the SQL query returns: integer columns stay
+int64 unless the selected rows contain NULLs, text stored in a numeric
+column is returned as text.
+
+Snapshots are opened with ``mmap_mode="r"``, so filtering runs on the mapped
+pages and only the matching rows are materialized into a DataFrame.
+
+Build all snapshots after an import:
+    python -m app.data.snapshot
+"""
+import json
+import os
+import shutil
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..config import get_db_path, get_table_prefilter, iso_date_to_unix_ms
+from . import db
+
+
+SNAPSHOT_FORMAT = 2
+
+
+@dataclass
+class Snapshot:
+    """Memory-mapped columns of one table."""
+    table: str
+    db_version: list
+    n_rows: int
+    kinds: Dict[str, str]                       # column -> "datetime" | "integer" | "real" | "text" | "rowid"
+    dictionaries: Dict[str, List[str]]          # text column (or text in a numeric column) -> values
+    arrays: Dict[str, np.ndarray] = field(default_factory=dict)
+    nulls: Dict[str, np.ndarray] = field(default_factory=dict)    # numeric column -> NULL mask
+    texts: Dict[str, np.ndarray] = field(default_factory=dict)    # numeric column -> text codes
+    _lookup: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+    def codes_for(self, column: str, values) -> np.ndarray:
+        """Dictionary codes of the given values (unknown values are ignored)."""
+        lookup = self._lookup.get(column)
+        if lookup is None:
+            lookup = {v: i for i, v in enumerate(self.dictionaries[column])}
+            self._lookup[column] = lookup
+        if not isinstance(values, (list, tuple, set)):
+            values = [values]
+        return np.array([lookup[str(v)] for v in values if str(v) in lookup], dtype=np.int32)
+
+
+def get_snapshot_root() -> Path:
+    """Directory holding all table snapshots."""
+    db_path = get_db_path()
+    return db_path.with_name(db_path.name + ".snapshot")
+
+
+def _db_version_json() -> list:
+    """Current DB version in a JSON-comparable form."""
+    return json.loads(json.dumps(db.get_db_version()))
+
+
+# =============================================================================
+# Build
+# =============================================================================
+
+def _split_numeric(series: pd.Series, kind: str) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray], List[str]]:
+    """Values, NULL mask, text codes (None if there is no text) and text dictionary of a numeric column."""
+    null = series.isna().to_numpy(dtype=bool)
+    if series.dtype == object:
+        is_text = series.map(lambda v: isinstance(v, str)).to_numpy(dtype=bool)
+    else:
+        is_text = np.zeros(len(series), dtype=bool)
+
+    numeric = pd.to_numeric(series.where(~is_text), errors="coerce")
+    if kind == "integer":
+        values = numeric.fillna(0).to_numpy(dtype=np.int64)
+    else:
+        values = numeric.to_numpy(dtype=np.float64)
+
+    if not is_text.any():
+        return values, null, None, []
+    codes, uniques = pd.factorize(series.where(is_text).astype(object), use_na_sentinel=True)
+    return values, null, codes.astype(np.int32), [str(u) for u in uniques]
+
+
+def _numeric_kind(series: pd.Series, declared: str) -> str:
+    """INTEGER columns holding fractional values (INTEGER affinity keeps them) are stored as real."""
+    if declared != "INTEGER":
+        return "real"
+    numeric = pd.to_numeric(series.where(series.map(lambda v: not isinstance(v, str))), errors="coerce")
+    numeric = numeric.dropna()
+    return "integer" if (numeric == numeric.round()).all() else "real"
+
+
+def build_snapshot(table: str) -> Path:
+    """Write the snapshot of one table (atomically replaces an old one)."""
+    column_types = db.get_column_types(table)
+    date_col = db.resolve_date_column(column_types)
+    db_version = _db_version_json()
+
+    select = []
+    if date_col:
+        select.append(f'"{date_col}" AS datum')
+    columns = [c for c in db.PLOT_COLUMNS if c in column_types]
+    select += [f'"{c}"' for c in columns]
+    if "row_key" in column_types:
+        select.append('"row_key"')
+        columns.append("row_key")
+    else:
+        select.append("rowid AS _rowid")
+
+    sql = f'SELECT {", ".join(select)} FROM "{table}"'
+    if date_col:
+        sql += f' ORDER BY "{date_col}"'
+
+    with db.read_connection() as conn:
+        df = pd.read_sql_query(sql, conn)
+
+    root = get_snapshot_root()
+    target = root / table
+    tmp = root / f".{table}.tmp"
+    if tmp.exists():
+        shutil.rmtree(tmp)
+    tmp.mkdir(parents=True)
+
+    kinds: Dict[str, str] = {}
+    dictionaries: Dict[str, List[str]] = {}
+
+    if "datum" in df.columns:
+        datum = db.storage_to_datetime(df["datum"]).values.astype("datetime64[ms]")
+        # SQL orders TEXT dates lexically (unparseable strings, mixed offsets);
+        # _window_rows needs chronological order with NaT (int64 min) first
+        order = np.argsort(datum.view(np.int64), kind="stable")
+        if (np.diff(order) < 0).any():
+            datum = datum[order]
+            df = df.iloc[order].reset_index(drop=True)
+        np.save(tmp / "datum.npy", datum)
+        kinds["datum"] = "datetime"
+
+    if "_rowid" in df.columns:
+        np.save(tmp / "_rowid.npy", df["_rowid"].to_numpy(dtype=np.int64))
+        kinds["_rowid"] = "rowid"
+
+    for col in columns:
+        if column_types.get(col) in ("INTEGER", "REAL"):
+            kind = _numeric_kind(df[col], column_types[col])
+            values, null, text_codes, text_values = _split_numeric(df[col], kind)
+            np.save(tmp / f"{col}.npy", values)
+            np.save(tmp / f"{col}.null.npy", null)
+            if text_codes is not None:
+                np.save(tmp / f"{col}.text.npy", text_codes)
+                dictionaries[col] = text_values
+            kinds[col] = kind
+        else:
+            text = df[col].where(df[col].isna(), df[col].astype(str))
+            codes, uniques = pd.factorize(text, use_na_sentinel=True)
+            np.save(tmp / f"{col}.codes.npy", codes.astype(np.int32))
+            dictionaries[col] = [str(u) for u in uniques]
+            kinds[col] = "text"
+
+    meta = {
+        "format": SNAPSHOT_FORMAT,
+        "table": table,
+        "db_version": db_version,
+        "n_rows": int(len(df)),
+        "kinds": kinds,
+        "dictionaries": dictionaries,
+    }
+    with open(tmp / "meta.json", "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    if target.exists():
+        shutil.rmtree(target)
+    os.replace(tmp, target)
+    return target
+
+
+def build_all_snapshots() -> List[str]:
+    """Build snapshots of all visible tables."""
+    tables = db.get_tables()
+    for table in tables:
+        path = build_snapshot(table)
+        print(f"Snapshot: {table} -> {path}")
+    return tables
+
+
+# =============================================================================
+# Load
+# =============================================================================
+
+_snapshots: Dict[str, Snapshot] = {}
+_lock = threading.Lock()
+# One lock per table: a build only blocks callbacks of the same table
+_table_locks: Dict[str, threading.Lock] = {}
+
+
+def _reset_lock_after_fork() -> None:
+    global _lock, _table_locks
+    _lock = threading.Lock()
+    _table_locks = {}
+
+
+os.register_at_fork(after_in_child=_reset_lock_after_fork)
+
+
+def _open_snapshot(table: str) -> Optional[Snapshot]:
+    """Open a snapshot from disk (None if missing, stale or unreadable)."""
+    path = get_snapshot_root() / table
+    try:
+        with open(path / "meta.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if meta.get("format") != SNAPSHOT_FORMAT or meta.get("db_version") != _db_version_json():
+        return None
+
+    snap = Snapshot(
+        table=table,
+        db_version=meta["db_version"],
+        n_rows=meta["n_rows"],
+        kinds=meta["kinds"],
+        dictionaries=meta["dictionaries"],
+    )
+    for col, kind in snap.kinds.items():
+        name = f"{col}.codes.npy" if kind == "text" else f"{col}.npy"
+        snap.arrays[col] = np.load(path / name, mmap_mode="r")
+        if kind in ("integer", "real"):
+            snap.nulls[col] = np.load(path / f"{col}.null.npy", mmap_mode="r")
+            if col in snap.dictionaries:
+                snap.texts[col] = np.load(path / f"{col}.text.npy", mmap_mode="r")
+    return snap
+
+
+def get_snapshot(table: str, build: bool = True) -> Optional[Snapshot]:
+    """
+    Return an up-to-date snapshot of a table.
+
+    A missing or stale snapshot is (re)built when build=True, otherwise None.
+    The build runs under the table's own lock, so queries of other tables
+    (and cache hits) do not wait for it.
+    """
+    version = _db_version_json()
+    snap = _snapshots.get(table)
+    if snap is not None and snap.db_version == version:
+        return snap
+
+    with _lock:
+        table_lock = _table_locks.setdefault(table, threading.Lock())
+
+    with table_lock:
+        # Another thread may have opened or built it meanwhile
+        snap = _snapshots.get(table)
+        if snap is not None and snap.db_version == version:
+            return snap
+
+        snap = _open_snapshot(table)
+        if snap is None and build:
+            build_snapshot(table)
+            snap = _open_snapshot(table)
+
+        with _lock:
+            if snap is None:
+                _snapshots.pop(table, None)
+            else:
+                _snapshots[table] = snap
+        return snap
+
+
+def clear_snapshot_cache() -> None:
+    """Forget opened snapshots (files stay on disk)."""
+    with _lock:
+        _snapshots.clear()
+
+
+# =============================================================================
+# Query
+# =============================================================================
+
+def _numeric_values(snap: Snapshot, column: str, rows: slice = slice(None)) -> np.ndarray:
+    """Column as float64 (NaN for NULL and non-numeric text), e.g. for pod_mva stored as TEXT."""
+    arr = snap.arrays[column][rows]
+    if snap.kinds[column] == "text":
+        lookup = pd.to_numeric(pd.Series(snap.dictionaries[column] + [None], dtype=object), errors="coerce")
+        return lookup.to_numpy(dtype=np.float64)[arr]
+    values = np.asarray(arr, dtype=np.float64)
+    invalid = np.asarray(snap.nulls[column][rows])
+    if column in snap.texts:
+        invalid = invalid | (np.asarray(snap.texts[column][rows]) >= 0)
+    if invalid.any():
+        values = values.copy()
+        values[invalid] = np.nan
+    return values
+
+
+def _isin_mask(snap: Snapshot, column: str, values, rows: slice = slice(None)) -> np.ndarray:
+    """Row mask for "column IN values" on a mapped column."""
+    if snap.kinds[column] == "text":
+        return np.isin(snap.arrays[column][rows], snap.codes_for(column, values))
+    if not isinstance(values, (list, tuple, set)):
+        values = [values]
+    return np.isin(_numeric_values(snap, column, rows), pd.to_numeric(pd.Series(list(values)), errors="coerce").to_numpy())
+
+
+def _numeric_column(snap: Snapshot, column: str, idx: np.ndarray) -> np.ndarray:
+    """Selected rows of a numeric column with the dtype the SQL query would return."""
+    values = np.asarray(snap.arrays[column][idx])
+    null = np.asarray(snap.nulls[column][idx])
+    if column in snap.texts:
+        codes = np.asarray(snap.texts[column][idx])
+        is_text = codes >= 0
+        if is_text.any():
+            # Mixed numbers and text -> object column, as from SQLite
+            out = values.astype(object)
+            out[null] = None
+            out[is_text] = np.asarray(snap.dictionaries[column], dtype=object)[codes[is_text]]
+            return out
+    if snap.kinds[column] == "integer" and not null.any():
+        return values
+    out = values.astype(np.float64)
+    out[null] = np.nan
+    return out
+
+
+def _build_mask(
+    snap: Snapshot,
+    filters: Optional[Dict[str, Any]],
+    rows: slice = slice(None),
+) -> Optional[np.ndarray]:
+    """Combine table prefilter and user filters into one boolean mask over rows."""
+    mask = None
+
+    def _and(m):
+        nonlocal mask
+        mask = m if mask is None else (mask & m)
+
+    prefilter = get_table_prefilter(snap.table)
+    if prefilter is not None:
+        for column, values in (
+            ("nuklid", prefilter.nuklidy),
+            ("odber_misto", prefilter.lokality),
+            ("dodavatel_dat", prefilter.dodavatele),
+        ):
+            if values and column in snap.arrays:
+                _and(_isin_mask(snap, column, values, rows))
+        if prefilter.exclude_mva and "pod_mva" in snap.arrays:
+            _and(_numeric_values(snap, "pod_mva", rows) != 1)
+        if "datum" in snap.arrays:
+            datum_ms = snap.arrays["datum"][rows].view(np.int64)
+            if prefilter.min_date:
+                _and(datum_ms >= iso_date_to_unix_ms(prefilter.min_date))
+            if prefilter.max_date:
+                _and(datum_ms <= iso_date_to_unix_ms(prefilter.max_date, end_of_day=True))
+
+    for column, value in (filters or {}).items():
+        if value is None or column not in snap.arrays:
+            continue
+        if isinstance(value, (list, tuple, set)) and not value:
+            continue
+        _and(_isin_mask(snap, column, value, rows))
+
+    return mask
+
+
+def _window_rows(snap: Snapshot, date_range_ms: Optional[Tuple[Optional[int], Optional[int]]]) -> slice:
+    """
+    Contiguous row range inside a time window.
+
+    Rows are stored sorted by date (NaT first), so the window is found by
+    binary search and the columns are sliced without copying.
+    """
+    if not date_range_ms or "datum" not in snap.arrays:
+        return slice(None)
+    datum_ms = snap.arrays["datum"].view(np.int64)
+    start, end = date_range_ms
+    nat = np.iinfo(np.int64).min
+    lo = int(np.searchsorted(datum_ms, nat, side="right"))
+    hi = len(datum_ms)
+    if start is not None:
+        lo = max(lo, int(np.searchsorted(datum_ms, start, side="left")))
+    if end is not None:
+        hi = int(np.searchsorted(datum_ms, end, side="right"))
+    return slice(lo, max(lo, hi))
+
+
+def query_plot_data(
+    table: str,
+    filters: Optional[Dict[str, Any]] = None,
+    max_points: Optional[int] = None,
+    date_range_ms: Optional[Tuple[Optional[int], Optional[int]]] = None,
+) -> Optional[pd.DataFrame]:
+    """
+    Same result as the SQL path of db.get_plot_data, served from the snapshot.
+
+    Returns None if no snapshot is available (caller falls back to SQL).
+    """
+    snap = get_snapshot(table)
+    if snap is None:
+        return None
+
+    rows = _window_rows(snap, date_range_ms)
+    start, stop, _ = rows.indices(snap.n_rows)
+    mask = _build_mask(snap, filters, rows)
+    if mask is None:
+        idx = np.arange(start, stop)
+    else:
+        idx = start + np.flatnonzero(mask)
+    if max_points and len(idx) > max_points:
+        # Rows are sorted by date - keep the newest ones
+        idx = idx[-int(max_points):]
+
+    data = {}
+    for column, kind in snap.kinds.items():
+        arr = snap.arrays[column]
+        if kind == "text":
+            codes = np.asarray(arr[idx])
+            values = np.asarray(snap.dictionaries[column] + [None], dtype=object)
+            data[column] = values[codes]  # code -1 maps to the trailing None
+        elif kind == "datetime":
+            data[column] = np.asarray(arr[idx]).astype("datetime64[ns]")
+        elif kind in ("integer", "real"):
+            data[column] = _numeric_column(snap, column, idx)
+        else:
+            data[column] = np.asarray(arr[idx])
+
+    df = pd.DataFrame(data)
+    if "_rowid" in df.columns:
+        df["row_key"] = table + ":" + df.pop("_rowid").astype(str)
+    # Same conversion as the SQL path
+    if "pod_mva" in df.columns:
+        df["pod_mva"] = pd.to_numeric(df["pod_mva"], errors="coerce")
+    return df
+
+
+if __name__ == "__main__":
+    build_all_snapshots()
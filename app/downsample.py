@@ -0,0 +1,110 @@
+"""
+Level-of-detail downsampling for scatter traces.
+
+Points are grouped into time buckets (roughly one bucket per horizontal pixel)
+and only the minimum and maximum value of each bucket are drawn, which keeps
+the visual envelope of the series. Points flagged in a keep mask (outliers,
+MVA, selected rows) are always kept.
+
+When the user zooms in, buckets inside the visible x range are made fine-grained
+while points outside it stay coarse, so the detail follows the viewport.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def _to_ms(x) -> np.ndarray:
+    """Datetime-like values as float milliseconds (NaN for missing)."""
+    values = pd.to_datetime(pd.Series(x)).to_numpy(dtype="datetime64[ms]")
+    ms = values.view(np.int64).astype(np.float64)
+    ms[np.isnat(values)] = np.nan
+    return ms
+
+
+def _bucket_ids(x: np.ndarray, n_buckets: int, lo: float, hi: float) -> np.ndarray:
+    """Equal-width bucket index of each x in [lo, hi]."""
+    width = (hi - lo) / n_buckets if hi > lo else 1.0
+    ids = np.floor((x - lo) / width)
+    return np.clip(ids, 0, n_buckets - 1).astype(np.int64)
+
+
+def minmax_indices(
+    x,
+    y,
+    n_buckets: int,
+    x_range: Optional[Tuple[float, float]] = None,
+    keep: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Indices of points to draw (sorted).
+
+    Args:
+        x: Datetime values (x axis).
+        y: Measured values (y axis).
+        n_buckets: Number of buckets across the visible range.
+        x_range: Visible (start, end) in unix ms; None = whole series.
+        keep: Boolean mask of points that must always be drawn.
+
+    Returns:
+        Array of positional indices into x/y.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n_buckets <= 0 or n <= 2 * n_buckets:
+        return np.arange(n)
+
+    x_ms = _to_ms(x)
+    valid = ~np.isnan(x_ms) & ~np.isnan(y)
+    idx = np.flatnonzero(valid)
+    if len(idx) == 0:
+        return np.flatnonzero(keep) if keep is not None else idx
+
+    xv = x_ms[idx]
+    lo, hi = float(xv.min()), float(xv.max())
+    buckets = _bucket_ids(xv, n_buckets, lo, hi)
+
+    if x_range is not None and x_range[1] > x_range[0]:
+        # Fine buckets inside the viewport, coarse buckets outside of it
+        in_view = (xv >= x_range[0]) & (xv <= x_range[1])
+        fine = n_buckets + _bucket_ids(xv, n_buckets, x_range[0], x_range[1])
+        buckets = np.where(in_view, fine, buckets)
+
+    # Sort by bucket, then value - first/last row of each bucket is min/max
+    order = np.lexsort((y[idx], buckets))
+    sorted_buckets = buckets[order]
+    starts = np.flatnonzero(np.r_[True, sorted_buckets[1:] != sorted_buckets[:-1]])
+    ends = np.r_[starts[1:] - 1, len(order) - 1]
+
+    chosen = [idx[order[starts]], idx[order[ends]]]
+    if keep is not None:
+        chosen.append(np.flatnonzero(np.asarray(keep, dtype=bool)))
+    return np.unique(np.concatenate(chosen))
+
+
+def parse_x_range(relayout: Optional[dict]) -> Optional[Tuple[float, float]]:
+    """
+    Visible x range (unix ms) from Plotly relayoutData.
+
+    Returns None for autorange/reset, and raises KeyError when the event does
+    not touch the x axis (e.g. y-only zoom or a selection box).
+    """
+    if not relayout:
+        raise KeyError("xaxis")
+    if relayout.get("xaxis.autorange") or relayout.get("autosize"):
+        return None
+    if "xaxis.range[0]" in relayout and "xaxis.range[1]" in relayout:
+        start, end = relayout["xaxis.range[0]"], relayout["xaxis.range[1]"]
+    elif "xaxis.range" in relayout:
+        start, end = relayout["xaxis.range"][:2]
+    else:
+        raise KeyError("xaxis")
+    try:
+        # Plotly sends "2020-01-01" or "2020-01-01 10:00:00.5"
+        bounds = [pd.Timestamp(v) for v in (start, end)]
+    except (TypeError, ValueError):
+        return None
+    if any(pd.isna(b) for b in bounds):
+        return None
+    return tuple(float(b.value // 1_000_000) for b in bounds)
@@ -0,0 +1,381 @@
+"""
+Streamed export of viewer data (XLSX, CSV, Parquet).
+
+Exports the suspicious records basket, the rows of the main data table or a
+whole dataset. Rows are read from SQLite in chunks and written out as they
+arrive: CSV is encoded chunk by chunk, XLSX goes through xlsxwriter's
+constant_memory mode and Parquet (needs pyarrow, pip install .[report]) is
+written one row group per chunk. XLSX and Parquet files are built in a
+temporary file and sent in blocks, so neither the table nor the finished
+file is held in memory.
+
+Downloads are served by the Flask route <prefix>export/<fmt>
+(register_export_routes); export_url builds the links used by the UI.
+"""
+import importlib.util
+import json
+import os
+import tempfile
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import urlencode
+
+import pandas as pd
+
+from .config import config
+from .data import basket, db, grid
+
+
+EXPORT_FORMATS = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Rows read from SQLite per chunk (one Parquet row group)
+CHUNK_ROWS = 50000
+
+# Bytes per block of a streamed temporary file
+FILE_BLOCK = 1 << 20
+
+# Rows per Excel sheet (including the header); longer exports continue on a new sheet
+EXCEL_MAX_ROWS = 1_048_576
+
+# Columns of the main data table (as in the grid, without row_key)
+TABLE_COLUMNS = [
+    "datum", "hodnota", "nejistota", "pod_mva",
+    "nuklid", "jednotka", "odber_misto", "dodavatel_dat", "id_zppr_vzorek",
+]
+
+# Column headers of the basket export
+BASKET_COLUMN_NAMES = {
+    "dataset": "Dataset",
+    "nuklid": "Nuklid",
+    "datum": "Datum",
+    "hodnota": "Hodnota",
+    "nejistota": "Nejistota",
+    "jednotka": "Jednotka",
+    "odber_misto": "Odběrové místo",
+    "dodavatel_dat": "Dodavatel",
+    "id_zppr_vzorek": "ID Vzorek",
+    "pod_mva": "Pod MVA",
+    "added_at": "Přidáno",
+}
+
+
+@dataclass
+class ExportView:
+    """Rows to export (chunks) with the file and sheet name."""
+    name: str
+    sheet: str
+    chunks: Iterator[pd.DataFrame]
+    header_color: str = "#D9D9D9"
+
+
+def _timestamp() -> str:
+    return datetime.now().strftime("%Y-%m-%d_%H%M%S")
+
+
+def basket_view(session: str) -> ExportView:
+    """The suspicious records basket of a session."""
+    chunks = (
+        chunk.rename(columns=BASKET_COLUMN_NAMES)
+        for chunk in basket.iter_record_chunks(session, CHUNK_ROWS)
+    )
+    return ExportView(
+        name=f"podezrele_zaznamy_{_timestamp()}",
+        sheet="Podezřelé záznamy",
+        chunks=chunks,
+        header_color="#FFC107",
+    )
+
+
+def table_view(
+    dataset: str,
+    filters: Optional[Dict[str, Any]] = None,
+    date_range=None,
+    hide_mva: bool = False,
+    row_keys: Optional[List[str]] = None,
+    filter_model: Optional[Dict[str, Any]] = None,
+    sort_model: Optional[List[Dict[str, Any]]] = None,
+) -> ExportView:
+    """
+    Rows of the main data table.
+
+    The same frame the table pages over (db.get_plot_data with the slider
+    window and database.max_points, usually served from the plot cache),
+    with MVA rows hidden, restricted to the plot selection and filtered and
+    sorted by the grid's filter / sort model like the table.
+    """
+    df = db.get_plot_data(dataset, filters, max_points=config.database.max_points, date_range=date_range)
+    if hide_mva and "pod_mva" in df.columns:
+        df = df[df["pod_mva"] != 1]
+    if row_keys is not None:
+        df = df[df["row_key"].isin(set(row_keys))]
+    df = grid.apply_sort_model(grid.apply_filter_model(df, filter_model), sort_model)
+    df = df[[c for c in TABLE_COLUMNS if c in df.columns]].reset_index(drop=True)
+
+    chunks = (df.iloc[start:start + CHUNK_ROWS] for start in range(0, max(len(df), 1), CHUNK_ROWS))
+    suffix = "_vyber" if row_keys is not None else "_tabulka"
+    return ExportView(name=f"{dataset}{suffix}_{_timestamp()}", sheet=dataset[:31], chunks=chunks)
+
+
+def dataset_view(dataset: str) -> ExportView:
+    """All columns and rows of a dataset (prefilter applied)."""
+    chunks = db.iter_table_chunks(dataset, chunk_rows=CHUNK_ROWS)
+    return ExportView(name=f"{dataset}_{_timestamp()}", sheet=dataset[:31], chunks=chunks)
+
+
+# =============================================================================
+# Writers
+# =============================================================================
+
+def stream_csv(view: ExportView) -> Iterator[bytes]:
+    """CSV (UTF-8 with BOM, so Excel reads the diacritics) encoded chunk by chunk."""
+    first = True
+    for chunk in view.chunks:
+        text = chunk.to_csv(index=False, header=first, date_format="%Y-%m-%d %H:%M:%S")
+        yield (("\ufeff" if first else "") + text).encode("utf-8")
+        first = False
+
+
+def _column_widths(chunk: pd.DataFrame, sample_rows: int = 1000) -> list:
+    """Column widths from the header and the first rows (not the whole export)."""
+    sample = chunk.head(sample_rows)
+    widths = []
+    for col in sample.columns:
+        values = sample[col].dropna().astype(str)
+        longest = int(values.str.len().max()) if len(values) else 0
+        widths.append(min(max(longest, len(str(col))) + 2, 50))
+    return widths
+
+
+def write_xlsx(view: ExportView, path: str) -> int:
+    """Write the view with xlsxwriter in constant_memory mode; returns the number of rows."""
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(path, {
+        "constant_memory": True,
+        "default_date_format": "yyyy-mm-dd hh:mm",
+        "nan_inf_to_errors": True,
+    })
+    header_format = workbook.add_format({"bold": True, "bg_color": view.header_color, "border": 1})
+
+    sheets = 0
+    sheet = None
+    columns: list = []
+    widths: list = []
+    row = 0
+    total = 0
+
+    def new_sheet():
+        nonlocal sheets, row
+        sheets += 1
+        name = view.sheet if sheets == 1 else f"{view.sheet[:26]} ({sheets})"
+        ws = workbook.add_worksheet(name)
+        ws.write_row(0, 0, columns, header_format)
+        for i, width in enumerate(widths):
+            ws.set_column(i, i, width)
+        ws.freeze_panes(1, 0)
+        row = 1
+        return ws
+
+    try:
+        for chunk in view.chunks:
+            if sheet is None:
+                columns = [str(c) for c in chunk.columns]
+                widths = _column_widths(chunk)
+                sheet = new_sheet()
+            # NaN / NaT -> empty cell
+            values = chunk.astype(object).where(chunk.notna(), None)
+            for record in values.itertuples(index=False, name=None):
+                if row >= EXCEL_MAX_ROWS:
+                    sheet = new_sheet()
+                sheet.write_row(row, 0, record)
+                row += 1
+            total += len(chunk)
+        if sheet is None:
+            sheet = new_sheet()
+    finally:
+        workbook.close()
+    return total
+
+
+def _parquet_kinds(chunk: pd.DataFrame) -> Dict[str, str]:
+    """Column kinds fixed by the first chunk, so all row groups share one schema."""
+    kinds = {}
+    for col in chunk.columns:
+        if pd.api.types.is_datetime64_any_dtype(chunk[col]):
+            kinds[col] = "date"
+        elif pd.api.types.is_numeric_dtype(chunk[col]) and not pd.api.types.is_bool_dtype(chunk[col]):
+            kinds[col] = "number"
+        else:
+            kinds[col] = "text"
+    return kinds
+
+
+def _parquet_frame(chunk: pd.DataFrame, kinds: Dict[str, str]) -> pd.DataFrame:
+    out = {}
+    for col, kind in kinds.items():
+        series = chunk[col]
+        if kind == "date":
+            out[col] = pd.to_datetime(series, errors="coerce").astype("datetime64[ms]")
+        elif kind == "number":
+            out[col] = pd.to_numeric(series, errors="coerce").astype("float64")
+        else:
+            out[col] = series.astype(str).where(series.notna(), None)
+    return pd.DataFrame(out, index=chunk.index)
+
+
+def write_parquet(view: ExportView, path: str) -> int:
+    """Write the view as Parquet, one row group per chunk; returns the number of rows."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    kinds = None
+    total = 0
+    try:
+        for chunk in view.chunks:
+            if kinds is None:
+                kinds = _parquet_kinds(chunk)
+            frame = _parquet_frame(chunk, kinds)
+            if writer is None:
+                schema = pa.Schema.from_pandas(frame, preserve_index=False)
+                # Columns empty in the first chunk are still text
+                schema = pa.schema([
+                    pa.field(f.name, pa.string()) if pa.types.is_null(f.type) else f for f in schema
+                ])
+                writer = pq.ParquetWriter(path, schema)
+            writer.write_table(pa.Table.from_pandas(frame, schema=writer.schema, preserve_index=False))
+            total += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return total
+
+
+def _stream_file(path: str) -> Iterator[bytes]:
+    """Send a temporary file in blocks and delete it afterwards."""
+    try:
+        with open(path, "rb") as f:
+            while True:
+                block = f.read(FILE_BLOCK)
+                if not block:
+                    break
+                yield block
+    finally:
+        os.unlink(path)
+
+
+def stream_export(view: ExportView, fmt: str) -> Iterator[bytes]:
+    """Bytes of the exported file in the given format."""
+    if fmt == "csv":
+        yield from stream_csv(view)
+        return
+
+    fd, path = tempfile.mkstemp(prefix="mrs_export_", suffix=f".{fmt}")
+    os.close(fd)
+    try:
+        if fmt == "xlsx":
+            write_xlsx(view, path)
+        else:
+            write_parquet(view, path)
+    except BaseException:
+        os.unlink(path)
+        raise
+    yield from _stream_file(path)
+
+
+# =============================================================================
+# Flask route
+# =============================================================================
+
+def parquet_available() -> bool:
+    """True if pyarrow is installed (pip install .[report])."""
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def export_url(base: str, fmt: str, **params) -> str:
+    """Download link of an export; list values become repeated query parameters."""
+    params = {k: v for k, v in params.items() if v not in (None, "", [])}
+    return f"{base}export/{fmt}?{urlencode(params, doseq=True)}"
+
+
+def view_from_args(args) -> Optional[ExportView]:
+    """
+    Export view from the query parameters of a download request.
+
+    view=basket&session=...                  suspicious records basket
+    view=dataset&dataset=...                 whole dataset
+    view=table&dataset=...&nuklid=...        rows of the main data table; optional
+        repeated odber_misto / dodavatel_dat, start / end (ISO dates, slider
+        window), mva=0, session + sel (digest of the saved plot selection)
+        and grid (JSON with the grid's filterModel / sortModel)
+
+    Returns None for an unknown view or dataset, or a selection that is no
+    longer current.
+    """
+    from .data.cache import get_cached_tables
+
+    kind = args.get("view")
+    if kind == "basket":
+        session = args.get("session")
+        return basket_view(session) if session else None
+
+    dataset = args.get("dataset")
+    if kind not in ("dataset", "table") or dataset not in get_cached_tables():
+        return None
+    if kind == "dataset":
+        return dataset_view(dataset)
+
+    filters = {}
+    if args.get("nuklid"):
+        filters["nuklid"] = args.get("nuklid")
+    for column in ("odber_misto", "dodavatel_dat"):
+        values = args.getlist(column)
+        if values:
+            filters[column] = values
+    date_range = None
+    if args.get("start") or args.get("end"):
+        date_range = (args.get("start") or None, args.get("end") or None)
+    row_keys = None
+    if args.get("sel"):
+        row_keys = basket.load_selection(args.get("session") or "", args.get("sel"))
+        if row_keys is None:
+            return None
+    try:
+        models = json.loads(args.get("grid") or "{}")
+    except ValueError:
+        return None
+    if not isinstance(models, dict):
+        return None
+    return table_view(
+        dataset, filters, date_range,
+        hide_mva=args.get("mva") == "0",
+        row_keys=row_keys,
+        filter_model=models.get("filterModel"),
+        sort_model=models.get("sortModel"),
+    )
+
+
+def register_export_routes(server, prefix: str = "/") -> None:
+    """Register the streamed download route on the Flask server."""
+    from flask import Response, abort, request, stream_with_context
+
+    @server.route(f"{prefix}export/<fmt>")
+    def export_download(fmt):
+        if fmt not in EXPORT_FORMATS:
+            abort(404)
+        if fmt == "parquet" and not parquet_available():
+            abort(501, "Parquet export needs pyarrow (pip install .[report])")
+        view = view_from_args(request.args)
+        if view is None:
+            abort(404)
+        # No Content-Length - the file is sent chunked while it is written
+        return Response(
+            stream_with_context(stream_export(view, fmt)),
+            content_type=EXPORT_FORMATS[fmt],
+            headers={"Content-Disposition": f'attachment; filename="{view.name}.{fmt}"'},
+        )
@@ -20,6 +20,8 @@ AGGRID_TABLE = "aggrid-table"
 # Info display
 INFO_TEXT = "info-text"
 TABLE_STATS = "table-stats"  # Aggregated statistics for data table
+STORE_TABLE_VERSION = "store-table-version"  # Bumped when table content changes (grid refresh)
+STORE_TABLE_MODELS = "store-table-models"    # Filter and sort model of the data table (for export)
 
 # Data stores
 STORE_DATA = "store-data"
@@ -38,6 +40,8 @@ BTN_ZOOM_2TI = "btn-zoom-2ti"      # 0 - 2*TI99
 BTN_ZOOM_1TI = "btn-zoom-1ti"      # 0 - 1.05*TI99
 BTN_ZOOM_FULL = "btn-zoom-full"    # Full range
 STORE_Y_ZOOM = "store-y-zoom"      # Stores current zoom mode
+STORE_LOD_RANGE = "store-lod-range"  # Visible x range for scatter downsampling
+STORE_SCATTER_STATE = "store-scatter-state"  # Trace layout of the rendered scatter (for Patch updates)
 
 # MVA toggle
 BTN_SHOW_MVA = "btn-show-mva"       # Toggle MVA visibility
@@ -59,6 +63,7 @@ SLIDER_HISTOGRAM_BINS = "slider-histogram-bins"  # Number of bins in histogram
 
 # Dummy elements for clientside callbacks
 DUMMY_DATE_RANGE_SYNC = "dummy-date-range-sync"  # For syncing date range to JS
+DUMMY_TABLE_REFRESH = "dummy-table-refresh"      # For refreshing the data table grid
 
 # Routing
 URL_LOCATION = "url-location"  # URL location for routing
@@ -75,13 +80,22 @@ STORE_CONFIG_LOADED = "store-config-loaded"
 AGGRID_SUSPICIOUS = "aggrid-suspicious"           # AG Grid for suspicious records
 BTN_ADD_TO_SUSPICIOUS = "btn-add-to-suspicious"   # Add selected rows to basket
 BTN_CLEAR_SUSPICIOUS = "btn-clear-suspicious"     # Clear entire basket
-BTN_EXPORT_SUSPICIOUS = "btn-export-suspicious"   # Export to Excel
-STORE_SUSPICIOUS = "store-suspicious"             # Session store for records
-DOWNLOAD_SUSPICIOUS = "download-suspicious"       # Download component
+BTN_EXPORT_SUSPICIOUS = "btn-export-suspicious"   # Export to Excel (download link)
+STORE_SUSPICIOUS = "store-suspicious"             # Basket session id, count and version
+DUMMY_SUSPICIOUS_REFRESH = "dummy-suspicious-refresh" # Output of the basket grid refresh
 SUSPICIOUS_COUNT_BADGE = "suspicious-count-badge" # Badge showing count
 TOAST_CONTAINER = "toast-container"               # Container for toast notifications
 
+# Export of the main table (download links, app.export)
+MENU_EXPORT = "menu-export"                       # Export dropdown above the data table
+EXPORT_VIEW_XLSX = "export-view-xlsx"             # Current filter as Excel
+EXPORT_VIEW_CSV = "export-view-csv"               # Current filter as CSV
+EXPORT_DATASET_XLSX = "export-dataset-xlsx"       # Whole dataset as Excel
+EXPORT_DATASET_CSV = "export-dataset-csv"         # Whole dataset as CSV
+EXPORT_DATASET_PARQUET = "export-dataset-parquet" # Whole dataset as Parquet
+
 # Status log panel
 STATUS_LOG_CONTAINER = "status-log-container"     # Container for log entries
-STORE_STATUS_LOG = "store-status-log"             # Session store for log entries
+STORE_STATUS_LOG = "store-status-log"             # Log session id and version
+STORE_STATUS_PROGRESS = "store-status-progress"   # Progress message of a background job
 BTN_CLEAR_STATUS_LOG = "btn-clear-status-log"     # Clear log button
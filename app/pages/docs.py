@@ -22,7 +22,7 @@ DOCS_CONTENT = """
 - Identifikaci odlehlých hodnot (outlierů)
 - Filtrování dat podle nuklidu, lokality a dodavatele
 - Označování podezřelých záznamů do zásobníku
-- Export vybraných dat do Excelu
+- Export dat z tabulky nebo celého datasetu (Excel, CSV, Parquet)
 
 ### Hlavní případy užití
 
@@ -93,6 +93,7 @@ konzistence_monras/
 │   │   ├── side_charts.py    # Boxplot a histogram
 │   │   ├── reference.py      # Referenční období
 │   │   ├── suspicious.py     # Zásobník podezřelých záznamů
+│   │   ├── export.py         # Odkazy na stažení exportů
 │   │   └── status_log.py     # Log aktivit
 │   │
 │   ├── data/             # Datová vrstva
@@ -378,6 +379,7 @@ Zobrazuje rozložení hodnot podle odběrového místa nebo jiné kategorie.
 - **Výběr řádků:** Zaškrtávací boxy vlevo, synchronizováno s grafem
 - **Změna šířky:** Tažení okrajů sloupců
 - **Přidání do zásobníku:** Tlačítko "Přidat do zásobníku" v hlavičce
+- **Export:** Menu "Export" v hlavičce stáhne jako Excel/CSV přesně řádky z tabulky: filtr (nuklid, místa, dodavatelé), rozsah dat, skrytí MVA, výběr v grafu, filtry a řazení sloupců tabulky a limit `max_points` nejnovějších bodů. Celý dataset (všechny sloupce a řádky) stáhne jako Excel/CSV/Parquet. Soubor se na serveru zapisuje po částech a stahuje průběžně, bez omezení počtu řádků (Excel pokračuje na dalším listu po 1 048 575 řádcích). Parquet vyžaduje balík pyarrow (`pip install .[report]`).
 
 ### 7. Zásobník podezřelých záznamů
 
@@ -419,14 +421,14 @@ Zásobník slouží k označování a shromažďování podezřelých hodnot bě
 ```
 
 #### Vlastnosti zásobníku:
-- **Persistentní:** Záznamy zůstávají i při přechodu na jinou stránku
+- **Persistentní:** Záznamy jsou uložené na serveru (`<databáze>.basket.sqlite`) a zůstávají i po obnovení stránky a restartu aplikace
 - **Unikátní:** Duplicitní záznamy se automaticky přeskočí
 - **Multi-dataset:** Lze sbírat záznamy z různých tabulek
-- **Limit:** Doporučený limit 1000 záznamů (varování při překročení)
+- **Bez limitu:** Tabulka zásobníku se stránkuje na serveru, i tisíce záznamů se přenáší jen po stránkách
 
 #### Formát Excel exportu:
 - Formátovaná hlavička (žlutá)
-- Automaticky upravené šířky sloupců
+- Šířky sloupců podle hlavičky a prvních řádků
 - Zamrzlý řádek s hlavičkou
 - Název souboru: `podezrele_zaznamy_YYYY-MM-DD_HHMMSS.xlsx`
 
@@ -442,7 +444,6 @@ Panel logu zobrazuje historii akcí prováděných v aplikaci. Slouží k rychl
 |-------|-------|-----|---------|
 | ℹ️ | Modrá | Info | Filtr nuklid: Cs-137 |
 | ✓ | Zelená | Úspěch | Dataset změněn: mleko_surove |
-| ⚠️ | Žlutá | Varování | Zásobník: více než 1000 záznamů |
 | ✗ | Červená | Chyba | Chyba načítání dat |
 
 #### Zaznamenávané akce:
@@ -450,13 +451,13 @@ Panel logu zobrazuje historii akcí prováděných v aplikaci. Slouží k rychl
 - Změna filtrů (nuklid, odběrové místo, dodavatel)
 - Přidání záznamů do zásobníku
 - Odebrání záznamů ze zásobníku
-- Export zásobníku do Excelu
 
 #### Funkce logu:
 - **Automatický scroll:** Nejnovější záznamy nahoře
 - **Časové razítko:** Každý záznam obsahuje čas
 - **Vymazání:** Tlačítko "Vymazat" smaže celý log
 - **Limit:** Maximum 100 záznamů (starší se automaticky odstraňují)
+- **Uložení:** Záznamy drží server v `<databáze>.log.sqlite` (posledních 100 pro každou otevřenou stránku, sdílené všemi procesy serveru), prohlížeč zná jen číslo verze logu; po obnovení stránky začíná log znovu
 
 ---
 ---
@@ -474,6 +475,7 @@ server:
   port: 8050
   host: "127.0.0.1"
   debug: true
+  background_callbacks: true         # Grafy na pozadí, nový požadavek ukončí rozpracovaný (pip install .[background])
 
 database:
   path: "../monras_import.sqlite"   # Relativní cesta k DB
@@ -503,6 +505,10 @@ scatter:
   ti90_color: "blue"
   ti95_color: "orange"
   ti99_color: "red"
+  lod_enabled: true                  # Řídké vykreslení hustých dat (min/max na časový úsek)
+  lod_buckets: 1000                  # Počet časových úseků přes viditelný rozsah
+  render_mode: "auto"                # svg / webgl / auto (WebGL nad prahem)
+  webgl_threshold: 10000             # Počet vykreslených bodů pro přepnutí na WebGL
 
 # Histogram settings
 histogram:
@@ -516,7 +522,7 @@ table:
   page_size: 50
   min_column_width: 100
 
-# Hidden tables (won't appear in dropdown)
+# Hidden tables (won't appear in dropdown; tables written by sql_import never do)
 hidden_tables:
   - "_import_log"
   - "sqlite_sequence"
@@ -678,7 +684,6 @@ Tip: Sledujte Log aktivit (vpravo dole) - uvidíte:
 14:35:42 ✓ Zásobník: přidáno 3 záznamů
 14:36:01 ✓ Dataset změněn: maso
 14:38:15 ✓ Zásobník: přidáno 2 záznamů
-14:40:00 ✓ Export: 5 záznamů → podezrele_zaznamy_2024-03-15_144000.xlsx
 ```
 
 ### Příklad analýzy: Podezřelá hodnota Cs-137 v mléce
@@ -771,8 +776,10 @@ mean = np.mean(log_values)
 std = np.std(log_values, ddof=1)
 
 # k-faktory pro jednostranný TI (95% coverage, 95% confidence)
-# závisí na počtu vzorků
-k = tolerance_factor(n=len(values), coverage=0.95, confidence=0.95)
+# závisí na počtu vzorků; přesný výpočet z necentrálního t-rozdělení
+# (shodný s R normtol.int), viz app/stats.py ToleranceEngine
+n = len(log_values)
+k = nct.ppf(0.95, df=n - 1, nc=norm.ppf(0.95) * np.sqrt(n)) / np.sqrt(n)
 
 # Horní mez
 upper_limit = np.exp(mean + k * std)
@@ -786,27 +793,31 @@ DROPDOWN_DATASET
       ├──► DROPDOWN_NUKLID (options)
       ├──► DROPDOWN_OM (options)
       ├──► DROPDOWN_DODAVATEL (options)
-      ├──► STORE_STATUS_LOG (log: dataset změněn)
+      ├──► STORE_STATUS_LOG (verze logu: dataset změněn)
       │
       └──► [všechny filtry] ──► SCATTER_PLOT
                               ├──► BOXPLOT
                               ├──► HISTOGRAM
-                              └──► AGGRID_TABLE
+                              └──► AGGRID_TABLE (stránky řádků ze serveru)
 
-SCATTER_PLOT (selectedData)
+SCATTER_PLOT (selectedData) ──► STORE_SELECTION
       │
+      ├──► SCATTER_PLOT (Patch: jen zvýraznění výběru)
       ├──► BOXPLOT (zvýraznění)
       ├──► HISTOGRAM (překryv)
       └──► AGGRID_TABLE (výběr řádků)
 
+BTN_SHOW_MVA ──► SCATTER_PLOT (Patch: viditelnost MVA stop)
+BTN_ZOOM_*   ──► SCATTER_PLOT (Patch: rozsah osy Y)
+
 AGGRID_TABLE (selectedRows)
       │
-      └──► BTN_ADD_TO_SUSPICIOUS ──► STORE_SUSPICIOUS
+      └──► BTN_ADD_TO_SUSPICIOUS ──► basket (SQLite) ──► STORE_SUSPICIOUS (počet, verze)
                                         │
-                                        ├──► AGGRID_SUSPICIOUS (rowData)
+                                        ├──► AGGRID_SUSPICIOUS (getRowsResponse)
                                         ├──► SUSPICIOUS_COUNT_BADGE
-                                        ├──► STORE_STATUS_LOG (log)
-                                        └──► BTN_EXPORT_SUSPICIOUS ──► DOWNLOAD_SUSPICIOUS
+                                        ├──► STORE_STATUS_LOG (verze logu)
+                                        └──► BTN_EXPORT_SUSPICIOUS (href) ──► /export/xlsx
 ```
 
 ### Cachování
@@ -7,6 +7,8 @@ from dash import dcc, html
 
 from .. import ids
 from ..config import config
+from ..data import log_store
+from ..data.basket import new_session_id
 
 
 def create_sidebar() -> dbc.Card:
@@ -162,13 +164,16 @@ def create_scatter_plot() -> dcc.Graph:
 
 
 def create_data_table() -> dag.AgGrid:
-    """Create the AG Grid table component with row selection."""
+    """Create the AG Grid table component with row selection.
+    
+    Uses the infinite row model: sorting, filtering and paging run on the
+    server (get_table_rows) and only the visible page is sent.
+    """
     column_defs = [
         {
             "field": "checkbox",
             "headerName": "",
             "checkboxSelection": True,
-            "headerCheckboxSelection": True,
             "width": 50,
             "maxWidth": 50,
             "sortable": False,
@@ -190,7 +195,7 @@ def create_data_table() -> dag.AgGrid:
     return dag.AgGrid(
         id=ids.AGGRID_TABLE,
         columnDefs=column_defs,
-        rowData=[],
+        rowModelType="infinite",
         defaultColDef={
             "resizable": True,
             "minWidth": config.table.min_column_width,
@@ -198,6 +203,8 @@ def create_data_table() -> dag.AgGrid:
         dashGridOptions={
             "pagination": True,
             "paginationPageSize": config.table.page_size,
+            "cacheBlockSize": config.table.page_size,
+            "maxBlocksInCache": 10,
             "rowSelection": "multiple",
             "suppressRowClickSelection": True,
         },
@@ -207,14 +214,45 @@ def create_data_table() -> dag.AgGrid:
     )
 
 
+def create_export_menu() -> dbc.DropdownMenu:
+    """Create the export menu of the data table.
+    
+    Items are download links (app.export) - the file is streamed by the
+    server, hrefs are set by update_export_links.
+    """
+    def item(label, item_id):
+        return dbc.DropdownMenuItem(label, id=item_id, href="", external_link=True)
+    
+    return dbc.DropdownMenu(
+        [
+            dbc.DropdownMenuItem("Data v tabulce", header=True),
+            item("Excel (.xlsx)", ids.EXPORT_VIEW_XLSX),
+            item("CSV", ids.EXPORT_VIEW_CSV),
+            dbc.DropdownMenuItem(divider=True),
+            dbc.DropdownMenuItem("Celý dataset", header=True),
+            item("Excel (.xlsx)", ids.EXPORT_DATASET_XLSX),
+            item("CSV", ids.EXPORT_DATASET_CSV),
+            item("Parquet", ids.EXPORT_DATASET_PARQUET),
+        ],
+        id=ids.MENU_EXPORT,
+        label=[html.I(className="bi bi-download me-1"), "Export"],
+        color="success",
+        size="sm",
+        align_end=True,
+    )
+
+
 def create_suspicious_table() -> dag.AgGrid:
-    """Create the AG Grid table for suspicious records basket."""
+    """Create the AG Grid table for suspicious records basket.
+    
+    The basket is stored on the server (app.data.basket); the grid pages
+    over it with the infinite row model (get_suspicious_rows).
+    """
     column_defs = [
         {
             "field": "checkbox",
             "headerName": "",
             "checkboxSelection": True,
-            "headerCheckboxSelection": True,
             "width": 50,
             "maxWidth": 50,
             "sortable": False,
@@ -236,13 +274,15 @@ def create_suspicious_table() -> dag.AgGrid:
     return dag.AgGrid(
         id=ids.AGGRID_SUSPICIOUS,
         columnDefs=column_defs,
-        rowData=[],
+        rowModelType="infinite",
         defaultColDef={
             "resizable": True,
         },
         dashGridOptions={
             "pagination": True,
             "paginationPageSize": 20,
+            "cacheBlockSize": 100,
+            "maxBlocksInCache": 10,
             "rowSelection": "multiple",
             "suppressRowClickSelection": True,
         },
@@ -263,6 +303,11 @@ def create_home_page() -> dbc.Container:
             # Dummy div for clientside callback (syncs date range to JS)
             html.Div(id=ids.DUMMY_DATE_RANGE_SYNC, style={"display": "none"}),
             
+            # Data table refresh (server-side row model)
+            dcc.Store(id=ids.STORE_TABLE_VERSION, data=0),
+            dcc.Store(id=ids.STORE_TABLE_MODELS, data=None),
+            html.Div(id=ids.DUMMY_TABLE_REFRESH, style={"display": "none"}),
+            
             # Main content
             dbc.Row(
                 [
@@ -312,6 +357,10 @@ def create_home_page() -> dbc.Container:
                                                 ),
                                                 # Store for Y zoom mode
                                                 dcc.Store(id=ids.STORE_Y_ZOOM, data="2ti"),
+                                                # Store for visible x range (scatter LOD)
+                                                dcc.Store(id=ids.STORE_LOD_RANGE, data=None),
+                                                # Trace layout of the rendered scatter (Patch updates)
+                                                dcc.Store(id=ids.STORE_SCATTER_STATE, data=None),
                                                 dbc.CardBody([
                                                     create_scatter_plot(),
                                                 ], className="p-2"),
@@ -384,6 +433,10 @@ def create_home_page() -> dbc.Container:
                                                             dbc.Col(
                                                                 html.Span(id=ids.TABLE_STATS, className="small"),
                                                             ),
+                                                            dbc.Col(
+                                                                create_export_menu(),
+                                                                width="auto",
+                                                            ),
                                                             dbc.Col(
                                                                 dbc.Button(
                                                                     [html.I(className="bi bi-plus-circle me-1"), "Přidat do zásobníku"],
@@ -459,6 +512,7 @@ def create_home_page() -> dbc.Container:
                                                                             color="success",
                                                                             size="sm",
                                                                             outline=True,
+                                                                            external_link=True,
                                                                         ),
                                                                         dbc.Button(
                                                                             [html.I(className="bi bi-trash me-1"), "Odebrat vybrané"],
@@ -531,14 +585,23 @@ def create_home_page() -> dbc.Container:
                 ],
             ),
             
-            # Session store for suspicious records (persists during navigation, clears on reload)
-            dcc.Store(id=ids.STORE_SUSPICIOUS, storage_type="memory", data={"records": []}),
-            
-            # Session store for status log (persists during navigation, clears on reload)
-            dcc.Store(id=ids.STORE_STATUS_LOG, storage_type="memory", data={"entries": []}),
+            # Basket session id, record count and version (records are kept on the server;
+            # local storage keeps the session across reloads)
+            dcc.Store(
+                id=ids.STORE_SUSPICIOUS,
+                storage_type="local",
+                data={"session": new_session_id(), "count": 0, "version": 0},
+            ),
+            html.Div(id=ids.DUMMY_SUSPICIOUS_REFRESH, style={"display": "none"}),
             
-            # Download component for Excel export
-            dcc.Download(id=ids.DOWNLOAD_SUSPICIOUS),
+            # Status log session id and version (entries are kept on the server)
+            dcc.Store(
+                id=ids.STORE_STATUS_LOG,
+                storage_type="memory",
+                data={"session": log_store.new_session(), "version": 0},
+            ),
+            # Progress of background chart jobs ({"message", "level"}), appended to the log
+            dcc.Store(id=ids.STORE_STATUS_PROGRESS, storage_type="memory"),
             
             # Toast container for notifications
             html.Div(id=ids.TOAST_CONTAINER),
@@ -0,0 +1,226 @@
+"""
+Batch tolerance-interval report over all datasets.
+
+Replaces the per-commodity R scripts (r_scripts/*.R): for every
+(table, nuklid, odber_misto, dodavatel_dat) group it computes n, TI90/95/99
+(log-normal, exact k factors as R's normtol.int), outlier counts, the latest
+value and exceedances in the current period, and a KS test comparing the
+reference and current period.
+
+Groups of one table are evaluated together with grouped (bincount) moments;
+tables are processed in parallel worker processes.
+
+Usage:
+    python -m app.report --out reports/ti_report
+    python -m app.report --tables aerosoly mleko_surove --ref-start 2012-01-01 --new-start 2023-01-01
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+from scipy import stats as sp_stats
+
+from .config import config, get_db_path
+from .data import db
+from .stats import TI_LEVELS, get_tolerance_engine
+
+
+GROUP_COLUMNS = ["nuklid", "odber_misto", "dodavatel_dat"]
+
+# Minimum number of reference values for a TI (same as the viewer)
+MIN_REFERENCE_VALUES = 10
+
+
+def _load_table(table: str) -> pd.DataFrame:
+    """All rows of a table needed for the report (prefilter applied)."""
+    df = db.load_columns(table, ["hodnota", "jednotka", "pod_mva"] + GROUP_COLUMNS)
+    if "datum" not in df.columns or "hodnota" not in df.columns:
+        return pd.DataFrame()
+
+    df["hodnota"] = pd.to_numeric(df["hodnota"], errors="coerce")
+    df["pod_mva"] = pd.to_numeric(df["pod_mva"], errors="coerce") if "pod_mva" in df.columns else np.nan
+    for col in GROUP_COLUMNS:
+        if col not in df.columns:
+            df[col] = None
+    return df
+
+
+def _ks_tests(values: np.ndarray, codes: np.ndarray, is_new: np.ndarray, n_groups: int):
+    """Two-sample KS statistic and p-value (reference vs. current) per group."""
+    d_stat = np.full(n_groups, np.nan)
+    p_value = np.full(n_groups, np.nan)
+
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(n_groups + 1))
+    for g in range(n_groups):
+        idx = order[bounds[g]:bounds[g + 1]]
+        old = values[idx][~is_new[idx]]
+        new = values[idx][is_new[idx]]
+        if len(old) >= 2 and len(new) >= 2:
+            result = sp_stats.ks_2samp(old, new)
+            d_stat[g], p_value[g] = result.statistic, result.pvalue
+    return d_stat, p_value
+
+
+def table_report(
+    table: str,
+    ref_start: Optional[str] = None,
+    new_start: Optional[str] = None,
+    alpha: float = 0.05,
+    db_path: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Report rows for all groups of one table.
+
+    Args:
+        table: Dataset table name
+        ref_start: Reference data start (exclusive, like the R scripts); None = all
+        new_start: Start of the current period (exclusive, like the R scripts);
+                   None = 1 January of the latest year
+        alpha: Significance level of the tolerance intervals
+        db_path: Database path (set in worker processes)
+    """
+    if db_path:
+        config.database.path = db_path
+
+    df = _load_table(table)
+    if df.empty:
+        return pd.DataFrame()
+
+    if ref_start:
+        df = df[df["datum"] > pd.Timestamp(ref_start)]
+    df = df[df["datum"].notna()].sort_values("datum", kind="stable").reset_index(drop=True)
+    if df.empty:
+        return pd.DataFrame()
+
+    new_start_ts = pd.Timestamp(new_start) if new_start else pd.Timestamp(year=df["datum"].max().year, month=1, day=1)
+    # Same split as the R scripts: new = od > newdata, old = od <= newdata
+    is_new = (df["datum"] > new_start_ts).to_numpy()
+
+    keys = df[GROUP_COLUMNS].astype(object).where(df[GROUP_COLUMNS].notna(), "")
+    codes, groups = pd.MultiIndex.from_frame(keys).factorize()
+    codes = np.asarray(codes, dtype=np.int64)
+    n_groups = len(groups)
+
+    values = df["hodnota"].to_numpy(dtype=np.float64)
+    is_mva = (df["pod_mva"] == 1).to_numpy()
+
+    # Tolerance intervals from reference + current data (MVA excluded, like the viewer)
+    engine = get_tolerance_engine(alpha)
+    ref_codes = np.where(is_mva, -1, codes)
+    n_ref, log_mean, log_std = engine.grouped_moments(values, ref_codes, n_groups)
+    limits = engine.upper_limits(n_ref, log_mean, log_std, TI_LEVELS)
+    limits[n_ref < MIN_REFERENCE_VALUES] = np.nan
+
+    ti99 = limits[:, -1]
+    ti95 = limits[:, TI_LEVELS.index(0.95)]
+    with np.errstate(invalid="ignore"):
+        above99 = values > ti99[codes]
+        above95 = values > ti95[codes]
+
+    def _count(mask):
+        return np.bincount(codes[mask], minlength=n_groups)
+
+    # Latest value per group (rows are sorted by date)
+    last_idx = np.full(n_groups, -1)
+    last_idx[codes] = np.arange(len(codes))
+
+    d_stat, p_value = _ks_tests(values, codes, is_new, n_groups)
+
+    report = pd.DataFrame(list(groups), columns=GROUP_COLUMNS)
+    report.insert(0, "tabulka", table)
+    report["jednotka"] = df["jednotka"].to_numpy()[last_idx] if "jednotka" in df.columns else None
+    report["n"] = np.bincount(codes, minlength=n_groups)
+    report["n_ref"] = n_ref
+    report["n_mva"] = _count(is_mva)
+    report["od"] = df.groupby(codes)["datum"].min().to_numpy()
+    report["do"] = df["datum"].to_numpy()[last_idx]
+    report["prumer"] = df.groupby(codes)["hodnota"].mean().to_numpy()
+    for i, P in enumerate(TI_LEVELS):
+        report[f"ti{round(P * 100)}"] = limits[:, i]
+    report["n_nad_ti99"] = _count(above99)
+    report["posledni_hodnota"] = values[last_idx]
+    report["posledni_nad_ti99"] = above99[last_idx]
+    report["n_aktualni"] = _count(is_new)
+    report["n_aktualni_nad_ti95"] = _count(above95 & is_new)
+    report["n_aktualni_nad_ti99"] = _count(above99 & is_new)
+    report["ks_d"] = d_stat
+    report["ks_p"] = p_value
+    report["aktualni_od"] = new_start_ts
+    return report
+
+
+def build_report(
+    tables: Optional[List[str]] = None,
+    ref_start: Optional[str] = None,
+    new_start: Optional[str] = None,
+    alpha: float = 0.05,
+    workers: Optional[int] = None,
+) -> pd.DataFrame:
+    """Consolidated report over the given tables (default: all visible tables)."""
+    tables = tables or db.get_tables()
+    db_path = str(get_db_path())
+    workers = workers or min(len(tables), os.cpu_count() or 1)
+
+    if workers <= 1 or len(tables) <= 1:
+        parts = [table_report(t, ref_start, new_start, alpha) for t in tables]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(table_report, t, ref_start, new_start, alpha, db_path) for t in tables]
+            parts = [f.result() for f in futures]
+
+    parts = [p for p in parts if not p.empty]
+    if not parts:
+        return pd.DataFrame()
+    return pd.concat(parts, ignore_index=True)
+
+
+def write_report(report: pd.DataFrame, out: Path) -> List[Path]:
+    """Write the report as <out>.parquet (if pyarrow is available) and <out>.xlsx."""
+    out.parent.mkdir(parents=True, exist_ok=True)
+    written = []
+
+    try:
+        path = out.with_suffix(".parquet")
+        report.to_parquet(path, index=False)
+        written.append(path)
+    except ImportError:
+        print("Warning: pyarrow is not installed, Parquet output skipped (pip install .[report])")
+
+    path = out.with_suffix(".xlsx")
+    with pd.ExcelWriter(path, engine="xlsxwriter") as writer:
+        report.to_excel(writer, sheet_name="TI report", index=False)
+        sheet = writer.sheets["TI report"]
+        sheet.freeze_panes(1, 0)
+        sheet.autofilter(0, 0, len(report), len(report.columns) - 1)
+        for i, col in enumerate(report.columns):
+            sheet.set_column(i, i, max(10, min(40, len(str(col)) + 2)))
+    written.append(path)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch TI report over all datasets")
+    parser.add_argument("--tables", nargs="*", help="Tables to process (default: all visible)")
+    parser.add_argument("--ref-start", help="Reference data start, e.g. 2012-01-01")
+    parser.add_argument("--new-start", help="Current period start (exclusive), e.g. 2023-01-01 (default: latest year)")
+    parser.add_argument("--alpha", type=float, default=0.05, help="Significance level (default 0.05)")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--out", default="ti_report", help="Output path without suffix")
+    args = parser.parse_args(argv)
+
+    report = build_report(args.tables, args.ref_start, args.new_start, args.alpha, args.workers)
+    if report.empty:
+        print("No data for the report")
+        return
+
+    for path in write_report(report, Path(args.out)):
+        print(f"Report: {path} ({len(report)} groups)")
+
+
+if __name__ == "__main__":
+    main()
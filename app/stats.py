@@ -3,12 +3,23 @@ Statistical functions for outlier detection.
 
 Implements tolerance intervals similar to R's tolerance package.
 """
+import threading
 import numpy as np
 from scipy import stats
-from typing import Optional, Tuple
+from typing import Dict, Iterable, Optional, Sequence, Tuple
 
 
-def tolerance_factor_normal(n: int, alpha: float = 0.05, P: float = 0.95, side: int = 1) -> float:
+# Coverage levels reported as TI90 / TI95 / TI99
+TI_LEVELS = (0.90, 0.95, 0.99)
+
+
+def tolerance_factor_normal(
+    n: int,
+    alpha: float = 0.05,
+    P: float = 0.95,
+    side: int = 1,
+    method: str = "howe",
+) -> float:
     """
     Calculate the tolerance factor k for normal distribution.
     
@@ -22,6 +33,7 @@ def tolerance_factor_normal(n: int, alpha: float = 0.05, P: float = 0.95, side:
         alpha: Significance level (default 0.05 for 95% confidence)
         P: Coverage proportion (e.g., 0.90, 0.95, 0.99)
         side: 1 for one-sided (upper), 2 for two-sided
+        method: "howe" (approximation) or "exact" (non-central t, one-sided only)
     
     Returns:
         Tolerance factor k
@@ -35,6 +47,9 @@ def tolerance_factor_normal(n: int, alpha: float = 0.05, P: float = 0.95, side:
         # where delta = z_P * sqrt(n) is the non-centrality parameter
         z_p = stats.norm.ppf(P)
         
+        if method == "exact":
+            return float(_exact_k_one_sided(np.array([n]), alpha, P)[0])
+        
         # Approximation using the Howe method (simpler, widely used)
         # k ≈ z_P + z_{1-alpha} * sqrt((1 + z_P^2/2) / (n-1))
         z_alpha = stats.norm.ppf(1 - alpha)
@@ -49,6 +64,166 @@ def tolerance_factor_normal(n: int, alpha: float = 0.05, P: float = 0.95, side:
         return k
 
 
+def _exact_k_one_sided(n: np.ndarray, alpha: float, P: float) -> np.ndarray:
+    """Exact one-sided k factors (as R's K.factor / normtol.int): nct.ppf(1-alpha, n-1, z_P*sqrt(n)) / sqrt(n)."""
+    n = np.asarray(n, dtype=np.float64)
+    return stats.nct.ppf(1 - alpha, n - 1, stats.norm.ppf(P) * np.sqrt(n)) / np.sqrt(n)
+
+
+class ToleranceEngine:
+    """
+    Vectorized one-sided upper tolerance limits for log-normal data.
+    
+    k factors are memoized per (P, n) in lookup tables that grow on demand,
+    so evaluating thousands of series costs one table lookup each. Log
+    moments are computed once per series and shared by all coverage levels.
+    
+    Args:
+        alpha: Significance level (1 - confidence)
+        method: "exact" (non-central t, matches R's normtol.int) or "howe"
+    
+    Example:
+        engine = ToleranceEngine()
+        engine.calculate(values)                       # single series
+        n, mean, std = engine.grouped_moments(values, codes)
+        limits = engine.upper_limits(n, mean, std)     # shape (groups, levels)
+    """
+    
+    def __init__(self, alpha: float = 0.05, method: str = "exact"):
+        if method not in ("exact", "howe"):
+            raise ValueError(f"Unknown tolerance factor method: {method}")
+        self.alpha = alpha
+        self.method = method
+        self._tables: Dict[float, np.ndarray] = {}
+        self._lock = threading.Lock()
+    
+    def _compute_k(self, n: np.ndarray, P: float) -> np.ndarray:
+        if self.method == "exact":
+            return _exact_k_one_sided(n, self.alpha, P)
+        z_p = stats.norm.ppf(P)
+        z_alpha = stats.norm.ppf(1 - self.alpha)
+        return z_p + z_alpha * np.sqrt((1 + z_p**2 / 2) / (n - 1))
+    
+    def k_factors(self, n, P: float) -> np.ndarray:
+        """
+        One-sided k factors for sample sizes n (array) and coverage P.
+        
+        Returns NaN for n < 2.
+        """
+        n = np.asarray(n, dtype=np.int64)
+        if n.size == 0:
+            return np.empty(n.shape)
+        
+        with self._lock:
+            table = self._tables.get(P)
+            max_n = int(n.max())
+            if table is None or len(table) <= max_n:
+                # Grow the table (at least doubling) and keep computed entries
+                size = max(max_n + 1, 2 * len(table) if table is not None else 64)
+                grown = np.full(size, np.nan)
+                if table is not None:
+                    grown[:len(table)] = table
+                table = grown
+                self._tables[P] = table
+            
+            valid = n >= 2
+            missing = np.unique(n[valid & np.isnan(table[np.clip(n, 0, None)])])
+            if len(missing):
+                table[missing] = self._compute_k(missing, P)
+            
+            k = np.full(n.shape, np.nan)
+            k[valid] = table[n[valid]]
+        return k
+    
+    @staticmethod
+    def log_moments(data) -> Tuple[int, float, float]:
+        """n, mean and sample std of log(data) over positive, finite values."""
+        data = np.asarray(data, dtype=np.float64)
+        data = data[np.isfinite(data) & (data > 0)]
+        n = len(data)
+        if n < 2:
+            return n, np.nan, np.nan
+        log_data = np.log(data)
+        return n, float(log_data.mean()), float(log_data.std(ddof=1))
+    
+    @staticmethod
+    def grouped_moments(data, codes, n_groups: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Log moments of many series at once.
+        
+        Args:
+            data: Values of all series
+            codes: Group index (0..n_groups-1) for each value; negative = skip
+            n_groups: Number of groups (default max(codes) + 1)
+        
+        Returns:
+            Arrays n, mean, std (sample std, NaN where n < 2)
+        """
+        data = np.asarray(data, dtype=np.float64)
+        codes = np.asarray(codes, dtype=np.int64)
+        if n_groups is None:
+            n_groups = int(codes.max()) + 1 if len(codes) else 0
+        
+        ok = np.isfinite(data) & (data > 0) & (codes >= 0)
+        log_data = np.log(data[ok])
+        codes = codes[ok]
+        
+        n = np.bincount(codes, minlength=n_groups)
+        sums = np.bincount(codes, weights=log_data, minlength=n_groups)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = sums / n
+            # Two-pass variance (numerically stable)
+            dev = log_data - mean[codes]
+            var = np.bincount(codes, weights=dev * dev, minlength=n_groups) / (n - 1)
+        mean[n < 1] = np.nan
+        std = np.sqrt(var)
+        std[n < 2] = np.nan
+        return n, mean, std
+    
+    def upper_limits(self, n, mean, std, levels: Sequence[float] = TI_LEVELS) -> np.ndarray:
+        """
+        Upper tolerance limits exp(mean + k * std) on the original scale.
+        
+        Returns:
+            Array of shape (len(n), len(levels)); NaN where n < 2
+        """
+        n = np.atleast_1d(np.asarray(n, dtype=np.int64))
+        mean = np.atleast_1d(np.asarray(mean, dtype=np.float64))
+        std = np.atleast_1d(np.asarray(std, dtype=np.float64))
+        k = np.column_stack([self.k_factors(n, P) for P in levels])
+        return np.exp(mean[:, None] + k * std[:, None])
+    
+    def calculate(self, data, levels: Iterable[float] = TI_LEVELS) -> dict:
+        """TI limits of one series - same result dict as calculate_tolerance_intervals."""
+        levels = tuple(levels)
+        data = np.asarray(data, dtype=np.float64)
+        data = data[~np.isnan(data)]
+        data = data[data > 0]
+        
+        result = {f"ti{round(P * 100)}": None for P in levels}
+        if len(data) < 2:
+            result.update({"mean": None, "n": 0})
+            return result
+        
+        n, log_mean, log_std = self.log_moments(data)
+        limits = self.upper_limits([n], [log_mean], [log_std], levels)[0]
+        for P, limit in zip(levels, limits):
+            result[f"ti{round(P * 100)}"] = float(limit)
+        result.update({"mean": np.mean(data), "n": n})
+        return result
+
+
+_default_engines: Dict[float, ToleranceEngine] = {}
+
+
+def get_tolerance_engine(alpha: float = 0.05) -> ToleranceEngine:
+    """Shared engine (exact k factors) per alpha - keeps the memoized k tables."""
+    engine = _default_engines.get(alpha)
+    if engine is None:
+        engine = _default_engines.setdefault(alpha, ToleranceEngine(alpha=alpha))
+    return engine
+
+
 def lognormal_tolerance_interval(
     data: np.ndarray,
     alpha: float = 0.05,
@@ -105,6 +280,9 @@ def calculate_tolerance_intervals(
     """
     Calculate TI90, TI95, TI99 for the given data.
     
+    Uses exact (non-central t) k factors like R's normtol.int(side = 1,
+    log.norm = TRUE); log moments are computed once for all three levels.
+    
     Args:
         data: Array of values (assumes log-normal distribution)
         alpha: Significance level
@@ -112,27 +290,4 @@ def calculate_tolerance_intervals(
     Returns:
         Dict with keys 'ti90', 'ti95', 'ti99', 'mean', 'n'
     """
-    data = np.array(data)
-    data = data[~np.isnan(data)]
-    data = data[data > 0]
-    
-    if len(data) < 2:
-        return {
-            'ti90': None,
-            'ti95': None,
-            'ti99': None,
-            'mean': None,
-            'n': 0
-        }
-    
-    _, ti90 = lognormal_tolerance_interval(data, alpha=alpha, P=0.90, side=1)
-    _, ti95 = lognormal_tolerance_interval(data, alpha=alpha, P=0.95, side=1)
-    _, ti99 = lognormal_tolerance_interval(data, alpha=alpha, P=0.99, side=1)
-    
-    return {
-        'ti90': ti90,
-        'ti95': ti95,
-        'ti99': ti99,
-        'mean': np.mean(data),
-        'n': len(data)
-    }
+    return get_tolerance_engine(alpha).calculate(data)
@@ -140,6 +140,81 @@ def _fix_wrong_years(dt_series: pd.Series) -> pd.Series:
     
     return result
 
+# Explicitní formáty pro rychlou cestu. Jen formáty se dnem na začátku -
+# u nich dává pevný formát stejný výsledek jako format="mixed", dayfirst=True.
+# ISO "YYYY-MM-DD" sem nepatří: mixed+dayfirst ho čte jako YYYY-DD-MM.
+DATETIME_FORMATS = [
+    "%d.%m.%Y %H:%M",
+    "%d.%m.%Y %H:%M:%S",
+    "%d.%m.%Y",
+    "%d/%m/%Y %H:%M",
+    "%d/%m/%Y %H:%M:%S",
+    "%d/%m/%Y",
+]
+
+# Počet unikátních hodnot, na kterých se zkouší formáty
+FORMAT_SAMPLE_SIZE = 200
+
+def detect_datetime_format(values: pd.Series, sample_size: int = FORMAT_SAMPLE_SIZE) -> Optional[str]:
+    """
+    Najde převažující formát z DATETIME_FORMATS na vzorku řetězců.
+
+    Vrací formát, kterému odpovídá víc než polovina vzorku, jinak None.
+    """
+    if len(values) == 0:
+        return None
+    step = max(1, len(values) // sample_size)
+    sample = values.iloc[::step].iloc[:sample_size]
+
+    best, best_hits = None, 0
+    for fmt in DATETIME_FORMATS:
+        hits = int(pd.to_datetime(sample, format=fmt, errors="coerce").notna().sum())
+        if hits > best_hits:
+            best, best_hits = fmt, hits
+    return best if best_hits * 2 > len(sample) else None
+
+def _parse_mixed(s: pd.Series, assume_utc: bool) -> pd.Series:
+    """Obecný (pomalý) parsing po prvcích: dayfirst=True, zbytek dayfirst=False."""
+    dt = pd.to_datetime(s, errors="coerce", dayfirst=True, utc=assume_utc, format="mixed")
+    need = dt.isna()
+    if need.any():
+        dt.loc[need] = pd.to_datetime(s[need], errors="coerce", dayfirst=False, utc=assume_utc, format="mixed")
+    return dt
+
+def _parse_unique_strings(uniques: pd.Series, assume_utc: bool) -> pd.Series:
+    """Unikátní řetězce: převažující formát vektorově, jen zbytek přes _parse_mixed."""
+    fmt = detect_datetime_format(uniques)
+    if fmt is None:
+        return _parse_mixed(uniques, assume_utc)
+    dt = pd.to_datetime(uniques, format=fmt, errors="coerce", utc=assume_utc)
+    need = dt.isna()
+    if need.any():
+        dt.loc[need] = _parse_mixed(uniques[need], assume_utc)
+    return dt
+
+def _parse_values(s: pd.Series, assume_utc: bool) -> pd.Series:
+    """
+    Stejný výsledek jako _parse_mixed(s), ale rychleji.
+
+    Řetězce se parsují jen jednou pro každou unikátní hodnotu (factorize +
+    take), ostatní hodnoty (datetime z Excelu, čísla) přímo.
+    """
+    if s.dtype != object:
+        return _parse_mixed(s, assume_utc)
+    is_str = s.map(lambda v: isinstance(v, str)).astype(bool)
+    if not is_str.any():
+        return _parse_mixed(s, assume_utc)
+
+    strings = s[is_str]
+    codes, uniques = pd.factorize(strings)
+    parsed = _parse_unique_strings(pd.Series(uniques, dtype=object), assume_utc)
+    dt = parsed.take(codes).set_axis(strings.index)
+
+    others = ~is_str & s.notna()
+    if others.any():
+        dt = pd.concat([dt, _parse_mixed(s[others], assume_utc)])
+    return dt.reindex(s.index)
+
 def parse_datetime_series(series: pd.Series, assume_utc: bool) -> pd.Series:
     """
     Vrací:
@@ -155,14 +230,9 @@ def parse_datetime_series(series: pd.Series, assume_utc: bool) -> pd.Series:
     # 1) serialy
     dt_serial = _dt_from_excel_serial(s)
 
-    # 2) přímý parsing (zvládá i Timestamp)
-    dt1 = pd.to_datetime(s, errors="coerce", dayfirst=True, utc=assume_utc, format="mixed")
-
-    # 3) fallback dayfirst=False pro zbylé
-    need = dt1.isna()
-    if need.any():
-        dt2 = pd.to_datetime(s[need], errors="coerce", dayfirst=False, utc=assume_utc, format="mixed")
-        dt1.loc[need] = dt2
+    # 2) přímý parsing (zvládá i Timestamp) - převažující formát vektorově,
+    # 3) zbytek format="mixed" s dayfirst=True, pak dayfirst=False
+    dt1 = _parse_values(s, assume_utc)
 
     # 4) doplnění serialů tam, kde parsing selhal
     need2 = dt1.isna() & dt_serial.notna()
@@ -0,0 +1,99 @@
+"""
+Slovník hodnot pro filtry vieweru.
+
+Tabulka filter_dictionary drží pro každou datovou tabulku a filtrovaný
+sloupec (nuklid, odběrové místo, dodavatel) jeho hodnoty, počet řádků
+a rozsah datumu. Viewer z ní při startu načte všechny nabídky jedním
+dotazem místo SELECT DISTINCT přes každou tabulku.
+"""
+import sqlite3
+from typing import Dict, List, Optional, Set
+
+from .facts import FACT_TABLES
+from .manifest import MANIFEST_TABLE
+
+DICTIONARY_TABLE = "filter_dictionary"
+
+DEFAULT_COLUMNS = ["nuklid", "odber_misto", "dodavatel_dat"]
+
+# Datumový sloupec pro min/max (stejné pořadí jako ve vieweru)
+DATE_COLUMNS = ["datum_odberu_utc", "datum_mereni_utc", "referencni_datum_utc"]
+
+
+def ensure_dictionary(conn: sqlite3.Connection) -> None:
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS "{DICTIONARY_TABLE}" (
+            table_name TEXT NOT NULL,
+            column_name TEXT NOT NULL,
+            value TEXT NOT NULL,
+            row_count INTEGER,
+            min_date,
+            max_date,
+            PRIMARY KEY (table_name, column_name, value)
+        ) WITHOUT ROWID
+    ''')
+    conn.commit()
+
+
+def data_tables(conn: sqlite3.Connection) -> Dict[str, Set[str]]:
+    """Datové tabulky importu a jejich sloupce (bez manifestu, faktů a slovníku)."""
+    internal = {MANIFEST_TABLE, DICTIONARY_TABLE, *FACT_TABLES}
+    names = [r[0] for r in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'"
+    )]
+    return {
+        name: {r[1] for r in conn.execute(f'PRAGMA table_info("{name}")')}
+        for name in names if name not in internal
+    }
+
+
+def _date_column(columns: Set[str]) -> Optional[str]:
+    for c in DATE_COLUMNS:
+        if c in columns:
+            return c
+    return None
+
+
+def refresh_filter_dictionary(conn: sqlite3.Connection, written: Set[str],
+                              columns: Optional[List[str]] = None) -> None:
+    """
+    Přepočítá slovník pro tabulky zapsané v tomto běhu.
+
+    Tabulky, které ve slovníku chybí, se doplní, záznamy neexistujících
+    tabulek se smažou.
+    """
+    columns = columns or DEFAULT_COLUMNS
+    ensure_dictionary(conn)
+
+    tables = data_tables(conn)
+    known = {r[0] for r in conn.execute(f'SELECT DISTINCT table_name FROM "{DICTIONARY_TABLE}"')}
+    rebuild = sorted(t for t in tables if t in written or t not in known)
+    removed = sorted(t for t in known if t not in tables)
+    if not rebuild and not removed:
+        return
+
+    cur = conn.cursor()
+    cur.execute("BEGIN")
+    try:
+        cur.executemany(
+            f'DELETE FROM "{DICTIONARY_TABLE}" WHERE table_name = ?',
+            [(t,) for t in removed + rebuild],
+        )
+        for table in rebuild:
+            table_cols = tables[table]
+            date_col = _date_column(table_cols)
+            dates = f'MIN("{date_col}"), MAX("{date_col}")' if date_col else "NULL, NULL"
+            for col in columns:
+                if col not in table_cols:
+                    continue
+                value = f'CAST("{col}" AS TEXT)'
+                cur.execute(
+                    f'INSERT INTO "{DICTIONARY_TABLE}" '
+                    f'SELECT ?, ?, {value}, COUNT(*), {dates} FROM "{table}" '
+                    f'WHERE TRIM({value}) <> \'\' GROUP BY {value}',
+                    (table, col),
+                )
+    except Exception:
+        conn.rollback()
+        raise
+    conn.commit()
@@ -0,0 +1,241 @@
+"""
+Normalizovaná faktová tabulka přes všechny komoditní tabulky.
+
+Každý XLSX soubor má vlastní širokou tabulku (převážně TEXT sloupce).
+Tento krok z nich sestaví jednu tabulku measurements s kompaktními typy
+a celočíselnými klíči do dimenzí (dataset, nuklid, odběrové místo,
+dodavatel, jednotka). Dotazy napříč komoditami pak místo UNION přes
+desítky tabulek jdou do jedné indexované tabulky.
+
+Přestavují se jen datasety zapsané v daném běhu importu (a datasety,
+které ve faktech ještě nejsou); fakta zaniklých tabulek se smažou.
+
+Krok je zatím volitelný (facts.enabled, výchozí false) - viewer ani report
+fakta nečtou a import by jinak platil jejich sestavení i místo na disku.
+"""
+import sqlite3
+from typing import Dict, List, Optional, Set
+
+from .manifest import MANIFEST_TABLE
+
+FACT_TABLE = "measurements"
+
+# Dimenze: tabulka -> (klíč ve faktech, zdrojové sloupce v pořadí priority)
+DIMENSIONS = {
+    "dim_nuklid": ("nuklid_id", ["nuklid"]),
+    "dim_odber_misto": ("odber_misto_id", ["odber_misto"]),
+    "dim_dodavatel": ("dodavatel_id", ["dodavatel_dat"]),
+    "dim_jednotka": ("jednotka_id", ["jednotka"]),
+}
+DATASET_TABLE = "dim_dataset"
+
+# Měřené hodnoty: sloupec ve faktech -> (typ, zdrojové sloupce v pořadí priority)
+# Zahrnuje i starší názvy, které jinak sjednocuje normalize_db.py
+VALUE_COLUMNS = {
+    "id_zppr_vzorek": ("INTEGER", ["id_zppr_vzorek"]),
+    "id_om": ("INTEGER", ["id_om"]),
+    "datum_odberu_utc": ("DATE", ["datum_odberu_utc", "datum_cas_odber_zac_utc"]),
+    "datum_mereni_utc": ("DATE", ["datum_mereni_utc", "datum_cas_mereni_utc", "datum_a_cas_mereni_utc"]),
+    "hodnota": ("REAL", ["hodnota"]),
+    "nejistota": ("REAL", ["nejistota"]),
+    "pod_mva": ("INTEGER", ["pod_mva"]),
+}
+
+# Zdrojová tabulka musí mít aspoň tyto sloupce
+REQUIRED_COLUMNS = {"nuklid", "hodnota"}
+
+# Krycí indexy pro typické dotazy (nuklid + místo/dodavatel + období -> hodnoty)
+FACT_INDEXES = {
+    "idx_measurements_nuklid": [
+        "nuklid_id", "dataset_id", "odber_misto_id", "datum_odberu_utc",
+        "hodnota", "pod_mva", "dodavatel_id",
+    ],
+    "idx_measurements_misto": [
+        "odber_misto_id", "nuklid_id", "datum_odberu_utc", "hodnota", "dataset_id",
+    ],
+}
+
+FACT_TABLES = {FACT_TABLE, DATASET_TABLE, *DIMENSIONS}
+
+
+def _to_number(v):
+    """Číslo z hodnoty uložené jako TEXT ("1", "0,5"); nečíselné -> NULL."""
+    if v is None or isinstance(v, (int, float)):
+        return v
+    try:
+        return float(str(v).strip().replace(",", "."))
+    except ValueError:
+        return None
+
+
+def _date_type(cfg: dict) -> str:
+    store_as = cfg["schema"]["datetime"].get("store_as", "unix_ms")
+    return "INTEGER" if store_as == "unix_ms" else "TEXT"
+
+
+def ensure_fact_tables(conn: sqlite3.Connection, cfg: dict) -> None:
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS "{DATASET_TABLE}" (
+            dataset_id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        )
+    ''')
+    for dim, (key, _) in DIMENSIONS.items():
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS "{dim}" (
+                {key} INTEGER PRIMARY KEY,
+                name TEXT NOT NULL UNIQUE
+            )
+        ''')
+
+    date_type = _date_type(cfg)
+    value_defs = ", ".join(
+        f'"{c}" {date_type if t == "DATE" else t}' for c, (t, _) in VALUE_COLUMNS.items()
+    )
+    key_defs = ", ".join(f"{key} INTEGER" for key, _ in DIMENSIONS.values())
+    # WITHOUT ROWID - (dataset_id, source_rowid) je přirozený klíč, rowid navíc jen zabírá místo
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS "{FACT_TABLE}" (
+            dataset_id INTEGER NOT NULL,
+            source_rowid INTEGER NOT NULL,
+            {key_defs},
+            {value_defs},
+            PRIMARY KEY (dataset_id, source_rowid)
+        ) WITHOUT ROWID
+    ''')
+    conn.commit()
+
+
+def source_tables(conn: sqlite3.Connection) -> Dict[str, Set[str]]:
+    """Datové tabulky importu (se sloupci nuklid a hodnota) a jejich sloupce."""
+    names = [r[0] for r in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'"
+    )]
+    out = {}
+    for name in names:
+        if name == MANIFEST_TABLE or name in FACT_TABLES:
+            continue
+        cols = {r[1] for r in conn.execute(f'PRAGMA table_info("{name}")')}
+        if REQUIRED_COLUMNS <= cols:
+            out[name] = cols
+    return out
+
+
+def _pick(candidates: List[str], columns: Set[str]) -> Optional[str]:
+    for c in candidates:
+        if c in columns:
+            return c
+    return None
+
+
+def _load_dataset(conn: sqlite3.Connection, table: str, columns: Set[str], dataset_id: int) -> int:
+    """Doplní dimenze a vloží řádky jedné zdrojové tabulky do faktů, vrací počet řádků."""
+    cur = conn.cursor()
+    select = ["?", "t.rowid"]
+    joins = []
+    insert_cols = ["dataset_id", "source_rowid"]
+
+    for i, (dim, (key, candidates)) in enumerate(DIMENSIONS.items()):
+        col = _pick(candidates, columns)
+        insert_cols.append(key)
+        if col is None:
+            select.append("NULL")
+            continue
+        value = f'TRIM(CAST(t."{col}" AS TEXT))'
+        cur.execute(
+            f'INSERT OR IGNORE INTO "{dim}" (name) '
+            f'SELECT DISTINCT {value} FROM "{table}" t WHERE {value} <> \'\''
+        )
+        joins.append(f'LEFT JOIN "{dim}" d{i} ON d{i}.name = {value}')
+        select.append(f"d{i}.{key}")
+
+    for name, (typ, candidates) in VALUE_COLUMNS.items():
+        col = _pick(candidates, columns)
+        insert_cols.append(f'"{name}"')
+        if col is None:
+            select.append("NULL")
+        elif typ in ("REAL", "INTEGER"):
+            # REAL/INTEGER afinita ponechá nečíselný text - ten převede _to_number
+            select.append(
+                f'CASE WHEN typeof(t."{col}") IN (\'integer\', \'real\') '
+                f'THEN t."{col}" ELSE _to_number(t."{col}") END'
+            )
+        else:
+            select.append(f't."{col}"')
+
+    cur.execute(
+        f'INSERT INTO "{FACT_TABLE}" ({", ".join(insert_cols)}) '
+        f'SELECT {", ".join(select)} FROM "{table}" t {" ".join(joins)}',
+        (dataset_id,),
+    )
+    return cur.rowcount
+
+
+def refresh_facts(conn: sqlite3.Connection, written: Set[str], cfg: dict) -> None:
+    """
+    Přestaví fakta pro tabulky zapsané v tomto běhu.
+
+    Datasety, které ve faktech chybí (např. první spuštění), se doplní,
+    fakta neexistujících tabulek se smažou. Indexy faktů se po změně
+    vytvoří znovu až po vložení všech řádků.
+    """
+    ensure_fact_tables(conn, cfg)
+    conn.create_function("_to_number", 1, _to_number, deterministic=True)
+
+    sources = source_tables(conn)
+    known = dict(conn.execute(f'SELECT name, dataset_id FROM "{DATASET_TABLE}"').fetchall())
+    rebuild = sorted(t for t in sources if t in written or t not in known)
+    removed = sorted(t for t in known if t not in sources)
+    if not rebuild and not removed:
+        return
+
+    cur = conn.cursor()
+    cur.execute("BEGIN")
+    try:
+        for name in FACT_INDEXES:
+            cur.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+        for table in removed + [t for t in rebuild if t in known]:
+            cur.execute(f'DELETE FROM "{FACT_TABLE}" WHERE dataset_id = ?', (known[table],))
+        cur.executemany(f'DELETE FROM "{DATASET_TABLE}" WHERE name = ?', [(t,) for t in removed])
+
+        for table in rebuild:
+            cur.execute(f'INSERT OR IGNORE INTO "{DATASET_TABLE}" (name) VALUES (?)', (table,))
+            dataset_id = cur.execute(
+                f'SELECT dataset_id FROM "{DATASET_TABLE}" WHERE name = ?', (table,)
+            ).fetchone()[0]
+            rows = _load_dataset(conn, table, sources[table], dataset_id)
+            print(f"Fakta: {table} -> {FACT_TABLE} ({rows} řádků)")
+
+        # nepoužité hodnoty dimenzí
+        for dim, (key, _) in DIMENSIONS.items():
+            cur.execute(
+                f'DELETE FROM "{dim}" WHERE {key} NOT IN '
+                f'(SELECT {key} FROM "{FACT_TABLE}" WHERE {key} IS NOT NULL)'
+            )
+
+        for name, cols in FACT_INDEXES.items():
+            cols_sql = ", ".join(f'"{c}"' for c in cols)
+            cur.execute(f'CREATE INDEX "{name}" ON "{FACT_TABLE}" ({cols_sql})')
+    except Exception:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+def drop_facts(conn: sqlite3.Connection) -> None:
+    """Smaže fakta a dimenze (po vypnutí facts.enabled); bez nich do DB nezapisuje."""
+    existing = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    tables = sorted(FACT_TABLES & existing)
+    if not tables:
+        return
+    cur = conn.cursor()
+    cur.execute("BEGIN")
+    try:
+        for table in tables:
+            cur.execute(f'DROP TABLE "{table}"')
+    except Exception:
+        conn.rollback()
+        raise
+    conn.commit()
+    print(f"Fakta vypnuta (facts.enabled): smazány tabulky {', '.join(tables)}")
@@ -1,4 +1,6 @@
-from typing import Optional, Tuple, List
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, Iterator, Optional, Tuple, List
 import re
 import openpyxl
 
@@ -14,14 +16,18 @@ def norm_text(s: str) -> str:
     s = s.replace("_", " ")
     return s
 
-def find_header_row_in_sheet(ws,
-                             expected_norm: set,
-                             max_rows: int,
-                             min_hits: int,
-                             min_ratio: float) -> Optional[int]:
-    scan_rows = min(max_rows, ws.max_row or max_rows)
-    for r in range(1, scan_rows + 1):
-        row = list(next(ws.iter_rows(min_row=r, max_row=r, values_only=True)))
+def _scan_header(rows: Iterator[tuple],
+                 expected_norm: set,
+                 max_rows: int,
+                 min_hits: int,
+                 min_ratio: float) -> Optional[Tuple[int, tuple]]:
+    """
+    Hledá hlavičku v prvních max_rows řádcích iterátoru.
+
+    Vrací (číslo řádku 1-based, hodnoty hlavičky) nebo None. Iterátor zůstane
+    stát hned za hlavičkou, takže z něj lze dál číst data.
+    """
+    for r, row in enumerate(islice(rows, max_rows), start=1):
         normed = [norm_text(v) for v in row]
         nonempty = [v for v in normed if v]
         if not nonempty:
@@ -31,24 +37,61 @@ def find_header_row_in_sheet(ws,
         ratio = hits / max(1, len(nonempty))
 
         if hits >= min_hits and ratio >= min_ratio:
-            return r
+            return r, row
     return None
 
-def detect_sheet_and_header(xlsx_path: str,
-                            expected_header: List[str],
-                            max_rows: int,
-                            min_hits: int,
-                            min_ratio: float) -> Tuple[str, int]:
+def find_header_row_in_sheet(ws,
+                             expected_norm: set,
+                             max_rows: int,
+                             min_hits: int,
+                             min_ratio: float) -> Optional[int]:
+    found = _scan_header(ws.iter_rows(values_only=True), expected_norm, max_rows, min_hits, min_ratio)
+    return found[0] if found else None
+
+@dataclass
+class DetectedSheet:
+    """
+    Otevřený read-only sešit s nalezenou hlavičkou.
+
+    rows pokračuje řádkem za hlavičkou - data se čtou stejným iterátorem,
+    kterým se hledala hlavička, soubor se tedy otevře a rozbalí jen jednou.
+    """
+    wb: Any
+    sheet: str
+    header_row: int
+    header: tuple
+    rows: Iterator[tuple]
+
+    def close(self) -> None:
+        self.wb.close()
+
+def open_detected_sheet(xlsx_path: str,
+                        expected_header: List[str],
+                        max_rows: int,
+                        min_hits: int,
+                        min_ratio: float) -> DetectedSheet:
+    """Otevře sešit a najde list s hlavičkou; sešit zavírá volající (DetectedSheet.close)."""
     expected_norm = set(norm_text(x) for x in expected_header)
 
     wb = openpyxl.load_workbook(xlsx_path, read_only=True, data_only=True)
     try:
         for name in wb.sheetnames:
-            ws = wb[name]
-            hr = find_header_row_in_sheet(ws, expected_norm, max_rows, min_hits, min_ratio)
-            if hr is not None:
-                return name, hr
-    finally:
+            rows = wb[name].iter_rows(values_only=True)
+            found = _scan_header(rows, expected_norm, max_rows, min_hits, min_ratio)
+            if found is not None:
+                return DetectedSheet(wb=wb, sheet=name, header_row=found[0], header=found[1], rows=rows)
+    except Exception:
         wb.close()
+        raise
 
+    wb.close()
     raise RuntimeError(f"V souboru '{xlsx_path}' se nepodařilo najít list s očekávanou hlavičkou.")
+
+def detect_sheet_and_header(xlsx_path: str,
+                            expected_header: List[str],
+                            max_rows: int,
+                            min_hits: int,
+                            min_ratio: float) -> Tuple[str, int]:
+    detected = open_detected_sheet(xlsx_path, expected_header, max_rows, min_hits, min_ratio)
+    detected.close()
+    return detected.sheet, detected.header_row
@@ -0,0 +1,171 @@
+"""
+Manifest importu - evidence naimportovaných XLSX souborů.
+
+Tabulka _import_manifest v cílové databázi drží pro každý soubor velikost,
+mtime, SHA-256 obsahu, cílovou tabulku, počet řádků a otisk schématu.
+Režim --incremental podle ní znovu importuje jen nové/změněné soubory
+a přestaví jen dotčené tabulky.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+MANIFEST_TABLE = "_import_manifest"
+
+# Části konfigurace, které ovlivňují obsah tabulek - jejich změna = reimport
+SETTINGS_KEYS = ("excel", "naming", "schema")
+
+
+@dataclass
+class FileInfo:
+    """Otisk jednoho vstupního souboru."""
+    path: str      # absolutní cesta
+    key: str       # cesta relativní k config.yaml (klíč v manifestu)
+    size: int
+    mtime_ns: int
+    sha256: str
+
+
+def ensure_manifest(conn: sqlite3.Connection) -> None:
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS "{MANIFEST_TABLE}" (
+            path TEXT PRIMARY KEY,
+            size INTEGER,
+            mtime_ns INTEGER,
+            sha256 TEXT,
+            table_name TEXT,
+            rows INTEGER,
+            schema_hash TEXT,
+            settings_hash TEXT,
+            imported_at TEXT
+        )
+    ''')
+    conn.commit()
+
+
+def load_manifest(conn: sqlite3.Connection) -> Dict[str, dict]:
+    """Záznamy manifestu podle klíče (relativní cesty)."""
+    cur = conn.execute(f'SELECT * FROM "{MANIFEST_TABLE}"')
+    names = [d[0] for d in cur.description]
+    return {row[0]: dict(zip(names, row)) for row in cur.fetchall()}
+
+
+def _sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def file_info(path: str, base_dir: Path, manifest: Optional[Dict[str, dict]] = None) -> FileInfo:
+    """
+    Otisk souboru. Při shodné velikosti a mtime se záznamem v manifestu
+    se hash nepočítá znovu (soubor se nečte).
+    """
+    st = os.stat(path)
+    key = Path(os.path.relpath(path, base_dir)).as_posix()
+    previous = (manifest or {}).get(key)
+    if previous and previous["size"] == st.st_size and previous["mtime_ns"] == st.st_mtime_ns:
+        sha = previous["sha256"]
+    else:
+        sha = _sha256(path)
+    return FileInfo(path=path, key=key, size=st.st_size, mtime_ns=st.st_mtime_ns, sha256=sha)
+
+
+def settings_hash(cfg: dict) -> str:
+    """Otisk konfigurace, která ovlivňuje obsah tabulek."""
+    data = {k: cfg.get(k) for k in SETTINGS_KEYS}
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def schema_hash(columns: List[str], types: List[str]) -> str:
+    """Otisk schématu tabulky (názvy a typy sloupců)."""
+    text = "|".join(f"{c}:{t}" for c, t in zip(columns, types))
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+def plan_incremental(
+    infos: List[FileInfo],
+    tables: Dict[str, str],
+    manifest: Dict[str, dict],
+    settings: str,
+) -> Tuple[Set[str], List[FileInfo]]:
+    """
+    Které tabulky přestavět a které soubory kvůli tomu importovat.
+
+    Args:
+        infos: Otisky aktuálních vstupních souborů
+        tables: Cílová tabulka podle klíče souboru
+        manifest: Stávající manifest
+        settings: Otisk aktuální konfigurace
+
+    Returns:
+        (dotčené tabulky, soubory k importu) - tabulka se přestavuje celá,
+        proto se importují i nezměněné soubory, které do ní patří.
+    """
+    affected: Set[str] = set()
+    current = set()
+    for info in infos:
+        current.add(info.key)
+        prev = manifest.get(info.key)
+        table = tables[info.key]
+        if (prev is None
+                or prev["sha256"] != info.sha256
+                or prev["settings_hash"] != settings
+                or prev["table_name"] != table):
+            affected.add(table)
+            if prev is not None:
+                affected.add(prev["table_name"])
+
+    # Odstraněné soubory - jejich tabulky se přestaví bez nich
+    for key, prev in manifest.items():
+        if key not in current:
+            affected.add(prev["table_name"])
+
+    to_import = [info for info in infos if tables[info.key] in affected]
+    return affected, to_import
+
+
+def record_file(conn: sqlite3.Connection, info: FileInfo, table: str, rows: int, schema: str, settings: str) -> None:
+    conn.execute(
+        f'INSERT OR REPLACE INTO "{MANIFEST_TABLE}" VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        (info.key, info.size, info.mtime_ns, info.sha256, table, rows, schema, settings,
+         datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")),
+    )
+    conn.commit()
+
+
+def touch_files(conn: sqlite3.Connection, infos: List[FileInfo], manifest: Dict[str, dict]) -> None:
+    """
+    Aktualizuje velikost/mtime souborů se shodným obsahem (příště se nehashují).
+
+    Soubory beze změny velikosti a mtime se přeskočí - import bez změn do
+    databáze nezapisuje (viewer podle mtime/WAL databáze zahazuje cache).
+    """
+    params = [
+        (i.size, i.mtime_ns, i.key) for i in infos
+        if i.key in manifest
+        and (manifest[i.key]["size"], manifest[i.key]["mtime_ns"]) != (i.size, i.mtime_ns)
+    ]
+    if not params:
+        return
+    conn.executemany(
+        f'UPDATE "{MANIFEST_TABLE}" SET size = ?, mtime_ns = ? WHERE path = ?',
+        params,
+    )
+    conn.commit()
+
+
+def forget_tables(conn: sqlite3.Connection, tables: Set[str]) -> None:
+    """Odstraní z manifestu záznamy přestavovaných tabulek."""
+    conn.executemany(
+        f'DELETE FROM "{MANIFEST_TABLE}" WHERE table_name = ?',
+        [(t,) for t in tables],
+    )
+    conn.commit()
@@ -1,8 +1,15 @@
 import os
 import glob
+import pickle
 import sqlite3
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime, time
+from itertools import islice
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 import numpy as np
 
 import pandas as pd
@@ -10,7 +17,7 @@ from tqdm import tqdm
 
 from .config import Config
 from .naming import table_name_from_filename
-from .header_detect import detect_sheet_and_header
+from .header_detect import open_detected_sheet
 from .schema import shorten_columns, build_column_type_map, infer_sqlite_types_explicit
 from .datetime_parse import (
     detect_datetime_columns,
@@ -18,7 +25,22 @@ from .datetime_parse import (
     parse_datetime_series,
     datetime_to_storage
 )
-from .import_logger import ImportLogger
+from .import_logger import ImportLogger, ImportProblem
+from .xlsx_stream import SheetReader
+from .facts import drop_facts, refresh_facts
+from .dictionary import refresh_filter_dictionary
+from .manifest import (
+    FileInfo,
+    ensure_manifest,
+    load_manifest,
+    file_info,
+    settings_hash,
+    schema_hash,
+    plan_incremental,
+    record_file,
+    touch_files,
+    forget_tables,
+)
 
 # Kotvy pro detekci hlavičky - normalizované názvy (bez jednotek, lowercase, mezery místo _)
 # Stačí shoda s několika z nich
@@ -53,14 +75,16 @@ def table_exists(conn: sqlite3.Connection, table: str) -> bool:
     cur.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,))
     return cur.fetchone() is not None
 
-def create_table(conn: sqlite3.Connection, table: str, cols: List[str], types: List[str], if_exists: str) -> None:
+def create_table(conn: sqlite3.Connection, table: str, cols: List[str], types: List[str], if_exists: str,
+                 commit: bool = True) -> None:
     cur = conn.cursor()
     if if_exists == "replace":
         cur.execute(f'DROP TABLE IF EXISTS "{table}"')
 
     col_defs = ", ".join([f'"{c}" {t}' for c, t in zip(cols, types)])
     cur.execute(f'CREATE TABLE IF NOT EXISTS "{table}" ({col_defs})')
-    conn.commit()
+    if commit:
+        conn.commit()
 
 def create_indexes(conn: sqlite3.Connection, table: str, indexes: List[List[str]]) -> None:
     cur = conn.cursor()
@@ -88,20 +112,9 @@ def iter_input_files(cfg: dict, base_dir: Path) -> List[str]:
     files = [f for f in files if not os.path.basename(f).startswith("~$")]
     return sorted(set(files))
 
-def load_one_xlsx(conn: sqlite3.Connection, xlsx_path: str, cfg: dict, logger: ImportLogger) -> None:
-    # excel detect
-    excel_cfg = cfg["excel"]
-    sheet, header_row = detect_sheet_and_header(
-        xlsx_path=xlsx_path,
-        expected_header=EXPECTED_HEADER,
-        max_rows=int(excel_cfg["max_header_scan_rows"]),
-        min_hits=int(excel_cfg["header_match"]["min_hits"]),
-        min_ratio=float(excel_cfg["header_match"]["min_ratio"]),
-    )
-
-    # table name
+def table_name_for(xlsx_path: str, cfg: dict) -> str:
     nam = cfg["naming"]
-    table = table_name_from_filename(
+    return table_name_from_filename(
         xlsx_path,
         drop_years=bool(nam["drop_years"]),
         drop_trailing_version_suffix=bool(nam["drop_trailing_version_suffix"]),
@@ -109,72 +122,111 @@ def load_one_xlsx(conn: sqlite3.Connection, xlsx_path: str, cfg: dict, logger: I
         max_len=int(nam["max_len"]),
     )
 
-    out_cfg = cfg["output"]
-    if_exists = out_cfg["if_exists"].lower()
+def check_if_exists(conn: sqlite3.Connection, table: str, cfg: dict) -> str:
+    """Ověří output.if_exists pro tabulku a vrátí normalizovanou hodnotu."""
+    if_exists = cfg["output"]["if_exists"].lower()
     if if_exists not in {"replace", "append", "fail"}:
         raise ValueError("output.if_exists musí být replace | append | fail")
     if if_exists == "fail" and table_exists(conn, table):
         raise RuntimeError(f"Tabulka '{table}' existuje a if_exists=fail.")
+    return if_exists
 
-    # read xlsx
-    df = pd.read_excel(
-        xlsx_path,
-        sheet_name=sheet,
-        header=header_row - 1,
-        engine="openpyxl",
-        dtype=object
-    ).dropna(how="all")
+@dataclass
+class PreparedFile:
+    """
+    Jeden XLSX soubor připravený k zápisu.
 
-    file_basename = os.path.basename(xlsx_path)
-    
-    # rename columns
-    sch = cfg["schema"]
-    df.columns = shorten_columns(list(df.columns), sch.get("column_aliases", {}), max_len=64)
+    batches jsou typované dávky řádků - při sériovém importu líný generátor
+    nad otevřeným sešitem (reader). Worker proces paralelního importu dávky
+    zapíše do dočasného souboru (spool) a hlavní proces je z něj čte po jedné
+    (open_spool), celý soubor tak není v paměti ani v jednom z procesů.
+    """
+    path: str
+    table: str
+    sheet: str
+    columns: List[str]
+    col_types: List[str]
+    batches: Iterable[pd.DataFrame]
+    reader: Optional[SheetReader] = field(default=None, repr=False)
+    spool: Optional[str] = None
 
-    # datetime convert
-    dt_cfg = sch["datetime"]
-    dt_cols = detect_datetime_columns(df.columns, dt_cfg["detect_regex"])
+    def open_spool(self) -> None:
+        """Dávky ze spool souboru workeru (čtou se líně při zápisu)."""
+        if self.spool is not None:
+            self.batches = _read_spool(self.spool)
+
+    def close(self) -> None:
+        """Zavře sešit (i když dávky nebyly dočteny) a smaže spool soubor."""
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+        close_batches = getattr(self.batches, "close", None)
+        if close_batches is not None:
+            close_batches()
+        if self.spool is not None:
+            try:
+                os.unlink(self.spool)
+            except OSError:
+                pass
+            self.spool = None
+
+@dataclass
+class WriteState:
+    """Stav zapisovatele během jednoho běhu importu."""
+    settings: str
+    infos: Dict[str, FileInfo] = field(default_factory=dict)  # otisky podle cesty
+    seen_tables: Set[str] = field(default_factory=set)       # tabulky zapsané v tomto běhu
+    table_columns: Dict[str, Set[str]] = field(default_factory=dict)  # sloupce pro odložené indexy
+
+# Max počet příkladů jednoho problému na sloupec a soubor
+MAX_EXAMPLES = 10
+
+SQLITE_INT_MAX = 2**63 - 1
+SQLITE_INT_MIN = -(2**63)
 
+def _take_examples(examples: Dict[Tuple[str, str], int], key: Tuple[str, str], index) -> list:
+    """Indexy řádků k zalogování - nejvýše MAX_EXAMPLES na klíč napříč dávkami."""
+    done = examples.get(key, 0)
+    picked = list(index[:max(0, MAX_EXAMPLES - done)])
+    examples[key] = done + len(picked)
+    return picked
+
+def _prepare_batch(df: pd.DataFrame, col_types: List[str], dt_cols: List[str], dt_cfg: dict,
+                   logger: ImportLogger, file_basename: str, sheet: str, header_row: int,
+                   examples: Dict[Tuple[str, str], int]) -> pd.DataFrame:
+    """Převod datetime a validace hodnot jedné dávky (sloupce se nahrazují, nekopírují)."""
     for c in dt_cols:
         utc = is_utc_column(c, dt_cfg["utc_regex"])
-        original_values = df[c].copy()
-        df[c] = parse_datetime_series(df[c], assume_utc=utc)
-        
+        original_values = df[c]
+        parsed = parse_datetime_series(original_values, assume_utc=utc)
+
         # Loguj neúspěšné parsování datetime
-        failed_mask = original_values.notna() & df[c].isna()
+        failed_mask = original_values.notna() & parsed.isna()
         if failed_mask.any():
-            for idx in df.index[failed_mask][:10]:  # Max 10 příkladů
+            for idx in _take_examples(examples, ("dt", c), df.index[failed_mask]):
                 logger.add_datetime_error(
-                    file_basename, sheet, c, 
+                    file_basename, sheet, c,
                     int(idx) + header_row + 1,  # Excel řádek (1-based)
                     original_values.loc[idx]
                 )
 
         # uložit do SQLite jako ISO / unix ms
         df[c] = datetime_to_storage(
-            df[c],
+            parsed,
             assume_utc=utc,
             store_as=dt_cfg["store_as"],
             iso_format_naive=dt_cfg["iso_format_naive"],
             iso_format_utc=dt_cfg["iso_format_utc"],
         )
 
-    # types - explicitní konfigurace
-    column_type_map = build_column_type_map(sch.get("column_types"))
-    fallback_type = sch.get("fallback_type", "TEXT")
-    col_types = infer_sqlite_types_explicit(list(df.columns), column_type_map, fallback_type)
-
     # Validace a oprava hodnot před zápisem
-    SQLITE_INT_MAX = 2**63 - 1
-    SQLITE_INT_MIN = -(2**63)
-    
     for col, col_type in zip(df.columns, col_types):
         if col_type == "INTEGER":
             # Kontrola přetečení INTEGER
             numeric = pd.to_numeric(df[col], errors="coerce")
             overflow_mask = (numeric > SQLITE_INT_MAX) | (numeric < SQLITE_INT_MIN)
             if overflow_mask.any():
-                for idx in df.index[overflow_mask][:10]:
+                for idx in _take_examples(examples, ("int", col), df.index[overflow_mask]):
                     logger.add_value_overflow(
                         file_basename, sheet, col,
                         int(idx) + header_row + 1,
@@ -182,14 +234,14 @@ def load_one_xlsx(conn: sqlite3.Connection, xlsx_path: str, cfg: dict, logger: I
                     )
                 # Nahraď přetečené hodnoty NULL
                 df.loc[overflow_mask, col] = None
-        
+
         elif col_type == "REAL":
             # Kontrola příliš velkých REAL hodnot
             numeric = pd.to_numeric(df[col], errors="coerce")
             # IEEE 754 double max ~1.8e308, ale SQLite může mít problémy s extrémními hodnotami
             overflow_mask = (numeric.abs() > 1e100) & numeric.notna()
             if overflow_mask.any():
-                for idx in df.index[overflow_mask][:10]:
+                for idx in _take_examples(examples, ("real", col), df.index[overflow_mask]):
                     logger.add(
                         file_basename, sheet, col,
                         int(idx) + header_row + 1,
@@ -199,37 +251,364 @@ def load_one_xlsx(conn: sqlite3.Connection, xlsx_path: str, cfg: dict, logger: I
                     )
                 # Tyto hodnoty ponecháme, jen je zalogujeme
 
-    # create table
-    create_table(conn, table, list(df.columns), col_types, if_exists=if_exists)
+    return df
 
-    # insert - bez method="multi" kvůli limitu SQLite proměnných (max 999)
-    chunk_rows = int(cfg["sqlite"]["chunk_rows"])
-    # Dynamicky omezit chunk podle počtu sloupců
-    max_vars = 999
-    cols_count = len(df.columns)
-    safe_chunk = max(1, max_vars // cols_count)
-    actual_chunk = min(chunk_rows, safe_chunk)
-    
-    for start in range(0, len(df), actual_chunk):
-        df.iloc[start:start + actual_chunk].to_sql(
-            table, conn, if_exists="append", index=False
+def stream_xlsx(xlsx_path: str, cfg: dict, logger: ImportLogger) -> PreparedFile:
+    """
+    Otevře jeden XLSX soubor pro streamované zpracování - bez přístupu k databázi.
+
+    Detekce hlavičky a přejmenování sloupců proběhne hned, sešit zůstane
+    otevřený pro čtení dat (jedno otevření souboru); čtení, převod
+    datetime a validace až při procházení PreparedFile.batches, po dávkách
+    excel.batch_rows řádků. Paměť je tak omezená velikostí dávky, ne sešitu.
+    """
+    # excel detect
+    excel_cfg = cfg["excel"]
+    detected = open_detected_sheet(
+        xlsx_path=xlsx_path,
+        expected_header=EXPECTED_HEADER,
+        max_rows=int(excel_cfg["max_header_scan_rows"]),
+        min_hits=int(excel_cfg["header_match"]["min_hits"]),
+        min_ratio=float(excel_cfg["header_match"]["min_ratio"]),
+    )
+    sheet, header_row = detected.sheet, detected.header_row
+
+    table = table_name_for(xlsx_path, cfg)
+
+    # read xlsx (líně, po dávkách) - stejný otevřený sešit i iterátor jako detekce hlavičky
+    reader = SheetReader(detected, int(excel_cfg.get("batch_rows", 20000)))
+
+    file_basename = os.path.basename(xlsx_path)
+
+    # rename columns
+    sch = cfg["schema"]
+    columns = shorten_columns(reader.columns, sch.get("column_aliases", {}), max_len=64)
+
+    dt_cfg = sch["datetime"]
+    dt_cols = detect_datetime_columns(columns, dt_cfg["detect_regex"])
+
+    # types - explicitní konfigurace
+    column_type_map = build_column_type_map(sch.get("column_types"))
+    fallback_type = sch.get("fallback_type", "TEXT")
+    col_types = infer_sqlite_types_explicit(columns, column_type_map, fallback_type)
+
+    def batches() -> Iterator[pd.DataFrame]:
+        examples: Dict[Tuple[str, str], int] = {}
+        for df in reader:
+            df.columns = columns
+            yield _prepare_batch(df, col_types, dt_cols, dt_cfg, logger,
+                                 file_basename, sheet, header_row, examples)
+        if reader.extra_rows:
+            logger.add_general_error(
+                file_basename, sheet,
+                f"{len(reader.extra_rows)} řádků má hodnoty za posledním sloupcem hlavičky "
+                f"(první: řádek {reader.extra_rows[0]}) - tyto hodnoty se neimportují"
+            )
+
+    return PreparedFile(path=xlsx_path, table=table, sheet=sheet, columns=columns,
+                        col_types=col_types, batches=batches(), reader=reader)
+
+def _spool_batches(batches: Iterable[pd.DataFrame], spool_dir: Optional[str] = None) -> str:
+    """Zapíše dávky postupně do dočasného souboru (pickle za pickle), vrací jeho cestu."""
+    fd, path = tempfile.mkstemp(prefix="monras_", suffix=".spool", dir=spool_dir)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for df in batches:
+                pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path
+
+def _read_spool(path: str) -> Iterator[pd.DataFrame]:
+    with open(path, "rb") as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+def prepare_xlsx(xlsx_path: str, cfg: dict, logger: ImportLogger) -> PreparedFile:
+    """
+    Načte a připraví celý XLSX soubor - bez přístupu k databázi.
+
+    Běží ve worker procesech paralelního importu. Dávky se průběžně zapisují
+    do spool souboru (processing.spool_dir, výchozí je systémový temp), takže
+    worker drží v paměti jen jednu dávku; hlavní proces je čte přes open_spool.
+    """
+    spool_dir = (cfg.get("processing") or {}).get("spool_dir")
+    if spool_dir:
+        spool_dir = os.path.expandvars(spool_dir)
+        os.makedirs(spool_dir, exist_ok=True)
+    prepared = stream_xlsx(xlsx_path, cfg, logger)
+    try:
+        spool = _spool_batches(prepared.batches, spool_dir)
+    finally:
+        prepared.close()
+    prepared.batches = ()
+    prepared.spool = spool
+    return prepared
+
+def _to_sqlite(v):
+    """Hodnota, kterou sqlite3 umí uložit (datetime/time z Excelu jako ISO text)."""
+    if v is None or isinstance(v, (str, int, float, bytes)):
+        return v
+    if isinstance(v, np.generic):
+        return v.item()
+    if isinstance(v, datetime):
+        return v.isoformat(sep=" ")
+    if isinstance(v, (date, time)):
+        return v.isoformat()
+    return str(v)
+
+def _column_values(series: pd.Series) -> list:
+    """Sloupec jako seznam nativních Python hodnot (NaN/NaT/NA -> None)."""
+    values = series.astype(object).where(series.notna(), None).tolist()
+    if series.dtype == object or pd.api.types.is_datetime64_any_dtype(series):
+        values = [_to_sqlite(v) for v in values]
+    return values
+
+def _insert_batches(cur: sqlite3.Cursor, table: str, columns: List[str],
+                    batches: Iterable[pd.DataFrame]) -> int:
+    """executemany po dávkách (uvnitř již otevřené transakce), vrací počet řádků."""
+    cols_sql = ", ".join('"' + str(c).replace('"', '""') + '"' for c in columns)
+    placeholders = ", ".join("?" * len(columns))
+    sql = f'INSERT INTO "{table}" ({cols_sql}) VALUES ({placeholders})'
+    rows = 0
+    for df in batches:
+        if df.empty:
+            continue
+        values = [_column_values(df[c]) for c in df.columns]
+        cur.executemany(sql, zip(*values))
+        rows += len(df)
+    return rows
+
+def bulk_insert(conn: sqlite3.Connection, table: str, df: pd.DataFrame) -> None:
+    """
+    Vloží DataFrame jedním executemany v jedné explicitní transakci.
+
+    Sloupce se převedou na nativní typy jednou, řádky se generují líně
+    (zip), takže se nevytváří kopie celé tabulky.
+    """
+    if df.empty:
+        return
+    conn.commit()
+    cur = conn.cursor()
+    cur.execute("BEGIN")
+    try:
+        _insert_batches(cur, table, list(df.columns), [df])
+    except Exception:
+        conn.rollback()
+        raise
+    conn.commit()
+
+def create_table_indexes(conn: sqlite3.Connection, table: str, columns: Set[str], cfg: dict) -> None:
+    """Indexy z konfigurace (jen existující sloupce)."""
+    if not bool(cfg["sqlite"].get("create_indexes", True)):
+        return
+    filtered = []
+    for cols in cfg["sqlite"].get("indexes", []):
+        cols2 = [c for c in cols if c in columns]
+        if cols2:
+            filtered.append(cols2)
+    if filtered:
+        create_indexes(conn, table, filtered)
+
+def write_prepared(conn: sqlite3.Connection, prepared: PreparedFile, cfg: dict, first: bool = True) -> int:
+    """
+    Zapíše připravený soubor do SQLite (jediný zapisovatel), vrací počet řádků.
+
+    output.if_exists se uplatní jen na první soubor tabulky v běhu importu,
+    další soubory téže tabulky (např. Maso 2023 + Maso 2024) se připojí.
+    Vytvoření tabulky i vložení všech dávek běží v jedné transakci - když
+    čtení sešitu selže uprostřed, původní tabulka zůstane beze změny.
+    """
+    table = prepared.table
+    if_exists = check_if_exists(conn, table, cfg) if first else "append"
+
+    conn.commit()
+    cur = conn.cursor()
+    cur.execute("BEGIN")
+    try:
+        # create table
+        create_table(conn, table, prepared.columns, prepared.col_types, if_exists=if_exists, commit=False)
+        # insert - executemany po dávkách (indexy se vytvoří až po načtení všech souborů)
+        rows = _insert_batches(cur, table, prepared.columns, prepared.batches)
+    except Exception:
+        conn.rollback()
+        raise
+    conn.commit()
+
+    tqdm.write(f"OK: {os.path.basename(prepared.path)} -> {table} (sheet='{prepared.sheet}', rows={rows})")
+    return rows
+
+def _write_file(conn: sqlite3.Connection, prepared: PreparedFile, cfg: dict, state: WriteState) -> None:
+    """Zápis souboru + záznam do manifestu."""
+    rows = write_prepared(conn, prepared, cfg, first=prepared.table not in state.seen_tables)
+    state.seen_tables.add(prepared.table)
+    state.table_columns.setdefault(prepared.table, set()).update(prepared.columns)
+
+    info = state.infos.get(prepared.path)
+    if info is not None:
+        record_file(
+            conn, info, prepared.table, rows,
+            schema_hash(prepared.columns, prepared.col_types),
+            state.settings,
         )
 
-    # indexes (jen existující sloupce)
-    if bool(cfg["sqlite"].get("create_indexes", True)):
-        idx_cfg = cfg["sqlite"].get("indexes", [])
-        existing = set(df.columns)
-        filtered = []
-        for cols in idx_cfg:
-            cols2 = [c for c in cols if c in existing]
-            if cols2:
-                filtered.append(cols2)
-        if filtered:
-            create_indexes(conn, table, filtered)
-
-    tqdm.write(f"OK: {file_basename} -> {table} (sheet='{sheet}', rows={len(df)})")
-
-def run_import(config: Config) -> None:
+def load_one_xlsx(conn: sqlite3.Connection, xlsx_path: str, cfg: dict, logger: ImportLogger,
+                  state: Optional[WriteState] = None) -> None:
+    """Sériový import jednoho souboru - dávky se čtou a zapisují průběžně."""
+    standalone = state is None
+    state = state or WriteState(settings=settings_hash(cfg))
+    # if_exists=fail ověříme ještě před (pomalým) čtením souboru
+    table = table_name_for(xlsx_path, cfg)
+    if table not in state.seen_tables:
+        check_if_exists(conn, table, cfg)
+    prepared = stream_xlsx(xlsx_path, cfg, logger)
+    try:
+        _write_file(conn, prepared, cfg, state)
+    finally:
+        prepared.close()  # zavře sešit i při chybě zápisu
+    if standalone:
+        finish_tables(conn, state, cfg)
+
+def finish_tables(conn: sqlite3.Connection, state: WriteState, cfg: dict) -> None:
+    """Odložené kroky po načtení všech souborů - vytvoření indexů a ANALYZE."""
+    for table, columns in state.table_columns.items():
+        create_table_indexes(conn, table, columns, cfg)
+    if bool(cfg["sqlite"].get("analyze", True)):
+        for table in state.table_columns:
+            conn.execute(f'ANALYZE "{table}"')
+        conn.commit()
+
+def refresh_derived(conn: sqlite3.Connection, written: Set[str], cfg: dict) -> None:
+    """
+    Odvozené tabulky: measurements + dimenze (facts) a slovník filtrů (filter_dictionary).
+
+    written = datové tabulky změněné od posledního přepočtu; vypnutá fakta se smažou.
+    """
+    if bool((cfg.get("facts") or {}).get("enabled", False)):
+        refresh_facts(conn, written, cfg)
+    else:
+        drop_facts(conn)
+    dict_cfg = cfg.get("filter_dictionary") or {}
+    if bool(dict_cfg.get("enabled", True)):
+        refresh_filter_dictionary(conn, written, dict_cfg.get("columns"))
+
+def _prepare_worker(xlsx_path: str, cfg: dict) -> Tuple[str, Optional[PreparedFile], List[ImportProblem], Optional[str]]:
+    """Worker procesu: připraví soubor, chyby vrací místo vyhození (kvůli picklování)."""
+    logger = ImportLogger()
+    try:
+        return xlsx_path, prepare_xlsx(xlsx_path, cfg, logger), logger.problems, None
+    except Exception as e:
+        return xlsx_path, None, logger.problems, str(e)
+
+def resolve_workers(cfg: dict, workers: Optional[int] = None) -> int:
+    """Počet worker procesů: argument > processing.workers > 1 (0 = počet CPU)."""
+    if workers is None:
+        workers = int((cfg.get("processing") or {}).get("workers", 1))
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return workers
+
+def _import_serial(conn: sqlite3.Connection, files: List[str], cfg: dict, logger: ImportLogger,
+                   state: WriteState) -> None:
+    for f in tqdm(files, desc="Import XLSX", unit="soubor"):
+        try:
+            load_one_xlsx(conn, f, cfg, logger, state)
+        except Exception as e:
+            logger.add_general_error(os.path.basename(f), "", str(e))
+            tqdm.write(f"CHYBA: {f}: {e}")
+
+def _import_parallel(conn: sqlite3.Connection, files: List[str], cfg: dict, logger: ImportLogger,
+                     state: WriteState, workers: int) -> None:
+    """
+    Worker procesy připravují soubory, hlavní proces je jediný zapisovatel.
+
+    Výsledky se zapisují v pořadí souborů (stejný výsledek jako sériový import);
+    rozpracovaných souborů je nejvýše 2x počet workerů. Připravené dávky čekají
+    ve spool souborech na disku, v paměti je jen dávka, která se právě zpracovává.
+    """
+    pending = deque()
+    remaining = iter(files)
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for f in islice(remaining, 2 * workers):
+                pending.append((f, pool.submit(_prepare_worker, f, cfg)))
+
+            with tqdm(total=len(files), desc=f"Import XLSX ({workers} procesů)", unit="soubor") as bar:
+                while pending:
+                    f, future = pending.popleft()
+                    try:
+                        _, prepared, problems, error = future.result()
+                    except Exception as e:
+                        # pád worker procesu (např. nedostatek paměti)
+                        prepared, problems, error = None, [], str(e)
+
+                    nxt = next(remaining, None)
+                    if nxt is not None:
+                        pending.append((nxt, pool.submit(_prepare_worker, nxt, cfg)))
+
+                    logger.problems.extend(problems)
+                    try:
+                        if error is not None:
+                            raise RuntimeError(error)
+                        prepared.open_spool()
+                        _write_file(conn, prepared, cfg, state)
+                    except Exception as e:
+                        logger.add_general_error(os.path.basename(f), "", str(e))
+                        tqdm.write(f"CHYBA: {f}: {e}")
+                    finally:
+                        if prepared is not None:
+                            prepared.close()
+                    bar.update(1)
+    finally:
+        # přerušený import - smazat spool soubory nezapsaných souborů
+        for _, future in pending:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                prepared = future.result()[1]
+                if prepared is not None:
+                    prepared.close()
+
+def _plan_files(conn: sqlite3.Connection, files: List[str], cfg: dict, base_dir: Path,
+                state: WriteState, incremental: bool) -> List[str]:
+    """
+    Otisky vstupních souborů a výběr souborů k importu.
+
+    Plný import importuje vše (při if_exists=replace začíná manifest dotčených
+    tabulek znovu). Inkrementální import přestaví jen tabulky s novými,
+    změněnými nebo odstraněnými soubory.
+    """
+    ensure_manifest(conn)
+    manifest = load_manifest(conn)
+    infos = [file_info(f, base_dir, manifest) for f in files]
+    state.infos = {i.path: i for i in infos}
+    tables = {i.key: table_name_for(i.path, cfg) for i in infos}
+
+    if not incremental:
+        if cfg["output"]["if_exists"].lower() == "replace":
+            forget_tables(conn, set(tables.values()))
+        return files
+
+    affected, to_import = plan_incremental(infos, tables, manifest, state.settings)
+    # soubory se stejným obsahem, ale novým mtime - příště se nemusí hashovat
+    touch_files(conn, [i for i in infos if tables[i.key] not in affected], manifest)
+    if not affected:
+        return []
+
+    print(f"Přestavované tabulky: {', '.join(sorted(affected))} "
+          f"({len(to_import)} souborů, {len(files) - len(to_import)} beze změny)")
+    # Dotčené tabulky se přestaví celé (bez ohledu na if_exists)
+    cur = conn.cursor()
+    for table in affected:
+        cur.execute(f'DROP TABLE IF EXISTS "{table}"')
+    conn.commit()
+    forget_tables(conn, affected)
+    return [i.path for i in to_import]
+
+def run_import(config: Config, workers: Optional[int] = None, incremental: bool = False) -> None:
     cfg = config.raw
     base_dir = config.base_dir
     
@@ -250,12 +629,24 @@ def run_import(config: Config) -> None:
     try:
         apply_pragmas(conn, cfg["sqlite"].get("pragmas", {}))
 
-        for f in tqdm(files, desc="Import XLSX", unit="soubor"):
-            try:
-                load_one_xlsx(conn, f, cfg, logger)
-            except Exception as e:
-                logger.add_general_error(os.path.basename(f), "", str(e))
-                tqdm.write(f"CHYBA: {f}: {e}")
+        state = WriteState(settings=settings_hash(cfg))
+        files = _plan_files(conn, files, cfg, base_dir, state, incremental)
+        if not files:
+            print("Beze změn - není co importovat.")
+            # odvozené tabulky se i tak doplní (např. po zapnutí facts.enabled)
+            refresh_derived(conn, set(state.table_columns), cfg)
+            return
+
+        workers = min(resolve_workers(cfg, workers), len(files))
+        if workers > 1:
+            _import_parallel(conn, files, cfg, logger, state, workers)
+        else:
+            _import_serial(conn, files, cfg, logger, state)
+
+        if state.table_columns:
+            print("Vytvářím indexy...")
+            finish_tables(conn, state, cfg)
+        refresh_derived(conn, set(state.table_columns), cfg)
     finally:
         conn.close()
     
@@ -0,0 +1,119 @@
+"""
+Streamované čtení XLSX listu po dávkách řádků.
+
+Nad openpyxl read_only + iter_rows(values_only=True) - celý list se nikdy
+nenačte do jednoho object DataFrame. Hodnoty se převádí stejně jako
+pd.read_excel(engine="openpyxl", dtype=object): celočíselné floaty na int,
+prázdné buňky a běžné NA řetězce na NaN, názvy sloupců bez hlavičky
+"Unnamed: i", duplicitní názvy "x.1", "x.2".
+"""
+from typing import Iterator, List
+import numpy as np
+import pandas as pd
+
+from .header_detect import DetectedSheet
+
+# Řetězce, které pd.read_excel ve výchozím stavu převádí na NaN
+NA_STRINGS = frozenset([
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a",
+    "nan", "null",
+])
+
+# Chybové hodnoty buněk Excelu (read_excel je vrací jako NaN)
+EXCEL_ERRORS = frozenset([
+    "#NULL!", "#DIV/0!", "#VALUE!", "#REF!", "#NAME?", "#NUM!", "#N/A",
+])
+
+def _convert_cell(v):
+    """Hodnota buňky jako u pd.read_excel(dtype=object)."""
+    if v is None:
+        return np.nan
+    if isinstance(v, str):
+        return np.nan if v in NA_STRINGS or v in EXCEL_ERRORS else v
+    if isinstance(v, float):
+        if v.is_integer():
+            return int(v)
+        return v
+    return v
+
+def _header_names(row: tuple) -> List[str]:
+    """Názvy sloupců z řádku hlavičky (bez prázdných buněk na konci)."""
+    values = list(row)
+    while values and (values[-1] is None or values[-1] == ""):
+        values.pop()
+
+    names = []
+    seen = {}
+    for i, v in enumerate(values):
+        v = _convert_cell(v)
+        name = f"Unnamed: {i}" if pd.isna(v) else v
+        k = seen.get(name, 0)
+        seen[name] = k + 1
+        if k:
+            # stejně jako pandas: x, x.1, x.2, ...
+            dup = f"{name}.{k}"
+            while dup in seen:
+                k += 1
+                dup = f"{name}.{k}"
+            seen[dup] = 1
+            name = dup
+        names.append(name)
+    return names
+
+def _batch_frame(rows: List[tuple], columns: List[str], start: int) -> pd.DataFrame:
+    """
+    Dávka řádků jako object DataFrame, sestavený po sloupcích.
+
+    Index je pořadí řádku za hlavičkou (0 = první datový řádek), takže
+    index + header_row + 1 je číslo řádku v Excelu i napříč dávkami.
+    """
+    data = {
+        j: [_convert_cell(r[j]) if j < len(r) else np.nan for r in rows]
+        for j in range(len(columns))
+    }
+    df = pd.DataFrame(data, index=pd.RangeIndex(start, start + len(rows)), dtype=object)
+    df.columns = columns
+    return df.dropna(how="all")
+
+class SheetReader:
+    """
+    List sešitu čtený po dávkách, navazuje na iterátor z detekce hlavičky.
+
+    Hned jsou známé názvy sloupců (columns); iterace vrací object
+    DataFrame s nejvýše batch_rows řádky, plně prázdné řádky jsou vynechány.
+    extra_rows jsou Excel řádky s hodnotami za posledním sloupcem hlavičky -
+    tyto hodnoty se nenačítají, seznam je úplný až po dočtení listu.
+    """
+
+    def __init__(self, detected: DetectedSheet, batch_rows: int):
+        self.header_row = detected.header_row
+        self.batch_rows = max(1, int(batch_rows))
+        self.extra_rows: List[int] = []
+        self.columns = _header_names(detected.header)
+        self._detected = detected
+        self._rows = detected.rows
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        n_cols = len(self.columns)
+        start = 0
+        buf: List[tuple] = []
+        for r in self._rows:
+            if len(r) > n_cols and any(v is not None and v != "" for v in r[n_cols:]):
+                self.extra_rows.append(self.header_row + 1 + start + len(buf))
+            buf.append(r)
+            if len(buf) >= self.batch_rows:
+                yield _batch_frame(buf, self.columns, start)
+                start += len(buf)
+                buf = []
+        if buf:
+            yield _batch_frame(buf, self.columns, start)
+
+    def close(self) -> None:
+        self._detected.close()
+
+    def __enter__(self) -> "SheetReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -13,6 +13,10 @@ import sqlite3
 import argparse
 from pathlib import Path
 
+from monras_etl.config import load_config
+from monras_etl import sqlite_io
+from monras_etl.dictionary import data_tables
+
 DB_PATH = Path(__file__).parent.parent / "monras_import.sqlite"
 
 # Radionuklidy k ponechání (ostatní budou smazány)
@@ -185,6 +189,18 @@ def delete_nuklids(conn: sqlite3.Connection, dry_run: bool = True):
     print(f"CELKEM: Ponechat {total_kept:,}, Smazat {total_deleted:,}")
 
 
+def refresh_derived(conn: sqlite3.Connection, dry_run: bool = True):
+    """Přepočítá fakta (measurements) a slovník filtrů po změně datových tabulek."""
+    if dry_run:
+        print("\n[DRY-RUN] Fakta a slovník filtrů by se přepočítaly")
+        return
+    cfg = load_config(Path(__file__).parent / "config.yaml").raw
+    tables = set(data_tables(conn))
+    print("\nPřepočítávám fakta a slovník filtrů...")
+    sqlite_io.refresh_derived(conn, tables, cfg)
+    print("✓ Hotovo")
+
+
 def vacuum_db(conn: sqlite3.Connection, dry_run: bool = True):
     """Provede VACUUM pro zmenšení databáze."""
     if dry_run:
@@ -215,6 +231,8 @@ def main():
         if not args.skip_nuklids:
             delete_nuklids(conn, dry_run=args.dry_run)
         
+        refresh_derived(conn, dry_run=args.dry_run)
+
         if not args.dry_run:
             vacuum_db(conn, dry_run=args.dry_run)
         
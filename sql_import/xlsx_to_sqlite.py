@@ -1,14 +1,22 @@
+import argparse
 from pathlib import Path
 from monras_etl.config import load_config
 from monras_etl.sqlite_io import run_import
 
 def main():
+    parser = argparse.ArgumentParser(description="Import XLSX souborů MonRaS do SQLite")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Počet procesů pro čtení XLSX (0 = počet CPU, 1 = sériově; výchozí z config.yaml)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Importovat jen nové/změněné soubory a přestavět jen dotčené tabulky")
+    args = parser.parse_args()
+
     # Automaticky načte config.yaml ze stejného adresáře jako tento skript
     script_dir = Path(__file__).parent
     config_path = script_dir / "config.yaml"
     
     cfg = load_config(config_path)
-    run_import(cfg)
+    run_import(cfg, workers=args.workers, incremental=args.incremental)
 
 if __name__ == "__main__":
     main()